@@ -0,0 +1,257 @@
+"""
+Benchmarks : Latence, débit et mémoire des analyseurs NLP (sans réseau)
+
+- Les modèles sont, par défaut, de petits checkpoints locaux initialisés aléatoirement de la même
+  famille que les modèles réels (DeBERTa, BERT, BART) ; --real utilise les vrais modèles s'ils sont
+  déjà dans le cache Hugging Face (aucun téléchargement : HF_HUB_OFFLINE=1).
+- Les textes sont des transcriptions synthétiques de longueur contrôlée (templates de make_data.py).
+- Trois charges : appels unitaires, appels en lots, requêtes concurrentes (file de micro-batching).
+- Pour chaque cas : latence p50/p95/p99, textes par seconde, mémoire ajoutée par le cas (pic de RSS pendant
+  le cas moins la RSS au départ, pic remis à zéro avant chaque cas), mémoire du modèle et temps de chargement.
+- Les résultats sont écrits en JSON et comparés à une référence avec un seuil de régression.
+
+Usage :
+    python benchmarks/bench_nlp.py --out bench.json --baseline benchmarks/baseline.json
+    python benchmarks/bench_nlp.py --update-baseline   # enregistre la référence
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import asyncio # Charge concurrente
+import json # Résultats et référence
+import os # Variables d'environnement et chemins
+import platform # Description de la machine dans les résultats
+import resource # RSS maximale du processus (repli hors Linux)
+import sys # Ajout de la racine du projet au chemin d'import
+import time # Mesure des latences
+from pathlib import Path # Manipulation des chemins
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1") # Aucun accès réseau pendant les benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # Racine du projet : rend les packages importables
+
+from src.data.templates import dialogue_templates, synthetic_transcript # Transcriptions synthétiques
+from src.nlp.batching import MicroBatcher # File de micro-batching (charge concurrente)
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.registry import ModelRegistry # Registre dédié au benchmark
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def percentile(values: List[float], q: float) -> float: # Percentile (interpolation linéaire)
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def resident_memory_mb() -> float: # RSS actuelle du processus
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError: # Hors Linux : maximum atteint (ru_maxrss en Ko sous Linux, en octets sous macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def reset_peak_rss() -> bool: # Remet à zéro le pic de RSS du processus (Linux >= 4.0)
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float: # Pic de RSS depuis la dernière remise à zéro
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024 # Ko
+    except OSError:
+        pass
+    return resident_memory_mb()
+
+
+def measure_rss(case: Callable[[], dict]) -> dict: # Exécute un cas et ajoute la mémoire qu'il a ajoutée
+    """Le pic est remis à zéro avant le cas ; sans remise à zéro possible, on mesure la RSS après le cas (repli)."""
+    before = resident_memory_mb()
+    peak_reset = reset_peak_rss()
+    stats = case()
+    after = peak_rss_mb() if peak_reset else resident_memory_mb()
+    return {**stats, "rss_delta_mb": max(after - before, 0.0)}
+
+
+def synthetic_texts(n_texts: int, n_turns: int) -> List[str]: # Textes de longueur contrôlée, thèmes en alternance
+    topics = sorted(dialogue_templates)
+    return [synthetic_transcript(topics[i % len(topics)], i + 1, n_turns) for i in range(n_texts)]
+
+
+def summarize_latencies(latencies: List[float], n_texts: int, seconds: float) -> dict: # Statistiques d'un cas
+    return {
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "texts_per_second": n_texts / seconds if seconds else 0.0,
+    }
+
+
+def bench_single(fn: Callable[[str], object], texts: List[str]) -> dict: # Un appel par texte
+    latencies = []
+    start = time.perf_counter()
+    for text in texts:
+        begin = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - begin)
+    return summarize_latencies(latencies, len(texts), time.perf_counter() - start)
+
+
+def bench_batched(fn: Callable[[List[str]], object], texts: List[str], batch_size: int) -> dict: # Un appel par groupe de batch_size textes
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        begin = time.perf_counter()
+        fn(texts[offset:offset + batch_size])
+        latencies.append(time.perf_counter() - begin)
+    return summarize_latencies(latencies, len(texts), time.perf_counter() - start)
+
+
+def bench_concurrent(fn: Callable[[List[str]], list], texts: List[str], concurrency: int, batch_size: int, max_wait_ms: float) -> dict: # Clients concurrents derrière une file
+    async def run() -> tuple:
+        batcher = MicroBatcher(fn, max_batch_size=batch_size, max_wait_ms=max_wait_ms, max_queue=len(texts) + concurrency)
+        await batcher.start()
+        latencies: List[float] = []
+
+        async def client(client_texts: List[str]) -> None: # Chaque client envoie ses requêtes l'une après l'autre
+            for text in client_texts:
+                begin = time.perf_counter()
+                await batcher.submit(text)
+                latencies.append(time.perf_counter() - begin)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(texts[i::concurrency]) for i in range(concurrency)])
+        seconds = time.perf_counter() - start
+        await batcher.stop()
+        return latencies, seconds
+
+    latencies, seconds = asyncio.run(run())
+    return summarize_latencies(latencies, len(texts), seconds)
+
+
+def build_analyzers(real: bool, models_directory: Optional[str]) -> Dict[str, object]: # Analyseurs sur modèles locaux ou réels
+    registry = ModelRegistry()
+    if real: # Vrais modèles (doivent déjà être dans le cache Hugging Face)
+        return {
+            "classify": DialogueClassifier(registry=registry),
+            "sentiment": SentimentAnalyzer(registry=registry),
+            "summarize": DialogueSummarizer(registry=registry),
+        }
+    from benchmarks.tiny_models import DEFAULT_DIRECTORY, build_tiny_models # Import local : inutile avec --real
+    paths = build_tiny_models(models_directory or DEFAULT_DIRECTORY)
+    return {
+        "classify": DialogueClassifier(model=paths["classify"], registry=registry),
+        "sentiment": SentimentAnalyzer(model=paths["sentiment"], registry=registry),
+        "summarize": DialogueSummarizer(model=paths["summarize"], registry=registry),
+    }
+
+
+def run_suite(args: argparse.Namespace) -> dict: # Exécute tous les cas
+    analyzers = build_analyzers(args.real, args.models_dir)
+    results: Dict[str, dict] = {}
+    for name in [name.strip() for name in args.models.split(",") if name.strip()]:
+        analyzer = analyzers[name]
+        memory_before = resident_memory_mb()
+        start = time.perf_counter()
+        analyzer.registry.preload([analyzer.spec])
+        load_seconds = time.perf_counter() - start
+        model_rss_mb = resident_memory_mb() - memory_before # Mémoire résidente ajoutée par le chargement du modèle
+        single = {"classify": analyzer.classify, "sentiment": analyzer.analyze, "summarize": analyzer.summarize}[name]
+        batched = {"classify": analyzer.classify_batch, "sentiment": analyzer.analyze_batch, "summarize": analyzer.summarize_batch}[name]
+        for n_turns in [int(value) for value in args.turns.split(",")]:
+            texts = synthetic_texts(args.texts, n_turns)
+            batched(texts[:args.batch_size], batch_size=args.batch_size) # Préchauffage
+            cases = {
+                "single": lambda: bench_single(single, texts),
+                "batched": lambda: bench_batched(lambda group: batched(group, batch_size=args.batch_size), texts, args.batch_size),
+                "concurrent": lambda: bench_concurrent(lambda group: batched(group, batch_size=args.batch_size), texts, args.concurrency, args.batch_size, args.max_wait_ms),
+            }
+            for workload in [value.strip() for value in args.workloads.split(",") if value.strip()]:
+                key = f"{name}.{workload}.turns{n_turns}"
+                results[key] = {**measure_rss(cases[workload]), "load_seconds": load_seconds, "model_rss_mb": model_rss_mb}
+                print(f"{key:<32} p50={results[key]['p50_ms']:8.2f}ms  p95={results[key]['p95_ms']:8.2f}ms  "
+                      f"{results[key]['texts_per_second']:8.1f} textes/s  +rss={results[key]['rss_delta_mb']:.0f}Mo")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]: # Régressions par rapport à la référence
+    """Retourne les cas dont la latence p95 augmente ou dont le débit baisse de plus de threshold (ex: 0.2 = 20 %)."""
+    regressions = []
+    for key, reference in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if reference["p95_ms"] and current["p95_ms"] > reference["p95_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p95 {reference['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if reference["texts_per_second"] and current["texts_per_second"] < reference["texts_per_second"] * (1 - threshold):
+            regressions.append(f"{key}: débit {reference['texts_per_second']:.1f} -> {current['texts_per_second']:.1f} textes/s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks des analyseurs NLP (hors ligne)")
+    parser.add_argument("--models", default="classify,sentiment,summarize", help="Analyseurs mesurés")
+    parser.add_argument("--workloads", default="single,batched,concurrent", help="Charges mesurées")
+    parser.add_argument("--turns", default="4,16,64", help="Longueurs des transcriptions (nombre de tours de parole)")
+    parser.add_argument("--texts", type=int, default=64, help="Nombre de textes par cas")
+    parser.add_argument("--batch-size", type=int, default=16, help="Taille des lots")
+    parser.add_argument("--concurrency", type=int, default=16, help="Nombre de clients concurrents")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Fenêtre de regroupement de la file concurrente")
+    parser.add_argument("--real", action="store_true", help="Utilise les vrais modèles (déjà en cache local)")
+    parser.add_argument("--models-dir", help="Dossier des petits modèles locaux")
+    parser.add_argument("--out", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Seuil de régression (0.2 = 20 %%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistre les résultats comme nouvelle référence")
+    args = parser.parse_args(argv)
+
+    try:
+        import torch # Threads utilisés : à reporter pour comparer des mesures entre elles
+        threads = torch.get_num_threads()
+    except ImportError:
+        threads = None
+    results = run_suite(args)
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+                 "torch_threads": threads, "real_models": args.real, "texts": args.texts, "batch_size": args.batch_size},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Référence enregistrée : {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"Aucune régression au-delà de {args.threshold:.0%} par rapport à {args.baseline}")
+    else:
+        print(f"Aucune référence ({args.baseline}) : comparaison ignorée, l'enregistrer avec --update-baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmarks : Petits modèles locaux initialisés aléatoirement (DeBERTa, BERT, BART)
+
+Ils ont la même architecture que les modèles réels des analyseurs mais quelques milliers de
+paramètres : les benchmarks tournent sans réseau et mesurent le coût du code autour du modèle
+(tokenisation, batching, cache, file d'attente). Leurs sorties n'ont aucun sens linguistique.
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Chemins des checkpoints locaux
+import re # Découpage du vocabulaire
+import tempfile # Dossier par défaut des checkpoints
+from typing import Dict, List
+# ----- Third party libraries -----
+import torch # Graine de l'initialisation aléatoire
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors # Tokenizer WordLevel construit localement
+from transformers import (
+    BartConfig,
+    BartForConditionalGeneration,
+    BertConfig,
+    BertForSequenceClassification,
+    DebertaV2Config,
+    DebertaV2ForSequenceClassification,
+    PreTrainedTokenizerFast,
+)
+# ----- Local modules -----
+from src.data.templates import dialogue_templates # Vocabulaire des transcriptions synthétiques
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "genai_telephony_tiny_models") # Checkpoints réutilisés d'un lancement à l'autre
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "<s>", "</s>"]
+CANDIDATE_LABELS = ["facturation", "support technique", "commande", "réclamation", "retour", "autre"] # Labels de DialogueClassifier
+
+
+def _vocabulary() -> List[str]: # Mots des templates, des labels et de l'hypothèse du zero-shot
+    text = " ".join(line for lines in dialogue_templates.values() for line in lines)
+    text += " " + " ".join(CANDIDATE_LABELS) + " This example is . Client_"
+    words = sorted(set(re.findall(r"\w+|[^\w\s]", text.lower())))
+    return SPECIAL_TOKENS + words + [str(digit) for digit in range(10)]
+
+
+def _tokenizer(first: str, last: str, max_length: int, input_names: List[str]) -> PreTrainedTokenizerFast: # Tokenizer WordLevel
+    vocabulary = {token: index for index, token in enumerate(dict.fromkeys(_vocabulary()))}
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocabulary, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.Lowercase() # Vocabulaire en minuscules
+    tokenizer.pre_tokenizer = pre_tokenizers.Sequence([pre_tokenizers.Whitespace(), pre_tokenizers.Digits(individual_digits=True)])
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single=f"{first} $A {last}",
+        pair=f"{first} $A {last} $B {last}",
+        special_tokens=[(first, vocabulary[first]), (last, vocabulary[last])],
+    )
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]", pad_token="[PAD]", mask_token="[MASK]",
+        cls_token=first, sep_token=last, bos_token=first, eos_token=last,
+        model_max_length=max_length,
+    )
+    fast.model_input_names = input_names
+    return fast
+
+
+def build_tiny_models(directory: str = DEFAULT_DIRECTORY, seed: int = 0) -> Dict[str, str]: # Crée (une fois) les checkpoints locaux
+    """
+    Crée les trois checkpoints de remplacement s'ils n'existent pas encore.
+    Args:
+        directory (str): Dossier des checkpoints
+        seed (int): Graine de l'initialisation aléatoire (mêmes poids d'un lancement à l'autre)
+    Returns:
+        Dict[str, str]: Chemin du checkpoint par analyseur ("classify", "sentiment", "summarize")
+    """
+    paths = {name: os.path.join(directory, name) for name in ("classify", "sentiment", "summarize")}
+    if all(os.path.exists(os.path.join(path, "config.json")) for path in paths.values()):
+        return paths
+    torch.manual_seed(seed)
+
+    bert_tokenizer = _tokenizer("[CLS]", "[SEP]", 512, ["input_ids", "attention_mask"])
+    vocab_size = len(bert_tokenizer)
+    small = dict(hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64, max_position_embeddings=512)
+
+    deberta = DebertaV2ForSequenceClassification(DebertaV2Config( # Même famille que DeBERTa-v3 (attention relative)
+        vocab_size=vocab_size, type_vocab_size=0, relative_attention=True, pos_att_type=["p2c", "c2p"],
+        position_buckets=64, norm_rel_ebd="layer_norm", share_att_key=True, position_biased_input=False,
+        id2label={0: "entailment", 1: "neutral", 2: "contradiction"}, label2id={"entailment": 0, "neutral": 1, "contradiction": 2},
+        pad_token_id=0, **small,
+    ))
+    deberta.save_pretrained(paths["classify"])
+    bert_tokenizer.save_pretrained(paths["classify"])
+
+    stars = {index: f"{index + 1} star" + ("s" if index else "") for index in range(5)} # Labels du modèle nlptown
+    bert = BertForSequenceClassification(BertConfig(
+        vocab_size=vocab_size, id2label=stars, label2id={label: index for index, label in stars.items()}, pad_token_id=0, **small,
+    ))
+    bert.save_pretrained(paths["sentiment"])
+    bert_tokenizer.save_pretrained(paths["sentiment"])
+
+    bart_tokenizer = _tokenizer("<s>", "</s>", 1024, ["input_ids", "attention_mask"])
+    vocabulary = bart_tokenizer.get_vocab()
+    bart = BartForConditionalGeneration(BartConfig(
+        vocab_size=vocab_size, d_model=32, encoder_layers=2, decoder_layers=2, encoder_attention_heads=2,
+        decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64, max_position_embeddings=1024,
+        pad_token_id=vocabulary["[PAD]"], bos_token_id=vocabulary["<s>"], eos_token_id=vocabulary["</s>"],
+        decoder_start_token_id=vocabulary["</s>"], forced_eos_token_id=vocabulary["</s>"], num_beams=4,
+    ))
+    bart.save_pretrained(paths["summarize"])
+    bart_tokenizer.save_pretrained(paths["summarize"])
+    return paths
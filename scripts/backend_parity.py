@@ -0,0 +1,160 @@
+"""
+Ce script sert à comparer les backends d'inférence CPU (eager fp32, int8, onnx) de chaque analyseur.
+
+- Il fait passer un échantillon étiqueté (par défaut les transcriptions générées, dont le thème est dans le nom du fichier) dans chaque backend.
+- Il mesure, par rapport au backend eager : l'accord des labels, la dérive des scores (écart absolu moyen) et, pour les résumés, le recouvrement des mots.
+- Il mesure aussi la latence par texte, le temps de chargement et la mémoire résidente ajoutée par le modèle.
+- Chaque backend est mesuré dans son propre processus : la mémoire d'un backend n'inclut jamais celle du précédent
+  (ni le chargement fp32 qui précède la première quantification int8, qui reste dans le processus de conversion).
+- Les résultats sont affichés et peuvent être écrits en JSON pour choisir un backend par modèle sur des mesures.
+
+Usage :
+    python scripts/backend_parity.py --backends eager,int8,onnx --json data/processed/backend_parity.json
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import json # Export des résultats
+import os # Gestion des chemins
+import resource # Mémoire résidente maximale (repli si /proc n'est pas disponible)
+import sys # Ajout de la racine du projet au chemin d'import
+import time # Mesure des latences
+from concurrent.futures import ProcessPoolExecutor # Un processus neuf par backend
+from multiprocessing import get_context # Démarrage "spawn" : aucun état hérité du processus parent
+from pathlib import Path # Manipulation des chemins
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # Racine du projet : rend le package src importable
+
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.registry import ModelRegistry # Registre dédié : chaque backend est chargé puis libéré
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+
+TOPIC_LABELS = { # Thème du nom de fichier (make_data.py) -> label du classifieur
+    "billing": "facturation",
+    "tech_support": "support technique",
+    "orders": "commande",
+    "returns": "retour",
+    "other": "autre",
+}
+
+
+def resident_memory_mb() -> float: # Mémoire résidente actuelle du processus
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError: # Hors Linux : maximum atteint (ru_maxrss en Ko sous Linux, en octets sous macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def load_sample(source: str, limit: Optional[int]) -> tuple: # Textes et thèmes attendus
+    paths = sorted(glob.glob(os.path.join(source, "*.txt")) if os.path.isdir(source) else glob.glob(source))[:limit]
+    texts, topics = [], []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            texts.append(file.read())
+        stem = Path(path).stem.rsplit("_", 1)[0] # billing_01 -> billing
+        topics.append(TOPIC_LABELS.get(stem))
+    return texts, topics
+
+
+def run_backend(kind: str, backend: str, texts: List[str], batch_size: int) -> dict: # Charge un backend et analyse l'échantillon (dans le processus courant)
+    registry = ModelRegistry() # Registre propre au backend : rien n'est partagé avec le backend précédent
+    analyzer = {"classify": DialogueClassifier, "sentiment": SentimentAnalyzer, "summarize": DialogueSummarizer}[kind](backend=backend, registry=registry)
+    memory_before = resident_memory_mb()
+    start = time.perf_counter()
+    registry.preload([analyzer.spec]) # Chargement (et conversion au premier lancement)
+    load_seconds = time.perf_counter() - start
+    memory_after = resident_memory_mb()
+    method = {"classify": analyzer.classify_batch, "sentiment": analyzer.analyze_batch, "summarize": analyzer.summarize_batch}[kind]
+    method(texts[:batch_size], batch_size=batch_size) # Préchauffage (allocations, compilation du graphe)
+    start = time.perf_counter()
+    outputs = method(texts, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    return {
+        "outputs": outputs,
+        "load_seconds": load_seconds,
+        "ms_per_text": 1000 * seconds / max(len(texts), 1),
+        "resident_mb": memory_after - memory_before,
+    }
+
+
+def run_backend_isolated(kind: str, backend: str, texts: List[str], batch_size: int) -> dict: # Mesure un backend dans un processus dédié
+    if backend != "eager": # Conversion préalable à part : le modèle fp32 chargé pour quantifier ou exporter resterait résident
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            pool.submit(_convert, kind, backend).result()
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_backend, kind, backend, texts, batch_size).result()
+
+
+def _convert(kind: str, backend: str) -> None: # Crée l'artefact converti s'il n'existe pas encore (processus jetable)
+    registry = ModelRegistry()
+    analyzer = {"classify": DialogueClassifier, "sentiment": SentimentAnalyzer, "summarize": DialogueSummarizer}[kind](backend=backend, registry=registry)
+    registry.preload([analyzer.spec])
+
+
+def _word_overlap(a: str, b: str) -> float: # Recouvrement (Jaccard) des mots de deux résumés
+    words_a, words_b = set(a.lower().split()), set(b.lower().split())
+    return len(words_a & words_b) / len(words_a | words_b) if words_a | words_b else 1.0
+
+
+def compare(kind: str, reference: list, outputs: list, topics: List[Optional[str]]) -> Dict[str, Optional[float]]: # Métriques de parité
+    if kind == "summarize":
+        overlaps = [_word_overlap(a, b) for a, b in zip(reference, outputs)]
+        return {"summary_overlap": sum(overlaps) / len(overlaps) if overlaps else None}
+    agreement = [a["label"] == b["label"] for a, b in zip(reference, outputs)]
+    drift = [abs(a["score"] - b["score"]) for a, b in zip(reference, outputs)]
+    metrics = {
+        "label_agreement": sum(agreement) / len(agreement) if agreement else None,
+        "score_drift": sum(drift) / len(drift) if drift else None,
+    }
+    if kind == "classify": # Exactitude sur l'échantillon étiqueté
+        labelled = [(output["label"], topic) for output, topic in zip(outputs, topics) if topic]
+        metrics["accuracy"] = sum(label == topic for label, topic in labelled) / len(labelled) if labelled else None
+    return metrics
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Parité et performance des backends d'inférence CPU")
+    parser.add_argument("--source", default="data/raw/transcripts", help="Dossier ou motif glob de l'échantillon")
+    parser.add_argument("--models", default="classify,sentiment,summarize", help="Analyseurs à comparer")
+    parser.add_argument("--backends", default="eager,int8,onnx", help="Backends à comparer (eager sert de référence)")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal de textes")
+    parser.add_argument("--batch-size", type=int, default=8, help="Taille des lots d'inférence")
+    parser.add_argument("--json", help="Fichier JSON de sortie")
+    args = parser.parse_args(argv)
+
+    texts, topics = load_sample(args.source, args.limit)
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    if "eager" not in backends: # La référence est toujours mesurée
+        backends.insert(0, "eager")
+    report = []
+    for kind in [name.strip() for name in args.models.split(",") if name.strip()]:
+        reference = None
+        for backend in backends:
+            try:
+                run = run_backend_isolated(kind, backend, texts, args.batch_size)
+            except ImportError as error: # Backend optionnel non installé (ex: optimum pour onnx)
+                print(f"{kind:<10} {backend:<6} ignoré : {error}")
+                continue
+            if backend == "eager":
+                reference = run["outputs"]
+            row = {"model": kind, "backend": backend, **{key: value for key, value in run.items() if key != "outputs"}}
+            row.update(compare(kind, reference, run["outputs"], topics))
+            report.append(row)
+            metrics = "  ".join(f"{key}={value:.3f}" for key, value in row.items() if isinstance(value, float))
+            print(f"{kind:<10} {backend:<6} {metrics}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"texts": len(texts), "results": report}, file, indent=2, ensure_ascii=False)
+        print(f"Rapport écrit : {args.json}")
+
+
+if __name__ == "__main__":
+    main()
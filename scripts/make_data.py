@@ -1,123 +1,226 @@
 """
 Ce script sert à générer automatiquement les données synthétiques nécessaires au projet.
 
-- Il crée un fichier CSV simulant les appels téléphoniques (CDR), avec des colonnes comme : identifiant d’appel, agent, durée, sujet, résolution, etc.
+- Il crée un fichier CSV (ou Parquet) simulant les appels téléphoniques (CDR), avec des colonnes comme : identifiant d’appel, agent, durée, sujet, résolution, etc.
 - Il génère des fichiers texte contenant des dialogues fictifs (transcriptions) pour chaque thème métier (facturation, support, commandes…).
 - Il applique un masquage des données personnelles (PII) pour garantir la confidentialité.
 - Il sauvegarde ces fichiers dans le dossier data/raw/ pour qu’ils soient utilisés dans l’analyse, l’entraînement du modèle et le système RAG.
 
 Ce script est la première étape du pipeline : il crée l’environnement de données sécurisé et contrôlé sur lequel tout le projet va s’appuyer.
+
+Passage à l'échelle (tests de charge) :
+- Les CDR sont générés par blocs (chunks) de colonnes NumPy, sans boucle Python par appel ; chaque bloc est écrit dès qu'il est prêt (mémoire bornée).
+- Les blocs (génération + hachage des numéros) et les transcriptions sont répartis sur plusieurs processus.
+- Chaque bloc et chaque transcription a sa propre graine dérivée de --seed : la sortie est identique quel que soit le nombre de workers (à --chunk-size égal).
+- Les dates d'appel partent de --start-date (par défaut : minuit il y a 30 jours, pour des données récentes) : deux lancements
+  sont identiques le même jour ; d'un jour à l'autre, passer --start-date pour retrouver exactement les mêmes fichiers.
+
+Usage :
+    python scripts/make_data.py                                   # 200 appels, 18 transcriptions (comme avant)
+    python scripts/make_data.py --calls 10000000 --transcripts 100000 --format parquet --workers 8
+    python scripts/make_data.py --seed 7 --start-date 2024-01-01                # Jeu de données reproductible à l'identique
 """
 
 # ----- Import libraries PEP 8 -----
 # ----- Standard library -----
-import os # Librairie pour les opérations système et gestion des chemins de fichiers (Créer des dossiers, manipule des fichiers, gére des chemin sur l'ordinateur, etc.)
-import pandas as pd # Librairie qui sert à manipuler et analyser les métadonnées (tableau de donnéez, CSV, Excel, SQL, etc.)
-import numpy as np # Librairie pour les calculs numériques et la génération de données aléatoires (mathématiques, statistiques, etc.) On l’utilise ici pour générer des nombres aléatoires (par exemple, pour simuler la durée des appels, choisir un agent ou un sujet au hasard)
+import argparse # Librairie pour lire les paramètres passés en ligne de commande (nombre d'appels, format, graine, etc.)
 import hashlib # Librairie pour le hachage et le masquage des données (sert à transformer une information comme un numéro de téléphone) en une suite de caractères incompréhensible (appelée ‘hash’))
+import os # Librairie pour les opérations système et gestion des chemins de fichiers (Créer des dossiers, manipule des fichiers, gére des chemin sur l'ordinateur, etc.)
+import sys # Librairie pour accéder au chemin d'import de Python (sys.path)
+import time # Librairie pour mesurer la durée de la génération (débit affiché)
+from collections import deque # File des blocs en cours de calcul (écrits dans l'ordre, en nombre borné)
+from concurrent.futures import ProcessPoolExecutor # Répartition des blocs et des transcriptions sur plusieurs processus
 from datetime import datetime, timedelta # Librairie pour manipuler les dates et heures (datetime pour la date et l'heure actuelles, timedelta pour faire des calculs avec les dates, comme ajouter ou soustraire des jours, heures, etc.)
+from pathlib import Path # Librairie pour manipuler les chemins de fichiers
+from typing import List, Optional
 # ----- Third party libraries -----
+import numpy as np # Librairie pour les calculs numériques et la génération de données aléatoires. On l’utilise ici pour générer des colonnes entières de nombres aléatoires d'un coup (durées, agents, sujets…)
+import pandas as pd # Librairie qui sert à manipuler et analyser les métadonnées (tableau de donnéez, CSV, Excel, SQL, etc.)
 from dotenv import load_dotenv # Librairie qui sert à lire un fichier spécial (appelé .env) où on peut ranger des secrets ou des paramètres (comme un mot de passe, un salt, une clé API). load_dotenv() charge ces variables d'environnement pour qu'on puisse les utiliser dans le script.
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # Ajoute la racine du projet au chemin d'import pour pouvoir importer le package src
+from src.data.templates import synthetic_transcript # Templates de dialogues par thème (partagés avec les benchmarks)
+
 # 1. Chargement du salt PII depuis .env
 load_dotenv() # load_dotenv() charge les variables d'environnement depuis un fichier .env dans le répertoire courant.
 salt_pii = os.getenv("SALT_PII", "changeme") # Récupère la variable d'environnement : SALT en cryptographie est une chaîne de caractères aléatoire ajoutée aux données avant le hachage pour renforcer la sécurité. PII (Personally Identifiable Information) désigne les informations permettant d'identifier une personne (nom, adresse, numéro de téléphone, etc.). Ici, on utilise un salt pour masquer les données personnelles dans les fichiers générés. changeme est une valeur par défaut à remplacer.
 
-# 2. Dossiers de sortie
-raw_directory = "data/raw" # variable qui va contenir le chemin du dossier où on va enregistrer les fichiers de données brutes (raw data)
-transcripts_directory = os.path.join(raw_directory, "transcripts") # os.path.join() combine les parties de chemin de fichiers de manière sûre et compatible avec le système d'exploitation. Ici, on crée le chemin complet vers le dossier des transcriptions en combinant le dossier raw avec "transcripts".
-os.makedirs(raw_directory, exist_ok=True) # os.makedirs() crée le dossier raw s'il n'existe pas déjà. exist_ok=True évite une erreur si le dossier existe déjà.
-os.makedirs(transcripts_directory, exist_ok=True) # os.makedirs() crée le dossier transcripts s'il n'existe pas déjà. exist_ok=True évite une erreur si le dossier existe déjà.
+# 2. Paramètres de génération (valeurs fixes ; les quantités sont des arguments de la ligne de commande)
+agents = np.array(["A", "B", "C", "D", "E"]) # Liste des identifiants d'agents (5 agents fictifs pour simuler la réalité)
+topics = np.array(["billing", "tech_support", "orders", "returns", "other"]) # Liste des thèmes d'appels (facturation, support, commandes, retours, autres)
+CDR_STREAM, TRANSCRIPT_STREAM = 0, 1 # Deux familles de graines indépendantes : ajouter des appels ne change pas les transcriptions
 
-# 3. Paramètres de génération
-numbers_of_calls = 200 # Nombre d'appels à générer dans le CSV (on choisit 200 pour avoir un jeu de données réaliste)
-numbers_of_transcripts = 18 # Nombre de fichiers de dialogues à générer (pour couvrir tous les thèmes)
-agents = ["A", "B", "C", "D", "E"] # Liste des identifiants d'agents (5 agents fictifs pour simuler la réalité)
-topics = ["billing", "tech_support", "orders", "returns", "other"] # Liste des thèmes d'appels (facturation, support, commandes, retours, autres)
 
 def mask_pii(caller_number: str, salt: str = salt_pii) -> str: # Fonction qui prend en entrée un numéro de téléphone fictif (caller_number) et un salt (chaîne aléatoire pour renforcer la sécurité). Elle retourne le hash SHA-256 du numéro combiné avec le salt, ce qui masque le numéro original.
     """Hash le numéro fictif avec un salt pour masquer la PII."""
-    return hashlib.sha256((salt + caller_number).encode()).hexdigest() #On utilise la boîte à outils hashlib pour : Prendre le sel et le numéro, les coller ensemble, Les transformer en une suite de caractères incompréhensible (le hash), Retourner ce hash comme résultat
-
-# 4. Génération des appels (CDR) dans un CSV (CDR = Call Detail Record (Enregistrement de détail d'Appel))
-np.random.seed(42) # Fixation de la graine aléatoire pour que les résultats soient reproductibles (toujours les mêmes données générées)
-start_date = datetime.now() - timedelta(days=30) # On choisit une date de départ : il y a 30 jours
-cdr_rows = [] # Préparation d'une liste vide pour stocker chaque appel généré
-
-for i in range(numbers_of_calls): # boucle qui répète l'opération 200 fois (numbers_of_calls), pour créer chaque appel
-    call_id = f"CALL_{i+1:04d}" # Création d'un identifiant unique pour chaque appel, sous la forme CALL_0001, CALL_0002, etc.
-    caller_number = f"04{np.random.randint(2000000,3999999)}" # On génère un numéro de téléphone fictif de l'appelant, qui commence par 04 et se termine par 7 chiffres aléatoires
-    caller_id = mask_pii(caller_number) # Variable qui va contenir le numéro masqué (hashé) de l'appelant, en utilisant la fonction mask_pii définie plus haut
-    agent_id = np.random.choice(agents) # Variable qui va contenir l'identifiant d'un agent choisi au hasard parmi la liste agents (.np.random.choice())
-    start_timestamp = start_date + timedelta(minutes=np.random.randint(0, 43200))  # Variable qui va contenir une date et heure de début d'appel, répartie sur les 30 derniers jours (43200 minutes = 30 jours) : np.random.randint(0, 43200) tire au hasard un nombre de minutes entre 0 et 43200 (soit 30 jours × 24h × 60min). timedelta(minutes=...) ajoute ce nombre de minutes à la date de départ pour obtenir une date et heure répartie sur le dernier mois.
-    call_duration_seconds = np.random.randint(30, 1800) # Variable qui va contenir une durée d'appel aléatoire entre 30 secondes et 1800 secondes (soit 30 minutes max)
-    topic = np.random.choice(topics) # Variable qui va contenir un sujet d'appel choisi au hasard parmi la liste topics
-
-    # Résolution de l'appel corrélée faiblement à la durée et au topic
-    resolved = int( # Décide si l'appel est résolu (1) ou non (0), en fonction de la durée, du sujet, et d'un peu de hasard
-        (call_duration_seconds < 900 and topic != "tech_support") or np.random.rand() > 0.3 # Si l'appel dure moins de 15 min (900 sec) et que le sujet n'est pas "tech_support ", il y a des chances qu'il soit résolu. Sinon, c'est un peu aléatoire (70% de chances de ne pas être résolu -> np.random.rand() > 0.3)
-    )
-
-    cdr_rows.append({ # .append() ajoute l'appel généré à la liste cdr_rows sous forme de dictionnaire avec les clés et valeurs correspondantes
-        "call_id": call_id, # Identifiant unique de l'appel
-        "caller_id": caller_id, # Numéro masqué de l'appelant
-        "agent_id": agent_id, # Identifiant de l'agent
-        "start_ts": start_timestamp.isoformat(), # Date et heure de début de l'appel
-        "duration_sec": call_duration_seconds, # Durée de l'appel en secondes
-        "topic": topic, # Sujet de l'appel
-        "resolved": resolved # Indique si l'appel a été résolu (1) ou non (0)
+    return hashlib.sha256((salt + caller_number).encode()).hexdigest() #On utilise la boîte à outils hashlib pour : Prendre le sel et le numéro, les coller ensemble, Les transformer en une suite de caractères incompréhensible (le hash), Retourner ce hash comme résultat
+
+
+def mask_pii_many(caller_numbers: np.ndarray, salt: str = salt_pii) -> np.ndarray: # Même hash que mask_pii(), pour une colonne entière de numéros
+    """
+    Hash une colonne de numéros : chaque numéro distinct n'est haché qu'une fois, et l'état SHA-256
+    du salt est calculé une seule fois puis copié (même résultat que mask_pii()).
+    """
+    unique, inverse = np.unique(caller_numbers, return_inverse=True) # Les numéros se répètent beaucoup sur des millions d'appels
+    salted = hashlib.sha256(salt.encode()) # Préfixe commun à tous les numéros
+    hashes = []
+    for number in unique:
+        digest = salted.copy()
+        digest.update(f"04{number}".encode())
+        hashes.append(digest.hexdigest())
+    return np.array(hashes)[inverse]
+
+
+def generate_cdr_chunk(chunk: int, first_call: int, size: int, seed: int, start_date: datetime, salt: str) -> pd.DataFrame: # Génère un bloc de CDR (CDR = Call Detail Record (Enregistrement de détail d'Appel))
+    """
+    Génère les appels first_call+1 à first_call+size, colonne par colonne.
+    Args:
+        chunk (int): Numéro du bloc (sert à dériver sa graine)
+        first_call (int): Nombre d'appels des blocs précédents
+        size (int): Nombre d'appels du bloc
+        seed (int): Graine globale
+        start_date (datetime): Début de la période simulée (30 jours)
+        salt (str): Salt du masquage des numéros
+    Returns:
+        pd.DataFrame: Appels du bloc
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(CDR_STREAM, chunk))) # Graine propre au bloc : indépendante du worker qui le calcule
+    caller_numbers = rng.integers(2000000, 3999999, size) # Numéros fictifs de l'appelant : 04 suivi de 7 chiffres aléatoires
+    start_minutes = rng.integers(0, 43200, size) # Début d'appel réparti sur les 30 derniers jours (43200 minutes = 30 jours × 24h × 60min)
+    durations = rng.integers(30, 1800, size) # Durée d'appel aléatoire entre 30 secondes et 1800 secondes (soit 30 minutes max)
+    call_agents = agents[rng.integers(0, len(agents), size)] # Agent choisi au hasard pour chaque appel
+    call_topics = topics[rng.integers(0, len(topics), size)] # Sujet choisi au hasard pour chaque appel
+
+    # Résolution de l'appel corrélée faiblement à la durée et au topic : un appel court (< 15 min) hors "tech_support" a des chances d'être résolu, sinon c'est un peu aléatoire (70% de chances -> rand() > 0.3)
+    resolved = (((durations < 900) & (call_topics != "tech_support")) | (rng.random(size) > 0.3)).astype(np.int64)
+
+    numbers = np.arange(first_call + 1, first_call + size + 1) # Numéros d'appel : CALL_0001, CALL_0002, etc.
+    starts = np.datetime64(start_date, "us") + start_minutes.astype("timedelta64[m]")
+    return pd.DataFrame({
+        "call_id": np.char.add("CALL_", np.char.zfill(numbers.astype(str), 4)), # Identifiant unique de l'appel
+        "caller_id": mask_pii_many(caller_numbers, salt), # Numéro masqué (hashé) de l'appelant
+        "agent_id": call_agents, # Identifiant de l'agent
+        "start_ts": np.datetime_as_string(starts, unit="us"), # Date et heure de début de l'appel (format ISO 8601)
+        "duration_sec": durations, # Durée de l'appel en secondes
+        "topic": call_topics, # Sujet de l'appel
+        "resolved": resolved, # Indique si l'appel a été résolu (1) ou non (0)
     })
 
-cdr_df = pd.DataFrame(cdr_rows) # Variable qui va contenir un tableau de données (DataFrame) créé à partir de la liste cdr_rows. Chaque dictionnaire dans cdr_rows devient une ligne dans le tableau, avec les clés comme colonnes.
-cdr_df.to_csv(os.path.join(raw_directory, "cdr_synthetic.csv"), index=False) # Export et enregistrement(.to_csv()) du tableau cdr_df dans un fichier CSV nommé cdr_synthetic.csv dans le dossier raw_directory. index=False signifie qu'on ne veut pas inclure l'index des lignes dans le fichier CSV.
-print(f"Fichier CDR généré: {os.path.join(raw_directory, 'cdr_synthetic.csv')}") # Affiche un message pour indiquer où le fichier CSV a été enregistré
-
-# 5. Génération des transcripts synthétiques : Les dialogues sont créés à partir de templates simples pour chaque sujet
-dialogue_templates = { # Dictionnaire qui contient des templates de dialogues pour chaque sujet. Chaque sujet (clé) a une liste de lignes de dialogue (valeur) entre un client et un agent.
-    "billing": [ # ---> Clé du dictionnaire pour le sujet "billing" (facturation)
-        "Client: Bonjour, j'ai une question sur ma facture.", # ---> élément de la liste de dialogues
-        "Agent: Bien sûr, pouvez-vous préciser votre demande ?",
-        "Client: Il y a un montant que je ne comprends pas.",
-        "Agent: Je vérifie cela pour vous."
-    ],
-    "tech_support": [
-        "Client: Mon internet ne fonctionne plus.",
-        "Agent: Avez-vous essayé de redémarrer votre box ?",
-        "Client: Oui, mais ça ne marche toujours pas.",
-        "Agent: Je vais lancer un diagnostic."
-    ],
-    "orders": [
-        "Client: Je souhaite suivre ma commande.",
-        "Agent: Pouvez-vous me donner votre numéro de commande ?",
-        "Client: C'est le 12345.",
-        "Agent: Elle est en cours de livraison."
-    ],
-    "returns": [
-        "Client: Je veux retourner un produit.",
-        "Agent: Quelle est la raison du retour ?",
-        "Client: Il ne correspond pas à ma commande.",
-        "Agent: Je lance la procédure de retour."
-    ],
-    "other": [
-        "Client: J'ai une question générale.",
-        "Agent: Je vous écoute.",
-        "Client: Quels sont vos horaires d'ouverture ?",
-        "Agent: Nous sommes ouverts de 8h à 18h."
-    ]
-}
-
-# 6. Génération des fichiers de dialogues
-
-for i in range(numbers_of_transcripts): # boucle qui va générer 18 fichiers de dialogues (numbers_of_transcripts)
-    topic = np.random.choice(topics) # np.random.choice() choisi aléatoirement un sujet parmi la liste topics
-    dialogue = dialogue_templates[topic] # récupère la liste de dialogues correspondant au sujet choisi
-    
-    # Ajout d'une variation simple
-    dialogue = [line.replace("Client", f"Client_{i+1}") for line in dialogue] # line.replace() remplace "Client" par "Client_1", "Client_2", etc. pour chaque ligne du dialogue, afin d'ajouter une variation simple et rendre chaque fichier unique.
-    transcript_path = os.path.join(transcripts_directory, f"{topic}_{i+1:02d}.txt") # .path.join() crée le chemin complet vers le fichier de transcription en combinant le dossier transcripts avec un nom de fichier basé sur le sujet et un numéro séquentiel (par exemple, billing_01.txt, tech_support_02.txt, etc.)
-    
-    with open(transcript_path, "w", encoding="utf-8") as f: # open() ouvre le fichier en mode écriture ("w") avec l'encodage UTF-8 pour supporter les caractères spéciaux. as f crée un objet fichier (f) pour écrire dedans.
-        f.write("\n".join(dialogue)) # .write() écrit le dialogue dans le fichier, en joignant les lignes avec des sauts de ligne ("\n".join(dialogue))
-    print(f"Transcript généré: {transcript_path}") # Affiche un message pour indiquer où le fichier de transcription a été enregistré
-
-print("Données synthétiques générées avec succès.") # Message final pour indiquer que tout s'est bien passé
\ No newline at end of file
+
+class ChunkWriter: # Écriture incrémentale des blocs dans un seul fichier CSV ou Parquet
+    def __init__(self, path: str, file_format: str):
+        self.path = path
+        self.file_format = file_format
+        self._parquet = None # ParquetWriter ouvert au premier bloc (schéma déduit du bloc)
+        self._rows = 0
+        if os.path.exists(path): # Un fichier d'une génération précédente est remplacé
+            os.remove(path)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.file_format == "csv":
+            frame.to_csv(self.path, mode="a", header=self._rows == 0, index=False) # En-tête une seule fois
+        else:
+            import pyarrow as pa # Import local : seul le format Parquet en a besoin
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table) # Un row group par bloc
+        self._rows += len(frame)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def write_transcripts(first: int, last: int, seed: int, directory: str) -> List[str]: # Génère les transcriptions first+1 à last
+    """Chaque transcription tire son sujet avec sa propre graine : le résultat ne dépend pas du découpage entre workers."""
+    paths = []
+    for i in range(first, last):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(TRANSCRIPT_STREAM, i)))
+        topic = str(topics[rng.integers(0, len(topics))]) # Sujet choisi aléatoirement parmi la liste topics
+        dialogue = synthetic_transcript(topic, i + 1) # "Client" devient "Client_1", "Client_2", etc. pour rendre chaque fichier unique
+        transcript_path = os.path.join(directory, f"{topic}_{i+1:02d}.txt") # Nom basé sur le sujet et un numéro séquentiel (billing_01.txt, tech_support_02.txt, etc.)
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            f.write(dialogue)
+        paths.append(transcript_path)
+    return paths
+
+
+def _ranges(total: int, size: int) -> List[tuple]: # Découpe [0, total) en intervalles de taille size
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def generate_cdr(path: str, n_calls: int, chunk_size: int, seed: int, start_date: datetime, file_format: str, pool: Optional[ProcessPoolExecutor], workers: int) -> None: # 4. Génération des appels (CDR)
+    writer = ChunkWriter(path, file_format)
+    pending: deque = deque() # Blocs soumis au pool, écrits dans l'ordre
+    start = time.perf_counter()
+    written = 0
+    try:
+        for chunk, (first, last) in enumerate(_ranges(n_calls, chunk_size)):
+            args = (chunk, first, last - first, seed, start_date, salt_pii)
+            if pool is None:
+                writer.write(generate_cdr_chunk(*args))
+                written = last
+                continue
+            pending.append(pool.submit(generate_cdr_chunk, *args))
+            while len(pending) > 2 * workers: # Au plus 2 blocs d'avance par worker : mémoire bornée
+                frame = pending.popleft().result()
+                writer.write(frame)
+                written += len(frame)
+                print(f"{written}/{n_calls} appels | {written / (time.perf_counter() - start):.0f} appels/s")
+        while pending:
+            frame = pending.popleft().result()
+            writer.write(frame)
+            written += len(frame)
+    finally:
+        writer.close()
+    print(f"Fichier CDR généré: {path} ({written} appels en {time.perf_counter() - start:.1f}s)")
+
+
+def generate_transcripts(directory: str, n_transcripts: int, seed: int, pool: Optional[ProcessPoolExecutor], workers: int) -> None: # 5. Génération des fichiers de dialogues
+    os.makedirs(directory, exist_ok=True)
+    if pool is None:
+        paths = write_transcripts(0, n_transcripts, seed, directory)
+    else:
+        size = max(1, min(10000, -(-n_transcripts // (4 * workers)))) # Quelques lots par worker pour équilibrer la charge
+        futures = [pool.submit(write_transcripts, first, last, seed, directory) for first, last in _ranges(n_transcripts, size)]
+        paths = [path for future in futures for path in future.result()]
+    if n_transcripts <= 100: # Détail fichier par fichier pour les petits jeux de données
+        for path in paths:
+            print(f"Transcript généré: {path}")
+    else:
+        print(f"{len(paths)} transcripts générés dans {directory}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Génération des données synthétiques (CDR et transcriptions)")
+    parser.add_argument("--calls", type=int, default=200, help="Nombre d'appels à générer dans les CDR")
+    parser.add_argument("--transcripts", type=int, default=18, help="Nombre de fichiers de dialogues à générer")
+    parser.add_argument("--out", default="data/raw", help="Dossier de sortie (les transcriptions vont dans <out>/transcripts)")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv", help="Format du fichier CDR")
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="Nombre d'appels par bloc (mémoire utilisée)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus (1 = pas de pool)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (même graine et même --chunk-size = mêmes données, quel que soit --workers)")
+    parser.add_argument("--start-date", help="Début de la période simulée (ISO 8601, par défaut : minuit il y a 30 jours ; à fixer pour une sortie reproductible d'un jour à l'autre)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    default_start = datetime.combine(datetime.now().date() - timedelta(days=30), datetime.min.time()) # Minuit : pas de dépendance à l'heure du lancement
+    start_date = datetime.fromisoformat(args.start_date) if args.start_date else default_start
+    cdr_path = os.path.join(args.out, "cdr_synthetic." + args.format)
+    workers = max(1, args.workers)
+    n_chunks = -(-args.calls // args.chunk_size) if args.calls else 0
+    use_pool = workers > 1 and (n_chunks > 1 or args.transcripts > 1000) # Le pool ne vaut la peine qu'à grande échelle
+    pool = ProcessPoolExecutor(max_workers=workers) if use_pool else None
+    try:
+        generate_cdr(cdr_path, args.calls, args.chunk_size, args.seed, start_date, args.format, pool, workers)
+        generate_transcripts(os.path.join(args.out, "transcripts"), args.transcripts, args.seed, pool, workers)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print("Données synthétiques générées avec succès.") # Message final pour indiquer que tout s'est bien passé
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Ce script sert à analyser en masse les transcriptions (thème, sentiment, résumé) et à joindre les résultats aux CDR.
+
+- Il parcourt un dossier (ou un motif glob) de transcriptions, par exemple data/raw/transcripts/.
+- Il découpe la liste des fichiers en lots (shards) répartis sur un pool de processus : chaque worker charge une seule copie des modèles et fait de l'inférence en lots,
+  les trois modèles en parallèle (src/nlp/analyzer.py).
+- Chaque lot terminé est écrit en Parquet (point de reprise) : après un crash ou une préemption, seuls les lots manquants sont recalculés.
+- Avec --redact, les PII sont masquées (src/security/redaction.py) avant l'inférence : ni les modèles ni les résumés écrits sur disque ne les voient.
+- À la fin, les résultats sont joints au fichier cdr_synthetic.csv par identifiant d'appel et écrits dans un seul fichier Parquet.
+
+Usage :
+    python scripts/score_transcripts.py data/raw/transcripts --cdr data/raw/cdr_synthetic.csv --out data/processed/scores --workers 4
+    python scripts/score_transcripts.py data/raw/transcripts --summary-tier auto   # Résumé extractif pour les appels courts (sur demande)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import hashlib # Empreinte de la liste des fichiers (cohérence de la reprise)
+import json # Manifeste du job
+import multiprocessing # Contexte "spawn" pour les workers
+import os # Gestion des chemins et des fichiers
+import re # Extraction du numéro d'appel dans le nom de fichier
+import sys # Ajout de la racine du projet au chemin d'import
+import time # Débit et temps restant estimé
+from concurrent.futures import ProcessPoolExecutor, as_completed # Pool de processus
+from pathlib import Path # Manipulation des chemins
+from typing import List, Optional
+# ----- Third party libraries -----
+import pandas as pd # Tableaux de résultats, jointure et Parquet
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # Racine du projet : rend le package src importable
+
+_worker_analyzer = None # Analyseur du worker (une seule copie des modèles par processus)
+_worker_redactor = None # Masquage des PII du worker (None = pas de masquage)
+
+
+def list_transcripts(source: str) -> List[str]: # Liste triée des fichiers à analyser
+    """Retourne les fichiers .txt d'un dossier, ou les fichiers correspondant à un motif glob, triés."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "**", "*.txt"), recursive=True))
+    return sorted(glob.glob(source, recursive=True))
+
+
+def call_id_from_path(path: str, call_id_format: str = "CALL_{:04d}") -> Optional[str]: # Identifiant d'appel déduit du nom de fichier
+    """billing_01.txt -> CALL_0001 (numéro final du nom de fichier) ; None si le nom ne contient pas de numéro."""
+    match = re.search(r"(\d+)$", Path(path).stem)
+    return call_id_format.format(int(match.group(1))) if match else None
+
+
+def _init_worker(threads: int, redact: bool = False, route_summaries: bool = False, num_beams: Optional[int] = None) -> None: # Initialisation d'un worker : limite des threads et création des analyseurs
+    global _worker_analyzer, _worker_redactor
+    from src.nlp.analyzer import DialogueAnalyzer, limit_threads # Import dans le worker : les modèles ne sont chargés qu'ici
+    from src.nlp.summarizer import DialogueSummarizer
+    limit_threads(threads) # Réglage du processus worker : N workers x threads <= nombre de coeurs
+    summarizer = DialogueSummarizer(router=route_summaries, num_beams=num_beams) # Routeur (--summary-tier auto) : BART seulement pour les appels longs ou à forte valeur
+    _worker_analyzer = DialogueAnalyzer(summarizer=summarizer)
+    if redact:
+        from src.security.redaction import Redactor # Expression régulière compilée une fois par worker
+        _worker_redactor = Redactor()
+
+
+def _score_shard(shard: int, paths: List[str], out_directory: str, batch_size: int, long_mode: bool, call_id_format: str) -> tuple: # Analyse un lot de fichiers
+    start = time.perf_counter()
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            texts.append(file.read())
+    if _worker_redactor is not None: # Masquage avant que le texte n'atteigne les modèles
+        texts = [_worker_redactor.redact(text) for text in texts]
+    records = _worker_analyzer.analyze_batch(texts, long=long_mode, batch_size=batch_size) # long_mode : dialogues complets, découpés aux tours de parole
+    frame = pd.DataFrame({
+        "transcript": [os.path.basename(path) for path in paths],
+        "call_id": [call_id_from_path(path, call_id_format) for path in paths],
+        "predicted_topic": [record["topic"]["label"] for record in records],
+        "topic_score": [record["topic"]["score"] for record in records],
+        "sentiment": [record["sentiment"]["label"] for record in records],
+        "sentiment_score": [record["sentiment"]["score"] for record in records],
+        "summary": [record["summary"] for record in records],
+        "summary_tier": [record["summary_tier"] for record in records], # "extractive", "abstractive" ou None (texte trop court)
+        "n_chars": [len(text) for text in texts],
+    })
+    shard_path = os.path.join(out_directory, "shards", f"shard_{shard:06d}.parquet")
+    temporary_path = shard_path + ".tmp"
+    frame.to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, shard_path) # Écriture atomique : un lot à moitié écrit n'est jamais considéré comme terminé
+    return shard, len(paths), time.perf_counter() - start
+
+
+def _check_manifest(out_directory: str, paths: List[str], shard_size: int, restart: bool, options: Optional[dict] = None) -> None: # Vérifie que la reprise porte sur le même job
+    """
+    Enregistre le job dans manifest.json et refuse une reprise dont les fichiers, la taille des lots ou les
+    options d'analyse (masquage, résumé, mode long...) diffèrent : les lots déjà écrits seraient mélangés
+    à des lots calculés autrement (ex: lots non masqués dans un résultat censé l'être).
+    """
+    manifest_path = os.path.join(out_directory, "manifest.json")
+    fingerprint = hashlib.sha256("\n".join(paths).encode("utf-8")).hexdigest()
+    manifest = {"files": len(paths), "shard_size": shard_size, "fingerprint": fingerprint, "options": options or {}}
+    if os.path.exists(manifest_path) and not restart:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            previous = json.load(file)
+        if previous != manifest:
+            changed = sorted(key for key in set(previous) | set(manifest) if previous.get(key) != manifest.get(key))
+            raise SystemExit(f"{out_directory} contient un autre job ({', '.join(changed)} différents) : utilisez --restart ou un autre --out.")
+    if restart: # Repart de zéro : les lots existants sont supprimés
+        for shard_path in glob.glob(os.path.join(out_directory, "shards", "shard_*.parquet")):
+            os.remove(shard_path)
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+
+
+def _merge(out_directory: str, cdr_path: Optional[str]) -> str: # Fusionne les lots et joint les CDR
+    shard_paths = sorted(glob.glob(os.path.join(out_directory, "shards", "shard_*.parquet")))
+    scores = pd.concat([pd.read_parquet(path) for path in shard_paths], ignore_index=True)
+    if cdr_path and os.path.exists(cdr_path):
+        cdr = pd.read_csv(cdr_path)
+        scores = scores.merge(cdr, on="call_id", how="left") # Les transcriptions sans CDR correspondant sont conservées
+    output_path = os.path.join(out_directory, "scores.parquet")
+    scores.to_parquet(output_path, index=False)
+    return output_path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyse en masse des transcriptions (thème, sentiment, résumé)")
+    parser.add_argument("source", nargs="?", default="data/raw/transcripts", help="Dossier ou motif glob des transcriptions")
+    parser.add_argument("--cdr", default="data/raw/cdr_synthetic.csv", help="Fichier CDR à joindre (par call_id)")
+    parser.add_argument("--out", default="data/processed/scores", help="Dossier de sortie (lots, manifeste, résultat final)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Nombre de processus")
+    parser.add_argument("--threads", type=int, default=None, help="Threads PyTorch par worker (par défaut : coeurs / workers)")
+    parser.add_argument("--shard-size", type=int, default=256, help="Nombre de fichiers par lot (point de reprise)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Taille des lots d'inférence")
+    parser.add_argument("--long", action="store_true", help="Analyse des dialogues complets (découpage aux tours de parole)")
+    parser.add_argument("--call-id-format", default="CALL_{:04d}", help="Format de l'identifiant d'appel déduit du numéro du fichier")
+    parser.add_argument("--summary-tier", choices=("auto", "abstractive"), default="abstractive", help="abstractive : BART pour tous (par défaut) ; auto : résumé extractif pour les appels courts, BART pour les autres")
+    parser.add_argument("--num-beams", type=int, default=None, help="Faisceaux de la génération BART (par défaut : réglage du modèle)")
+    parser.add_argument("--redact", action="store_true", help="Masque les PII des transcriptions avant l'analyse (marqueurs typés)")
+    parser.add_argument("--restart", action="store_true", help="Ignore les lots déjà calculés")
+    args = parser.parse_args(argv)
+
+    paths = list_transcripts(args.source)
+    if not paths:
+        raise SystemExit(f"Aucune transcription trouvée : {args.source}")
+    os.makedirs(os.path.join(args.out, "shards"), exist_ok=True)
+    options = {"redact": args.redact, "summary_tier": args.summary_tier, "num_beams": args.num_beams, "long": args.long, "call_id_format": args.call_id_format} # Options qui changent le contenu des lots
+    _check_manifest(args.out, paths, args.shard_size, args.restart, options)
+
+    shards = [paths[start:start + args.shard_size] for start in range(0, len(paths), args.shard_size)]
+    pending = [i for i in range(len(shards)) if not os.path.exists(os.path.join(args.out, "shards", f"shard_{i:06d}.parquet"))]
+    remaining_files = sum(len(shards[i]) for i in pending)
+    print(f"{len(paths)} transcriptions, {len(shards)} lots ({len(shards) - len(pending)} déjà terminés)")
+
+    if pending:
+        threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+        context = multiprocessing.get_context("spawn") # Pas de fork d'un processus qui aurait déjà initialisé PyTorch
+        start = time.perf_counter()
+        done_files = 0
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context, initializer=_init_worker, initargs=(threads, args.redact, args.summary_tier == "auto", args.num_beams)) as pool:
+            futures = [
+                pool.submit(_score_shard, i, shards[i], args.out, args.batch_size, args.long, args.call_id_format)
+                for i in pending
+            ]
+            for future in as_completed(futures):
+                shard, n_files, _ = future.result()
+                done_files += n_files
+                elapsed = time.perf_counter() - start
+                rate = done_files / elapsed if elapsed else 0.0
+                eta = (remaining_files - done_files) / rate if rate else float("inf")
+                print(f"lot {shard:06d} terminé | {done_files}/{remaining_files} fichiers | {rate:.1f} fichiers/s | reste ~{eta:.0f}s")
+
+    output_path = _merge(args.out, args.cdr)
+    print(f"Résultats écrits : {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+API NLP : Service d'inférence asynchrone (sentiment, classification, résumé)
+
+Chaque modèle a sa propre file d'attente asyncio : les requêtes concurrentes sont regroupées
+en lots (micro-batching) avant d'atteindre les pipelines transformers. Une file pleine
+répond 429 (contre-pression) au lieu d'allonger indéfiniment la latence.
+
+Lancement :
+    uvicorn src.api.main:app --host 127.0.0.1 --port 8000
+    NLP_METRICS=1 uvicorn src.api.main:app   # Avec l'instrumentation (route /metrics, format Prometheus)
+    NLP_REDACT=1 uvicorn src.api.main:app    # Masque les PII des textes reçus avant l'inférence (src/security/redaction.py)
+    NLP_SUMMARY_ROUTER=1 uvicorn src.api.main:app   # Résumé extractif pour les appels courts (par défaut : BART pour tous les résumés)
+    python -m src.api.prefork --workers 4    # Plusieurs workers partageant les poids des modèles (src/api/prefork.py)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import asyncio # Requêtes concurrentes de /analyze/
+import logging # Erreurs du préchargement des modèles
+import os # Réglages du service par variables d'environnement
+from collections import defaultdict # Regroupement des requêtes d'un lot par paramètres
+from concurrent.futures import ThreadPoolExecutor # Un thread par modèle pour l'inférence
+from contextlib import asynccontextmanager # Démarrage / arrêt des files d'attente
+from typing import Callable, Dict, List, Optional, Tuple
+# ----- Third party libraries -----
+from fastapi import FastAPI, HTTPException # Framework web asynchrone
+from fastapi.responses import JSONResponse, PlainTextResponse # Réponse de readiness avec code 503, exposition Prometheus
+from pydantic import BaseModel # Validation du corps des requêtes
+# ----- Local modules -----
+from src.nlp.batching import MicroBatcher, QueueFullError # File d'attente avec micro-batching
+from src.nlp import metrics # Instrumentation des analyseurs (NLP_METRICS=1)
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.registry import get_registry # Registre partagé des modèles (état de chargement)
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+from src.security.redaction import Redactor # Masquage des PII (NLP_REDACT=1)
+
+MAX_BATCH_SIZE = int(os.getenv("NLP_MAX_BATCH_SIZE", "16")) # Taille maximale d'un lot
+MAX_WAIT_MS = float(os.getenv("NLP_MAX_WAIT_MS", "10")) # Attente maximale pour compléter un lot
+MAX_QUEUE = int(os.getenv("NLP_MAX_QUEUE", "256")) # Requêtes en attente par modèle avant 429
+REDACT = os.getenv("NLP_REDACT", "0") == "1" # Masquage des PII avant l'inférence
+SUMMARY_ROUTER = os.getenv("NLP_SUMMARY_ROUTER", "0") == "1" # Sur demande : résumé extractif pour les appels courts, BART pour les autres
+NUM_BEAMS = int(os.environ["NLP_NUM_BEAMS"]) if os.getenv("NLP_NUM_BEAMS") else None # Faisceaux de la génération BART
+PRELOAD = [name.strip() for name in os.getenv("NLP_PRELOAD", "sentiment,classify,summarize").split(",") if name.strip()] # Modèles chargés au démarrage
+
+
+class TextRequest(BaseModel): # Corps des requêtes (compatible avec src/ui/dashboard.py)
+    text: str
+    max_length: Optional[int] = None # Longueur maximale du texte analysé, en caractères (/sentiment/, /classify/, /analyze/)
+    min_length: Optional[int] = None # Longueur minimale du résumé, en tokens (/summarize/, /analyze/)
+    summary_max_length: Optional[int] = None # Longueur maximale du résumé, en tokens (/summarize/, /analyze/)
+
+
+def _grouped(run: Callable[[List[str], Tuple], List], defaults: Tuple) -> Callable[[List[TextRequest]], List]: # Lot de requêtes -> appels groupés par paramètres
+    def batch_fn(requests: List[TextRequest]) -> List:
+        groups: Dict[Tuple, List[int]] = defaultdict(list) # Les requêtes aux paramètres différents ne partagent pas un appel
+        for index, request in enumerate(requests):
+            params = tuple(getattr(request, name) if getattr(request, name) is not None else value for name, value in defaults)
+            groups[params].append(index)
+        results: List = [None] * len(requests)
+        for params, indices in groups.items():
+            for index, result in zip(indices, run([requests[i].text for i in indices], params)):
+                results[index] = result
+        return results
+    return batch_fn
+
+
+class NLPService: # Analyseurs + une file de micro-batching par modèle
+
+    def __init__(self):
+        self.classifier = DialogueClassifier()
+        self.sentiment = SentimentAnalyzer()
+        self.summarizer = DialogueSummarizer(router=SUMMARY_ROUTER, num_beams=NUM_BEAMS)
+        self.redactor = Redactor() if REDACT else None
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="nlp") # Les trois modèles peuvent travailler en parallèle
+        self.batchers = {
+            "sentiment": self._batcher("sentiment", _grouped(
+                lambda texts, p: self.sentiment.analyze_batch(texts, max_length=p[0], batch_size=MAX_BATCH_SIZE),
+                (("max_length", 512),))),
+            "classify": self._batcher("classify", _grouped(
+                lambda texts, p: self.classifier.classify_batch(texts, max_length=p[0], batch_size=MAX_BATCH_SIZE),
+                (("max_length", 512),))),
+            "summarize": self._batcher("summarize", _grouped(
+                lambda texts, p: self.summarizer.summarize_routed_batch(texts, min_length=p[0], max_length=p[1], batch_size=MAX_BATCH_SIZE),
+                (("min_length", 30), ("summary_max_length", 120)))),
+        }
+
+    def _batcher(self, name: str, fn: Callable) -> MicroBatcher:
+        return MicroBatcher(fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE, executor=self.executor, name=name)
+
+    def specs(self) -> Dict[str, tuple]: # Modèle utilisé par chaque file
+        return {"sentiment": self.sentiment.spec, "classify": self.classifier.spec, "summarize": self.summarizer.spec}
+
+    async def start(self) -> None:
+        for batcher in self.batchers.values():
+            await batcher.start()
+        specs = self.specs()
+        preload = [specs[name] for name in PRELOAD if name in specs]
+        loop = asyncio.get_running_loop()
+        self.preloading = loop.run_in_executor(None, get_registry().preload, preload) # Chargement en arrière-plan : /health répond tout de suite
+        self.preloading.add_done_callback(_log_preload_error)
+
+    async def stop(self) -> None:
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    def redact(self, request: TextRequest) -> TextRequest: # Requête au texte masqué (inchangée sans NLP_REDACT)
+        if self.redactor is None: # Quelques microsecondes par requête : fait dans la boucle asyncio
+            return request
+        return request.model_copy(update={"text": self.redactor.redact(request.text)})
+
+    async def submit(self, name: str, request: TextRequest, redacted: bool = False): # Envoie une requête dans la file du modèle
+        if not redacted: # redacted=True : texte déjà masqué par l'appelant (/analyze/ masque une fois pour les trois files)
+            request = self.redact(request)
+        try:
+            return await self.batchers[name].submit(request)
+        except QueueFullError as error: # Contre-pression : le client doit réessayer plus tard
+            raise HTTPException(status_code=429, detail=str(error), headers={"Retry-After": "1"})
+
+
+service: Optional[NLPService] = None # Service unique du processus
+logger = logging.getLogger("uvicorn.error") # Journal du serveur
+
+
+def _log_preload_error(future: asyncio.Future) -> None: # Journalise l'échec du préchargement (sinon /ready reste à 503 sans explication)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("échec du préchargement des modèles : %r", future.exception(), exc_info=future.exception())
+
+
+def preload_error() -> Optional[str]: # Erreur du préchargement, s'il a échoué
+    preloading = getattr(service, "preloading", None)
+    if preloading is None or not preloading.done() or preloading.cancelled() or preloading.exception() is None:
+        return None
+    return repr(preloading.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI): # Démarrage et arrêt des files d'attente
+    global service
+    service = NLPService()
+    await service.start()
+    yield
+    await service.stop()
+
+
+app = FastAPI(title="GenAI Telephony NLP API", lifespan=lifespan)
+
+
+@app.post("/sentiment/")
+async def sentiment(request: TextRequest) -> dict:
+    return await service.submit("sentiment", request)
+
+
+@app.post("/classify/")
+async def classify(request: TextRequest) -> dict:
+    return await service.submit("classify", request)
+
+
+@app.post("/summarize/")
+async def summarize(request: TextRequest) -> dict:
+    if request.summary_max_length is None and request.max_length is not None: # Compatibilité : max_length était la longueur du résumé sur cette route
+        request = request.model_copy(update={"summary_max_length": request.max_length})
+    result = await service.submit("summarize", request)
+    return {"summary": result["summary"], "tier": result["tier"]} # tier : étage qui a produit le résumé
+
+
+@app.post("/analyze/")
+async def analyze(request: TextRequest) -> dict: # Les trois modèles en parallèle, chacun dans sa file (max_length : texte, summary_max_length : résumé)
+    request = service.redact(request) # Un seul masquage pour les trois modèles
+    topic, sentiment_result, summary = await asyncio.gather(
+        service.submit("classify", request, redacted=True),
+        service.submit("sentiment", request, redacted=True),
+        service.submit("summarize", request, redacted=True),
+    )
+    return {"topic": topic, "sentiment": sentiment_result, "summary": summary["summary"], "summary_tier": summary["tier"]}
+
+
+@app.get("/health")
+async def health() -> dict: # Le processus répond (liveness)
+    return {"status": "ok", "queues": {name: batcher.stats() for name, batcher in service.batchers.items()}}
+
+
+@app.get("/ready")
+async def ready(): # Les modèles préchargés sont en mémoire (readiness)
+    registry = get_registry()
+    models = {name: registry.is_loaded(*spec) for name, spec in service.specs().items()}
+    is_ready = all(models[name] for name in PRELOAD if name in models)
+    body = {"ready": is_ready, "models": models, "loaded": registry.loaded()}
+    error = preload_error()
+    if error is not None: # Le préchargement a échoué : /ready ne passera pas à 200 sans intervention
+        body["error"] = error
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse: # Mesures au format texte Prometheus (vide si NLP_METRICS n'est pas activé)
+    for name, batcher in service.batchers.items(): # État des files au moment de la collecte
+        stats = batcher.stats()
+        for key in ("queued", "items", "batches", "rejected", "errors"):
+            metrics.set_gauge(f"nlp_queue_{key}", stats[key], queue=name)
+    metrics.set_gauge("nlp_models_memory_bytes", get_registry().memory_bytes())
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn # Serveur ASGI (import local : inutile quand l'app est lancée par uvicorn)
+    uvicorn.run(app, host="127.0.0.1", port=8000)
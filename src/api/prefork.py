@@ -0,0 +1,238 @@
+"""
+API NLP : Service multi-processus pré-forké (poids des modèles partagés entre les workers)
+
+Le processus parent charge et réchauffe les trois modèles (DeBERTa, BERT, BART) une seule fois,
+gèle ses objets (gc.freeze) puis forke les workers : chacun sert src/api/main.py sur la même
+socket et lit les poids du parent en copie sur écriture (l'inférence n'écrit jamais dans les
+tenseurs, les pages restent partagées). Chaque worker est épinglé sur sa part des coeurs, avec
+autant de threads PyTorch. Le parent supervise : un worker qui s'arrête est reforké sans
+recharger les modèles, prêt en quelques dizaines de millisecondes.
+
+Lancement :
+    python -m src.api.prefork --workers 4 --port 8000
+    kill -USR1 <pid du parent>   # Mémoire de chaque worker (partagée / privée, lue dans /proc)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import gc # Gel des objets du parent avant le fork
+import os # fork, waitpid, affinité CPU
+import signal # Arrêt propre et rapport mémoire
+import socket # Socket d'écoute partagée par les workers
+import time # Temps de démarrage et délai avant redémarrage
+from typing import Dict, List, Optional, Sequence
+# ----- Local modules -----
+from src.nlp.analyzer import TASKS, limit_threads # Plafond des threads PyTorch
+
+SAMPLE_DIALOGUE = ( # Dialogue de réchauffage : passe par la tokenisation et l'inférence de chaque modèle
+    "Client_1: Bonjour, ma facture de ce mois est beaucoup plus élevée que d'habitude.\n"
+    "Agent: Je regarde votre compte. Il y a des appels vers l'international facturés hors forfait.\n"
+    "Client_1: Je n'ai jamais appelé l'étranger, je conteste ces frais.\n"
+    "Agent: Je lance une réclamation et vous serez remboursé sous cinq jours."
+)
+MIN_UPTIME = 1.0 # Un worker arrêté avant ce délai (secondes) compte comme un échec de démarrage
+MAX_BACKOFF = 30.0 # Délai maximal avant de reforker un worker qui échoue en boucle
+
+
+def warm_up() -> float: # Charge et réchauffe les modèles de l'API dans le processus courant
+    """
+    Charge les modèles utilisés par src/api/main.py dans le registre partagé et fait une inférence
+    sur chacun (allocations paresseuses, tokenizers), pour que les workers forkés n'aient rien à faire.
+    Returns:
+        float: Durée du chargement et du réchauffage (secondes)
+    """
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false") # Les threads des tokenizers ne survivent pas au fork
+    limit_threads(1) # Pas de pool OpenMP actif dans le parent : il bloquerait les workers après le fork
+    from src.api.main import NUM_BEAMS # Import local : réglages lus à l'import de l'API
+    from src.nlp.classifier import DialogueClassifier # Classification thématique
+    from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+    from src.nlp.summarizer import DialogueSummarizer # Résumé automatique (BART, sans routeur : le modèle est chargé)
+    start = time.perf_counter()
+    DialogueClassifier().classify_batch([SAMPLE_DIALOGUE])
+    SentimentAnalyzer().analyze_batch([SAMPLE_DIALOGUE])
+    DialogueSummarizer(num_beams=NUM_BEAMS).summarize_batch([SAMPLE_DIALOGUE])
+    return time.perf_counter() - start
+
+
+def split_cores(workers: int, cores: Optional[Sequence[int]] = None) -> List[List[int]]: # Répartit les coeurs entre les workers
+    """
+    Découpe les coeurs disponibles en blocs contigus, un par worker (les blocs se recouvrent s'il y a
+    plus de workers que de coeurs).
+    Returns:
+        List[List[int]]: Coeurs de chaque worker
+    """
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    cores = list(cores)
+    if workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(workers)]
+    size, extra = divmod(len(cores), workers)
+    blocks, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(cores[start:end])
+        start = end
+    return blocks
+
+
+def memory_usage(pid: int) -> Dict[str, int]: # Mémoire d'un processus (octets), d'après /proc/<pid>/smaps_rollup
+    """
+    Returns:
+        Dict[str, int]: rss, pss (part équitable des pages partagées), shared et private (propre au processus)
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as file:
+            for line in file:
+                name, _, rest = line.partition(":")
+                if rest.strip().endswith("kB"):
+                    values[name] = int(rest.split()[0]) * 1024
+    except OSError: # Processus terminé ou système sans /proc
+        return {}
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+class Supervisor: # Classe qui forke les workers et les remplace quand ils s'arrêtent
+
+    def __init__(self, app, workers: int = 2, host: str = "127.0.0.1", port: int = 8000, cores: Optional[Sequence[int]] = None, log_level: str = "info"):
+        """
+        Args:
+            app: Application ASGI servie par chaque worker (modèles déjà chargés dans ce processus)
+            workers (int): Nombre de workers
+            host (str): Adresse d'écoute
+            port (int): Port d'écoute (une seule socket, partagée par les workers)
+            cores (Sequence[int], optional): Coeurs utilisables (par défaut : affinité du processus)
+            log_level (str): Niveau de journalisation d'uvicorn dans les workers
+        """
+        self.app = app
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.log_level = log_level
+        self.cores = split_cores(workers, cores)
+        self.socket: Optional[socket.socket] = None
+        self.children: Dict[int, int] = {} # pid -> numéro du worker
+        self.started: Dict[int, float] = {} # numéro du worker -> heure du dernier fork
+        self.failures: Dict[int, int] = {} # numéro du worker -> échecs de démarrage consécutifs
+        self.restarts = 0
+        self.stopping = False
+
+    def run(self) -> None: # Ouvre la socket, forke les workers et les supervise jusqu'à SIGTERM / SIGINT
+        self.socket = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(2048)
+        self.socket.set_inheritable(True)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGUSR1, self._report)
+        gc.collect()
+        gc.freeze() # Les objets du parent sortent du ramasse-miettes : ses passages n'écrivent plus dans leurs pages
+        for slot in range(self.workers):
+            self._spawn(slot)
+        print(f"{self.workers} workers sur http://{self.host}:{self.port} (parent {os.getpid()})", flush=True)
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            uptime = time.monotonic() - self.started[slot]
+            print(f"worker {slot} (pid {pid}) arrêté ({_describe(status)}) après {uptime:.1f}s : redémarrage", flush=True)
+            self.failures[slot] = self.failures.get(slot, 0) + 1 if uptime < MIN_UPTIME else 0
+            if self.failures[slot]: # Échec au démarrage : on attend avant de reforker (échecs en boucle)
+                time.sleep(min(MAX_BACKOFF, 0.5 * 2 ** (self.failures[slot] - 1)))
+            if not self.stopping:
+                self.restarts += 1
+                self._spawn(slot)
+        self.socket.close()
+
+    def stats(self) -> dict: # Workers, redémarrages et mémoire de chaque processus
+        return {
+            "workers": {slot: {"pid": pid, "cores": self.cores[slot], **memory_usage(pid)} for pid, slot in self.children.items()},
+            "parent": memory_usage(os.getpid()),
+            "restarts": self.restarts,
+        }
+
+    def _spawn(self, slot: int) -> None: # Forke un worker (les modèles sont déjà en mémoire)
+        self.started[slot] = time.monotonic()
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            return
+        code = 1
+        try:
+            self._serve(slot)
+            code = 0
+        except BaseException as error: # Le worker ne doit jamais revenir dans la boucle du parent
+            print(f"worker {slot} : {error!r}", flush=True)
+        finally:
+            os._exit(code)
+
+    def _serve(self, slot: int) -> None: # Corps d'un worker : épinglage, threads, puis serveur uvicorn
+        import uvicorn # Import local : le module reste importable sans serveur ASGI
+        for signum in (signal.SIGTERM, signal.SIGINT): # uvicorn installe ses propres gestionnaires
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN) # Rapport mémoire : réservé au parent
+        cores = self.cores[slot]
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        threads = limit_threads(max(1, len(cores) // len(TASKS)), len(TASKS)) # Les trois modèles de l'API tournent en parallèle
+        started = self.started[slot]
+
+        class Server(uvicorn.Server): # Indique le temps entre le fork et l'ouverture du service
+            async def startup(self, sockets=None) -> None:
+                await super().startup(sockets=sockets)
+                print(f"worker {slot} (pid {os.getpid()}) prêt en {1000 * (time.monotonic() - started):.0f} ms, coeurs {cores}, {threads} threads", flush=True)
+
+        config = uvicorn.Config(self.app, log_level=self.log_level, access_log=False)
+        Server(config).run(sockets=[self.socket])
+
+    def _stop(self, signum, frame) -> None: # Arrête les workers (arrêt propre d'uvicorn), sans redémarrage
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _report(self, signum, frame) -> None: # Rapport mémoire sur SIGUSR1
+        stats = self.stats()
+        print(f"parent : rss {stats['parent'].get('rss', 0) / 1e6:.0f} Mo, {stats['restarts']} redémarrages", flush=True)
+        for slot, worker in sorted(stats["workers"].items()):
+            print(f"worker {slot} (pid {worker['pid']}) : rss {worker.get('rss', 0) / 1e6:.0f} Mo, pss {worker.get('pss', 0) / 1e6:.0f} Mo, privée {worker.get('private', 0) / 1e6:.0f} Mo", flush=True)
+
+
+def _describe(status: int) -> str: # Code de sortie ou signal d'un worker
+    if os.WIFSIGNALED(status):
+        return f"signal {signal.Signals(os.WTERMSIG(status)).name}"
+    return f"code {os.WEXITSTATUS(status)}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Chargement des modèles puis supervision des workers
+    parser = argparse.ArgumentParser(description="API NLP multi-processus, modèles partagés entre les workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NLP_WORKERS", "2")), help="Nombre de workers")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute")
+    parser.add_argument("--cores", default=None, help="Coeurs utilisables, séparés par des virgules (par défaut : tous)")
+    parser.add_argument("--log-level", default="info", help="Niveau de journalisation d'uvicorn")
+    args = parser.parse_args(argv)
+
+    from src.api.main import app # Import local : l'API lit ses réglages (variables NLP_*) à l'import
+    from src.nlp.registry import get_registry # Registre partagé des modèles
+    seconds = warm_up()
+    print(f"modèles chargés et réchauffés en {seconds:.1f}s ({get_registry().memory_bytes() / 1e6:.0f} Mo de poids)", flush=True)
+    cores = [int(core) for core in args.cores.split(",")] if args.cores else None
+    Supervisor(app, workers=args.workers, host=args.host, port=args.port, cores=cores, log_level=args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Module données : Stockage colonnaire des CDR et agrégats pré-calculés (rollups)
+
+Les CDR sont ingérés par blocs en fichiers Parquet (lus ensuite en mémoire mappée). À chaque
+ingestion, seuls les nouveaux appels sont agrégés et ajoutés aux rollups existants : nombre
+d'appels, durée totale (AHT), appels résolus et histogramme des durées, par thème, agent, jour
+et heure. Le dashboard ne lit que ces rollups (quelques centaines de lignes), quel que soit le
+nombre d'appels.
+
+Usage :
+    python -m src.data.cdr_store ingest data/raw/cdr_synthetic.csv
+    python -m src.data.cdr_store stats
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import json # Manifeste des fichiers déjà ingérés
+import os # Gestion des chemins de fichiers
+import threading # Une seule ingestion à la fois
+from typing import Dict, Iterator, List, Optional, Sequence
+# ----- Third party libraries -----
+import numpy as np # Histogramme des durées
+import pandas as pd # Blocs de CDR et agrégats
+import pyarrow as pa # Tables colonnaires
+import pyarrow.parquet as pq # Lecture / écriture Parquet (mémoire mappée)
+
+DIMENSIONS = ("topic", "agent_id", "day", "hour") # Axes des rollups ("all" = total)
+DURATION_BINS = np.arange(0, 1860, 60) # Histogramme des durées par tranche d'une minute (30 min max)
+COLUMNS = ["call_id", "caller_id", "agent_id", "start_ts", "duration_sec", "topic", "resolved"] # Schéma des CDR (scripts/make_data.py)
+
+
+def _rollup_chunk(frame: pd.DataFrame) -> tuple: # Agrégats d'un bloc de CDR
+    starts = pd.to_datetime(frame["start_ts"], format="ISO8601")
+    keys = {
+        "all": pd.Series("all", index=frame.index),
+        "topic": frame["topic"].astype(str),
+        "agent_id": frame["agent_id"].astype(str),
+        "day": starts.dt.normalize(), # Mis en texte après agrégation (quelques dizaines de jours au lieu de millions de lignes)
+        "hour": starts.dt.hour,
+    }
+    bins = np.clip(np.digitize(frame["duration_sec"].to_numpy(), DURATION_BINS) - 1, 0, len(DURATION_BINS) - 1) # Tranche de chaque appel
+    values = pd.DataFrame({"calls": 1, "duration_sum": frame["duration_sec"].astype("int64"), "resolved_sum": frame["resolved"].astype("int64"), "bin": bins})
+    totals, histograms = [], []
+    for dimension, key in keys.items():
+        grouped = values.assign(key=key.to_numpy())
+        total = grouped.groupby("key")[["calls", "duration_sum", "resolved_sum"]].sum().reset_index()
+        total["key"] = total["key"].dt.strftime("%Y-%m-%d") if dimension == "day" else total["key"].astype(str)
+        totals.append(total.assign(dimension=dimension))
+        if dimension in ("all", "topic", "agent_id"): # Histogrammes par thème et par agent (les jours et heures n'en ont pas besoin)
+            histograms.append(grouped.groupby(["key", "bin"])["calls"].sum().reset_index().assign(dimension=dimension))
+    return pd.concat(totals, ignore_index=True), pd.concat(histograms, ignore_index=True)
+
+
+class CDRStore: # Classe qui ingère les CDR en Parquet et maintient les rollups
+
+    def __init__(self, directory: str = "data/processed/cdr_store"): # __init__() ne lit que le manifeste
+        """
+        Args:
+            directory (str): Dossier du stockage (blocs Parquet, rollups, manifeste)
+        """
+        self.directory = directory
+        self.parts_directory = os.path.join(directory, "parts")
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.parts_directory, exist_ok=True)
+        self.manifest = self._read_manifest() # Fichiers ingérés, nombre de blocs et version des rollups
+
+    def version(self) -> int: # Change à chaque ingestion (clé de cache du dashboard)
+        return self.manifest["version"]
+
+    def ingest(self, source: str, chunk_size: int = 1_000_000) -> int: # Ajoute un fichier CDR (CSV ou Parquet)
+        """
+        Ingère un fichier CDR s'il n'a pas déjà été ingéré (même chemin, taille et date de modification).
+        Un fichier déjà ingéré puis modifié (ex: données régénérées) remplace sa version précédente :
+        ses anciens appels sont retirés des rollups.
+        Args:
+            source (str): Fichier CSV ou Parquet au schéma de scripts/make_data.py
+            chunk_size (int): Nombre d'appels lus et agrégés à la fois (mémoire bornée)
+        Returns:
+            int: Nombre d'appels ajoutés (0 si le fichier était déjà ingéré)
+        """
+        stat = os.stat(source)
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+        key = os.path.abspath(source)
+        with self._lock:
+            previous = self.manifest["sources"].get(key)
+            if previous is not None and {name: previous[name] for name in fingerprint} == fingerprint: # Déjà ingéré : rien à faire
+                return 0
+            totals, histograms = self._read_rollups()
+            removed = 0
+            for path in self._part_paths(previous["parts"] if previous else []): # Ancienne version du fichier : ses appels sont retirés
+                frame = pq.read_table(path, memory_map=True).to_pandas()
+                old_totals, old_histograms = _rollup_chunk(frame)
+                totals = _add(totals, _negate(old_totals), ["dimension", "key"])
+                histograms = _add(histograms, _negate(old_histograms), ["dimension", "key", "bin"])
+                removed += len(frame)
+            parts, added = [], 0
+            for frame in self._read_chunks(source, chunk_size):
+                part = self.manifest["next_part"] + len(parts) # Numéros jamais réutilisés : un bloc référencé n'est jamais écrasé
+                path = self._part_paths([part])[0]
+                pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path)
+                chunk_totals, chunk_histograms = _rollup_chunk(frame)
+                totals = _add(totals, chunk_totals, ["dimension", "key"])
+                histograms = _add(histograms, chunk_histograms, ["dimension", "key", "bin"])
+                parts.append(part)
+                added += len(frame)
+            version = self.manifest["version"] + 1
+            self._write_rollups(totals[totals["calls"] > 0], histograms[histograms["calls"] > 0], version)
+            self.manifest["sources"][key] = {**fingerprint, "parts": parts, "rows": added}
+            self.manifest["next_part"] += len(parts)
+            self.manifest["rows"] += added - removed
+            self.manifest["version"] = version
+            self._write_manifest() # Point de validation : tant que le manifeste n'est pas écrit, l'ancien état reste valide
+            for path in self._part_paths(previous["parts"] if previous else []) + self._rollup_paths(version - 1): # Fichiers devenus inutiles
+                if os.path.exists(path):
+                    os.remove(path)
+        return added
+
+    def rollup(self, dimension: str = "topic") -> pd.DataFrame: # Agrégats d'un axe
+        """
+        Retourne les agrégats d'un axe.
+        Args:
+            dimension (str): "all", "topic", "agent_id", "day" ou "hour"
+        Returns:
+            pd.DataFrame: key, calls, aht_sec (durée moyenne), resolution_rate, triés par clé
+        """
+        if dimension not in ("all",) + DIMENSIONS:
+            raise ValueError(f"axe inconnu : {dimension} (attendu : all, {', '.join(DIMENSIONS)})")
+        totals, _ = self._read_rollups()
+        frame = totals[totals["dimension"] == dimension].drop(columns="dimension")
+        frame = frame.assign(aht_sec=frame["duration_sum"] / frame["calls"], resolution_rate=frame["resolved_sum"] / frame["calls"])
+        order = frame["key"].astype(int) if dimension == "hour" else frame["key"]
+        return frame.iloc[np.argsort(order.to_numpy(), kind="stable")].reset_index(drop=True)
+
+    def histogram(self, dimension: str = "all", key: str = "all") -> pd.DataFrame: # Histogramme des durées
+        """Retourne le nombre d'appels par tranche d'une minute (bin_start_sec, calls) pour "all", un thème ou un agent."""
+        _, histograms = self._read_rollups()
+        rows = histograms[(histograms["dimension"] == dimension) & (histograms["key"] == key)]
+        counts = np.zeros(len(DURATION_BINS), dtype=np.int64)
+        counts[rows["bin"].to_numpy(dtype=np.int64)] = rows["calls"].to_numpy()
+        return pd.DataFrame({"bin_start_sec": DURATION_BINS, "calls": counts})
+
+    def kpis(self, period_days: int = 7) -> Dict[str, Optional[float]]: # Indicateurs de la vue d'ensemble
+        """
+        Retourne les indicateurs globaux et leur évolution (derniers period_days jours par rapport aux period_days précédents).
+        Returns:
+            dict: calls, aht_sec, resolution_rate, et *_delta (variation relative, None si la période précédente est vide)
+        """
+        total = self.rollup("all")
+        if total.empty:
+            return {"calls": 0, "aht_sec": None, "resolution_rate": None, "calls_delta": None, "aht_sec_delta": None, "resolution_rate_delta": None}
+        row = total.iloc[0]
+        result = {"calls": int(row["calls"]), "aht_sec": float(row["aht_sec"]), "resolution_rate": float(row["resolution_rate"])}
+        days = self.rollup("day")
+        recent, previous = _period(days.iloc[-period_days:]), _period(days.iloc[-2 * period_days:-period_days])
+        for name in ("calls", "aht_sec", "resolution_rate"):
+            result[name + "_delta"] = recent[name] / previous[name] - 1 if previous[name] else None
+        return result
+
+    def scan(self, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]: # Parcourt les appels bloc par bloc (mémoire mappée)
+        for path in self._part_paths(self._parts()):
+            yield pq.read_table(path, columns=list(columns) if columns else None, memory_map=True).to_pandas()
+
+    def head(self, n: int = 10) -> pd.DataFrame: # Premiers appels (aperçu), sans lire tout le stockage
+        paths = self._part_paths(self._parts())
+        if not paths:
+            return pd.DataFrame(columns=COLUMNS)
+        parquet = pq.ParquetFile(paths[0], memory_map=True)
+        return next(parquet.iter_batches(batch_size=n)).to_pandas()
+
+    def stats(self) -> dict: # Résumé du stockage
+        return {"rows": self.manifest["rows"], "parts": len(self._parts()), "sources": len(self.manifest["sources"]), "version": self.manifest["version"]}
+
+    def _parts(self) -> List[int]: # Blocs référencés par le manifeste
+        return [part for source in self.manifest["sources"].values() for part in source["parts"]]
+
+    def _part_paths(self, parts: Sequence[int]) -> List[str]:
+        return [os.path.join(self.parts_directory, f"part_{part:06d}.parquet") for part in parts]
+
+    def _rollup_paths(self, version: int) -> List[str]: # Rollups d'une version (jamais modifiés une fois écrits)
+        return [os.path.join(self.directory, f"{name}_v{version:06d}.parquet") for name in ("rollups", "histograms")]
+
+    def _read_chunks(self, source: str, chunk_size: int) -> Iterator[pd.DataFrame]: # Lecture par blocs (CSV ou Parquet)
+        if source.endswith(".parquet"):
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size, columns=COLUMNS):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, chunksize=chunk_size, usecols=COLUMNS, dtype={"call_id": str, "caller_id": str, "agent_id": str, "start_ts": str, "topic": str})
+
+    def _read_manifest(self) -> dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        return {"sources": {}, "next_part": 0, "rows": 0, "version": 0}
+
+    def _write_manifest(self) -> None: # Écriture atomique (le manifeste est écrit après les blocs et les rollups qu'il référence)
+        with open(self.manifest_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def _read_rollups(self) -> tuple: # Rollups de la version validée par le manifeste
+        totals_path, histograms_path = self._rollup_paths(self.manifest["version"])
+        if not self.manifest["version"]:
+            return (pd.DataFrame(columns=["dimension", "key", "calls", "duration_sum", "resolved_sum"]),
+                    pd.DataFrame(columns=["dimension", "key", "bin", "calls"]))
+        return pd.read_parquet(totals_path), pd.read_parquet(histograms_path)
+
+    def _write_rollups(self, totals: pd.DataFrame, histograms: pd.DataFrame, version: int) -> None:
+        for path, frame in zip(self._rollup_paths(version), (totals, histograms)):
+            frame.to_parquet(path, index=False)
+
+
+def _period(days: pd.DataFrame) -> Dict[str, float]: # Indicateurs d'un ensemble de jours
+    calls = float(days["calls"].sum())
+    return {
+        "calls": calls,
+        "aht_sec": float(days["duration_sum"].sum()) / calls if calls else 0.0,
+        "resolution_rate": float(days["resolved_sum"].sum()) / calls if calls else 0.0,
+    }
+
+
+def _negate(rollup: pd.DataFrame) -> pd.DataFrame: # Agrégat à retirer
+    columns = [column for column in ("calls", "duration_sum", "resolved_sum") if column in rollup.columns]
+    return rollup.assign(**{column: -rollup[column] for column in columns})
+
+
+def _add(current: pd.DataFrame, new: pd.DataFrame, keys: List[str]) -> pd.DataFrame: # Somme de deux agrégats (rollups additifs)
+    if current.empty:
+        return new[keys + [column for column in new.columns if column not in keys]]
+    combined = pd.concat([current, new], ignore_index=True)
+    return combined.groupby(keys, as_index=False).sum()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Ingestion et statistiques en ligne de commande
+    parser = argparse.ArgumentParser(description="Stockage colonnaire des CDR et rollups")
+    parser.add_argument("--store", default="data/processed/cdr_store", help="Dossier du stockage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Ingère un ou plusieurs fichiers CDR (CSV ou Parquet)")
+    ingest.add_argument("sources", nargs="+", help="Fichiers CDR")
+    ingest.add_argument("--chunk-size", type=int, default=1_000_000, help="Nombre d'appels par bloc")
+    commands.add_parser("stats", help="Affiche le contenu du stockage et les indicateurs")
+    args = parser.parse_args(argv)
+
+    store = CDRStore(args.store)
+    if args.command == "ingest":
+        for source in args.sources:
+            print(f"{source} : {store.ingest(source, chunk_size=args.chunk_size)} appels ajoutés")
+    print(store.stats())
+    print(store.kpis())
+
+
+if __name__ == "__main__":
+    main()
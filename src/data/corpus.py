@@ -0,0 +1,240 @@
+"""
+Module données : Corpus de transcriptions compacté (un fichier de données + un index)
+
+Les transcriptions sont concaténées en UTF-8 dans un seul fichier (transcripts.bin), lu en mémoire
+mappée (mmap) ; un index SQLite donne pour chaque appel : position, longueur, call_id, thème et
+empreinte SHA-256 du contenu. Lire tout le corpus revient à une lecture séquentielle au lieu d'une
+ouverture de fichier par appel, et un appel se retrouve directement par son call_id.
+
+Usage :
+    python -m src.data.corpus convert data/raw/transcripts --out data/processed/corpus
+    python -m src.data.corpus get CALL_0001
+    python -m src.data.corpus stats
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import hashlib # Empreinte du contenu de chaque transcription
+import mmap # Lecture sans copie du fichier de données
+import os # Gestion des chemins de fichiers
+import re # Identifiant d'appel et thème déduits du nom de fichier
+import sqlite3 # Index des transcriptions (accès par call_id)
+import threading # Un seul ajout à la fois
+from pathlib import Path # Nom des fichiers de transcriptions
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+DATA_FILE = "transcripts.bin" # Transcriptions concaténées (UTF-8)
+INDEX_FILE = "index.sqlite" # Position, longueur, call_id, thème et empreinte de chaque transcription
+
+
+class Transcript(NamedTuple): # Transcription lue dans le corpus
+    call_id: str
+    topic: Optional[str]
+    text: str
+
+
+def parse_name(path: str, call_id_format: str = "CALL_{:04d}") -> Tuple[str, Optional[str]]: # Identifiant d'appel et thème déduits du nom de fichier
+    """billing_01.txt -> ("CALL_0001", "billing") (même règle que scripts/score_transcripts.py) ; sans numéro : (nom du fichier, None)."""
+    stem = Path(path).stem
+    match = re.match(r"^(.*?)_?(\d+)$", stem)
+    if match is None:
+        return stem, None
+    return call_id_format.format(int(match.group(2))), match.group(1) or None
+
+
+class TranscriptCorpus: # Classe qui lit et complète un corpus compacté
+
+    def __init__(self, directory: str = "data/processed/corpus"): # __init__() ouvre l'index (le crée s'il n'existe pas)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, DATA_FILE)
+        if not os.path.exists(self.data_path):
+            open(self.data_path, "wb").close()
+        self._db = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS transcripts (call_id TEXT PRIMARY KEY, offset INTEGER, length INTEGER, topic TEXT, sha256 TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS transcripts_offset ON transcripts (offset)") # Parcours séquentiel du fichier de données
+        self._lock = threading.RLock()
+        self._file = None # Fichier de données ouvert en lecture
+        self._map: Optional[mmap.mmap] = None # Projection mémoire (recréée après un ajout)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+    def __contains__(self, call_id: str) -> bool:
+        return self._db.execute("SELECT 1 FROM transcripts WHERE call_id = ?", (call_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[Transcript]:
+        return self.records()
+
+    def get(self, call_id: str) -> str: # Transcription d'un appel
+        offset, length = self._locate(call_id)
+        return self._mapped()[offset:offset + length].decode("utf-8")
+
+    def raw(self, call_id: str) -> memoryview: # Octets UTF-8 d'un appel, sans copie (vue sur la projection mémoire)
+        offset, length = self._locate(call_id)
+        return memoryview(self._mapped())[offset:offset + length]
+
+    def get_many(self, call_ids: Sequence[str]) -> List[Optional[str]]: # Transcriptions de plusieurs appels (None si absent)
+        found = {}
+        for start in range(0, len(call_ids), 500): # Limite du nombre de paramètres SQLite
+            batch = list(call_ids[start:start + 500])
+            found.update((call_id, (offset, length)) for call_id, offset, length in self._db.execute(
+                f"SELECT call_id, offset, length FROM transcripts WHERE call_id IN ({','.join('?' * len(batch))})", batch))
+        mapped = self._mapped()
+        return [mapped[found[call_id][0]:sum(found[call_id])].decode("utf-8") if call_id in found else None for call_id in call_ids]
+
+    def records(self, topic: Optional[str] = None) -> Iterator[Transcript]: # Parcours de tout le corpus dans l'ordre du fichier
+        """
+        Parcourt les transcriptions dans l'ordre du fichier de données : une seule lecture séquentielle.
+        Args:
+            topic (str, optional): Ne garde que les transcriptions de ce thème
+        Returns:
+            Iterator[Transcript]: call_id, thème et texte de chaque transcription
+        """
+        query, params = "SELECT call_id, offset, length, topic FROM transcripts", ()
+        if topic is not None:
+            query, params = query + " WHERE topic = ?", (topic,)
+        rows = self._db.execute(query + " ORDER BY offset", params)
+        mapped = self._mapped()
+        if mapped is not None and hasattr(mapped, "madvise"): # Le noyau lit en avance : accès séquentiel
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        for call_id, offset, length, row_topic in rows:
+            yield Transcript(call_id, row_topic, mapped[offset:offset + length].decode("utf-8"))
+
+    def to_frame(self, topic: Optional[str] = None): # Tout le corpus dans un DataFrame (call_id, topic, text)
+        import pandas as pd # Import local : le corpus se lit sans pandas
+        return pd.DataFrame(self.records(topic), columns=list(Transcript._fields))
+
+    def append(self, items: Iterable[Tuple], batch_size: int = 10_000) -> dict: # Ajoute des transcriptions
+        """
+        Ajoute des transcriptions en fin de fichier. Un call_id déjà présent avec le même contenu est
+        ignoré ; avec un contenu différent, l'index pointe vers la nouvelle version (l'ancienne reste
+        dans le fichier, comptée dans stats()["dead_bytes"]).
+        Args:
+            items (Iterable[Tuple]): Couples (call_id, texte) ou triplets (call_id, texte, thème)
+            batch_size (int): Nombre de transcriptions écrites avant chaque validation de l'index
+        Returns:
+            dict: Nombre de transcriptions ajoutées, remplacées et ignorées
+        """
+        counts = {"added": 0, "replaced": 0, "skipped": 0}
+        with self._lock, open(self.data_path, "r+b") as file:
+            end = self._db.execute("SELECT COALESCE(MAX(offset + length), 0) FROM transcripts").fetchone()[0]
+            file.truncate(end) # Octets écrits par un ajout interrompu avant la validation de l'index
+            file.seek(end)
+            batch: List[tuple] = []
+            for item in items:
+                call_id, text, topic = (tuple(item) + (None,))[:3]
+                data = text.encode("utf-8")
+                digest = hashlib.sha256(data).hexdigest()
+                previous = self._db.execute("SELECT sha256 FROM transcripts WHERE call_id = ?", (call_id,)).fetchone()
+                if previous is not None and previous[0] == digest:
+                    counts["skipped"] += 1
+                    continue
+                counts["replaced" if previous is not None else "added"] += 1
+                batch.append((call_id, file.tell(), len(data), topic, digest))
+                file.write(data)
+                if len(batch) >= batch_size:
+                    self._commit(file, batch)
+                    batch = []
+            if batch:
+                self._commit(file, batch)
+        self._close_map() # La projection existante ne couvre pas les nouveaux octets
+        return counts
+
+    def stats(self) -> dict: # Taille du corpus
+        count, live, topics = self._db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0), COUNT(DISTINCT topic) FROM transcripts").fetchone()
+        size = os.path.getsize(self.data_path)
+        return {"transcripts": count, "topics": topics, "bytes": size, "dead_bytes": size - live}
+
+    def verify(self) -> List[str]: # Appels dont le contenu ne correspond plus à l'empreinte
+        mapped = self._mapped()
+        return [call_id for call_id, offset, length, digest in self._db.execute("SELECT call_id, offset, length, sha256 FROM transcripts ORDER BY offset")
+                if hashlib.sha256(mapped[offset:offset + length]).hexdigest() != digest]
+
+    def close(self) -> None:
+        self._close_map()
+        self._db.close()
+
+    def _commit(self, file, batch: List[tuple]) -> None: # Données sur disque d'abord, index ensuite
+        file.flush()
+        os.fsync(file.fileno())
+        self._db.executemany("INSERT OR REPLACE INTO transcripts (call_id, offset, length, topic, sha256) VALUES (?, ?, ?, ?, ?)", batch)
+        self._db.commit()
+
+    def _locate(self, call_id: str) -> Tuple[int, int]: # Position et longueur d'un appel dans le fichier de données
+        row = self._db.execute("SELECT offset, length FROM transcripts WHERE call_id = ?", (call_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"appel absent du corpus : {call_id}")
+        return row
+
+    def _mapped(self) -> Optional[mmap.mmap]: # Projection mémoire du fichier de données (None si vide)
+        with self._lock:
+            if self._map is None and os.path.getsize(self.data_path):
+                self._file = open(self.data_path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def _close_map(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError: # Une vue raw() est encore utilisée : la projection sera libérée avec elle
+                    pass
+                self._file.close()
+                self._map, self._file = None, None
+
+
+def convert_directory(source: str, corpus: TranscriptCorpus, call_id_format: str = "CALL_{:04d}") -> dict: # Convertit un dossier de fichiers .txt en corpus
+    """
+    Ajoute au corpus les transcriptions d'un dossier (ou d'un motif glob), lues une par une.
+    Args:
+        source (str): Dossier ou motif glob des fichiers .txt (ex: data/raw/transcripts)
+        corpus (TranscriptCorpus): Corpus de destination
+        call_id_format (str): Format de l'identifiant d'appel déduit du numéro du fichier
+    Returns:
+        dict: Nombre de transcriptions ajoutées, remplacées et ignorées
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "**", "*.txt"), recursive=True))
+    else:
+        paths = sorted(glob.glob(source, recursive=True))
+
+    def items() -> Iterator[tuple]:
+        for path in paths:
+            call_id, topic = parse_name(path, call_id_format)
+            yield call_id, Path(path).read_text(encoding="utf-8"), topic
+
+    return corpus.append(items())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Conversion et lecture en ligne de commande
+    parser = argparse.ArgumentParser(description="Corpus de transcriptions compacté")
+    parser.add_argument("--corpus", default="data/processed/corpus", help="Dossier du corpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="Ajoute les fichiers .txt d'un dossier au corpus")
+    convert.add_argument("source", help="Dossier ou motif glob des transcriptions")
+    convert.add_argument("--out", default=None, help="Dossier du corpus (remplace --corpus)")
+    convert.add_argument("--call-id-format", default="CALL_{:04d}", help="Format de l'identifiant d'appel déduit du numéro du fichier")
+    get = commands.add_parser("get", help="Affiche la transcription d'un appel")
+    get.add_argument("call_id")
+    commands.add_parser("stats", help="Taille du corpus")
+    commands.add_parser("verify", help="Vérifie les empreintes SHA-256")
+    args = parser.parse_args(argv)
+
+    corpus = TranscriptCorpus(getattr(args, "out", None) or args.corpus)
+    if args.command == "convert":
+        print(convert_directory(args.source, corpus, args.call_id_format))
+    elif args.command == "get":
+        print(corpus.get(args.call_id))
+        return
+    elif args.command == "verify":
+        corrupted = corpus.verify()
+        print(f"{len(corrupted)} transcription(s) corrompue(s)" + (f" : {', '.join(corrupted[:20])}" if corrupted else ""))
+    print(corpus.stats())
+
+
+if __name__ == "__main__":
+    main()
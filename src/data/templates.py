@@ -0,0 +1,58 @@
+"""
+Module données : Templates de dialogues synthétiques par thème métier
+
+Partagé par scripts/make_data.py (génération des transcriptions) et par les benchmarks
+(transcriptions synthétiques de longueur contrôlée).
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+from typing import List
+
+dialogue_templates = { # Dictionnaire qui contient des templates de dialogues pour chaque sujet. Chaque sujet (clé) a une liste de lignes de dialogue (valeur) entre un client et un agent.
+    "billing": [ # ---> Clé du dictionnaire pour le sujet "billing" (facturation)
+        "Client: Bonjour, j'ai une question sur ma facture.", # ---> élément de la liste de dialogues
+        "Agent: Bien sûr, pouvez-vous préciser votre demande ?",
+        "Client: Il y a un montant que je ne comprends pas.",
+        "Agent: Je vérifie cela pour vous."
+    ],
+    "tech_support": [
+        "Client: Mon internet ne fonctionne plus.",
+        "Agent: Avez-vous essayé de redémarrer votre box ?",
+        "Client: Oui, mais ça ne marche toujours pas.",
+        "Agent: Je vais lancer un diagnostic."
+    ],
+    "orders": [
+        "Client: Je souhaite suivre ma commande.",
+        "Agent: Pouvez-vous me donner votre numéro de commande ?",
+        "Client: C'est le 12345.",
+        "Agent: Elle est en cours de livraison."
+    ],
+    "returns": [
+        "Client: Je veux retourner un produit.",
+        "Agent: Quelle est la raison du retour ?",
+        "Client: Il ne correspond pas à ma commande.",
+        "Agent: Je lance la procédure de retour."
+    ],
+    "other": [
+        "Client: J'ai une question générale.",
+        "Agent: Je vous écoute.",
+        "Client: Quels sont vos horaires d'ouverture ?",
+        "Agent: Nous sommes ouverts de 8h à 18h."
+    ]
+}
+
+
+def synthetic_transcript(topic: str, client_number: int, n_turns: int = 4) -> str: # Dialogue synthétique d'une longueur donnée
+    """
+    Construit un dialogue à partir du template d'un thème, répété jusqu'à n_turns tours de parole.
+    Args:
+        topic (str): Thème du template ("billing", "tech_support", "orders", "returns", "other")
+        client_number (int): Numéro du client ("Client" devient "Client_N", comme dans make_data.py)
+        n_turns (int): Nombre de tours de parole (4 = le template une seule fois)
+    Returns:
+        str: Dialogue, une ligne par tour de parole
+    """
+    template = dialogue_templates[topic]
+    lines: List[str] = [template[turn % len(template)] for turn in range(n_turns)] # Le template est répété pour allonger l'appel
+    return "\n".join(line.replace("Client", f"Client_{client_number}") for line in lines)
@@ -0,0 +1,160 @@
+"""
+Module NLP : Analyse complète d'un appel (thème, sentiment, résumé) en un seul appel
+
+Le dialogue est normalisé et découpé en tours de parole une seule fois, puis les trois modèles
+travaillent en parallèle sur un pool de threads partagé : la latence d'un appel est proche de
+celle du modèle le plus lent au lieu de la somme des trois. Les travaux inutiles sont évités
+(texte vide, résumé d'un texte plus court que min_length).
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Nombre de coeurs (plafond des threads PyTorch)
+import threading # Création paresseuse du pool partagé
+import time # Temps passé dans chaque modèle
+from concurrent.futures import Executor, ThreadPoolExecutor # Les trois modèles en parallèle
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union # Annotations de type
+# ----- Local modules -----
+from src.nlp.chunking import split_turns # Découpage aux tours de parole
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.registry import ModelRegistry, get_registry # Registre partagé des modèles (chargement paresseux)
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+
+TASKS = ("topic", "sentiment", "summary") # Analyses disponibles
+
+_executor: Optional[ThreadPoolExecutor] = None # Pool partagé par tous les DialogueAnalyzer du processus
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor: # Retourne le pool partagé (un thread par modèle)
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(TASKS), thread_name_prefix="analyzer")
+        return _executor
+
+
+def limit_threads(threads: Optional[int] = None, concurrent_models: int = len(TASKS)) -> int: # Plafonne les threads intra-op de PyTorch
+    """
+    Plafonne les threads intra-op de PyTorch pour que les modèles exécutés en parallèle ne se
+    disputent pas les coeurs. PyTorch n'a qu'un réglage par processus : par défaut, coeurs / modèles concurrents.
+    Réglage global, à appeler explicitement au démarrage du processus (DialogueAnalyzer ne le modifie pas).
+    Args:
+        threads (int, optional): Nombre de threads (None = coeurs // concurrent_models)
+        concurrent_models (int): Nombre de modèles qui tournent en même temps
+    Returns:
+        int: Nombre de threads appliqué
+    """
+    threads = threads or max(1, (os.cpu_count() or 1) // concurrent_models)
+    try:
+        import torch # Import local : le module reste importable sans PyTorch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    return threads
+
+
+def normalize_dialogue(text: str) -> Tuple[str, List[str]]: # Normalise un dialogue et le découpe en tours de parole
+    """
+    Normalise un dialogue (fins de ligne, espaces, lignes vides, lignes de suite rattachées à leur tour).
+    Returns:
+        Tuple[str, List[str]]: Texte normalisé (un tour de parole par ligne) et liste des tours
+    """
+    turns = [" ".join(turn.split()) for turn in split_turns(text or "")] # Espaces multiples réduits à un seul
+    return "\n".join(turns), turns
+
+
+class DialogueAnalyzer: # Classe qui orchestre les trois analyseurs sur un appel ou un lot d'appels
+
+    def __init__(self, classifier: Optional[DialogueClassifier] = None, sentiment: Optional[SentimentAnalyzer] = None, summarizer: Optional[DialogueSummarizer] = None, registry: Optional[ModelRegistry] = None, executor: Optional[Executor] = None): # Aucun modèle n'est chargé ici, aucun réglage global n'est modifié
+        """
+        Args:
+            classifier (DialogueClassifier, optional): Classifieur thématique (par défaut : DeBERTa zero-shot)
+            sentiment (SentimentAnalyzer, optional): Analyseur de sentiment (par défaut : BERT nlptown)
+            summarizer (DialogueSummarizer, optional): Résumeur (par défaut : BART large CNN)
+            registry (ModelRegistry, optional): Registre des modèles par défaut (par défaut : registre partagé)
+            executor (Executor, optional): Pool de threads (par défaut : pool partagé du module)
+        """
+        registry = registry or get_registry()
+        self.classifier = classifier or DialogueClassifier(registry=registry)
+        self.sentiment = sentiment or SentimentAnalyzer(registry=registry)
+        self.summarizer = summarizer or DialogueSummarizer(registry=registry)
+        self.executor = executor or get_executor()
+
+    def analyze(self, text: str, **kwargs) -> dict: # Analyse complète d'un appel
+        return self.analyze_batch([text], **kwargs)[0]
+
+    def analyze_batch(self, texts: Iterable[str], tasks: Sequence[str] = TASKS, long: Union[bool, str] = "auto", max_length: int = 512, summary_input_length: int = 1024, min_length: int = 30, summary_max_length: int = 120, batch_size: int = 16) -> List[dict]: # Analyse complète de plusieurs appels
+        """
+        Analyse plusieurs appels : chaque modèle traite tout le lot, les trois modèles en parallèle.
+        Args:
+            texts (Iterable[str]): Transcriptions
+            tasks (Sequence[str]): Analyses à faire parmi "topic", "sentiment" et "summary"
+            long (bool | str): True = dialogues complets (découpés aux tours de parole), False = textes tronqués,
+                "auto" = découpage seulement pour les textes plus longs que la limite du modèle
+            max_length (int): Limite de la classification et du sentiment (en caractères)
+            summary_input_length (int): Troncature des textes avant BART (en caractères) ; avec long="auto",
+                les textes plus longs passent par le résumé hiérarchique au lieu d'être tronqués
+            min_length (int): Longueur minimale du résumé (et du texte à résumer)
+            summary_max_length (int): Longueur maximale du résumé
+            batch_size (int): Nombre maximal de textes par lot
+        Returns:
+            List[dict]: Un enregistrement par appel : topic, sentiment, summary, summary_tier, n_chars, n_turns,
+                long (au moins un modèle a découpé le texte) et timings (secondes passées dans chaque modèle pour le lot)
+        """
+        unknown = set(tasks) - set(TASKS)
+        if unknown:
+            raise ValueError(f"analyses inconnues : {sorted(unknown)} (choix : {TASKS})")
+        normalized = [normalize_dialogue(text) for text in texts] # Normalisation et découpage une seule fois
+        documents = [document for document, _ in normalized]
+        records = [{"n_chars": len(document), "n_turns": len(turns), "long": False} for document, turns in normalized]
+
+        jobs: Dict[str, Callable[[], List]] = {}
+        if "topic" in tasks:
+            jobs["topic"] = lambda: self._route(documents, long, max_length,
+                                                lambda batch: self.classifier.classify_batch(batch, max_length=max_length, batch_size=batch_size),
+                                                lambda batch: self.classifier.classify_long_batch(batch, batch_size=batch_size), records)
+        if "sentiment" in tasks:
+            jobs["sentiment"] = lambda: self._route(documents, long, max_length,
+                                                    lambda batch: self.sentiment.analyze_batch(batch, max_length=max_length, batch_size=batch_size),
+                                                    lambda batch: self.sentiment.analyze_long_batch(batch, batch_size=batch_size), records)
+        if "summary" in tasks:
+            useful = [document if len(document) >= min_length else "" for document in documents] # Trop court : valeur par défaut du résumeur, sans appel au modèle
+            jobs["summary"] = lambda: self._route(useful, long, summary_input_length,
+                                                  lambda batch: self.summarizer.summarize_routed_batch(batch, min_length=min_length, max_length=summary_max_length, batch_size=batch_size, input_length=summary_input_length),
+                                                  lambda batch: self.summarizer.summarize_routed_batch(batch, min_length=min_length, max_length=summary_max_length, batch_size=batch_size, long=True), records)
+
+        futures = {name: self.executor.submit(_timed, job) for name, job in jobs.items()} # Les trois modèles démarrent en même temps
+        timings = {}
+        for name, future in futures.items():
+            outputs, timings[name] = future.result()
+            for record, output in zip(records, outputs):
+                if name == "summary": # Résumé et étage qui l'a produit (extractif ou BART)
+                    record["summary"], record["summary_tier"] = output["summary"], output["tier"]
+                else:
+                    record[name] = output
+        for record in records:
+            record["timings"] = dict(timings)
+        return records
+
+    @staticmethod
+    def _route(documents: List[str], long: Union[bool, str], limit: int, short_fn: Callable[[List[str]], List], long_fn: Callable[[List[str]], List], records: List[dict]) -> List: # Envoie chaque texte au chemin court ou long
+        if long == "auto": # Seuls les textes qui seraient tronqués sont découpés
+            long_indices = {i for i, document in enumerate(documents) if len(document) > limit}
+        else:
+            long_indices = {i for i, document in enumerate(documents) if document} if long else set()
+        # Les textes vides (et ceux du chemin long) reçoivent la valeur par défaut de l'analyseur, sans appel au modèle
+        outputs = short_fn(["" if i in long_indices else document for i, document in enumerate(documents)])
+        if long_indices:
+            ordered = sorted(long_indices)
+            for index, output in zip(ordered, long_fn([documents[i] for i in ordered])):
+                outputs[index] = output
+                records[index]["long"] = True
+        return outputs
+
+
+def _timed(job: Callable[[], List]) -> Tuple[List, float]: # Exécute un travail et mesure sa durée
+    start = time.perf_counter()
+    outputs = job()
+    return outputs, time.perf_counter() - start
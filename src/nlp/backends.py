@@ -0,0 +1,104 @@
+"""
+Module NLP : Backends d'inférence CPU (fp32 eager, quantification int8 dynamique, ONNX Runtime)
+
+Les artefacts convertis (modèle quantifié, export ONNX) sont mis en cache sur disque :
+la conversion n'a lieu qu'une seule fois par révision des poids d'un modèle.
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import hashlib # Empreinte des poids d'un modèle local
+import os # Chemins du cache des artefacts
+import re # Nom de dossier sûr à partir de l'identifiant du modèle
+import shutil # Suppression des exports ONNX incomplets
+# ----- Third party libraries -----
+from transformers import AutoConfig, AutoTokenizer, pipeline # Librairie pour le traitement du langage naturel (NLP)
+
+BACKENDS = ("eager", "int8", "onnx") # Backends disponibles
+ARTIFACTS_DIRECTORY = os.getenv("NLP_ARTIFACTS_DIR", "data/processed/models") # Cache des modèles convertis
+
+
+def weights_revision(model: str) -> str: # Révision des poids : commit du Hub, sinon empreinte des fichiers d'un dossier local
+    if os.path.isdir(model):
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(model)):
+            if name == "config.json" or name.endswith((".bin", ".safetensors", ".pt")):
+                with open(os.path.join(model, name), "rb") as file:
+                    for block in iter(lambda: file.read(1 << 20), b""):
+                        digest.update(block)
+        return digest.hexdigest()[:16]
+    return AutoConfig.from_pretrained(model)._commit_hash or "unknown" # Configuration seule : pas de chargement des poids
+
+
+def artifact_path(model: str, backend: str, revision: str, directory: str = ARTIFACTS_DIRECTORY) -> str: # Dossier de l'artefact converti d'une révision d'un modèle
+    return os.path.join(directory, backend, re.sub(r"[^A-Za-z0-9._-]+", "__", model), re.sub(r"[^A-Za-z0-9._-]+", "__", revision))
+
+
+def build_pipeline(task: str, model: str, device: int = -1, backend: str = "eager"): # Construit le pipeline pour un backend
+    """
+    Construit un pipeline Hugging Face pour le backend demandé.
+    Args:
+        task (str): Type de tâche NLP
+        model (str): Identifiant du modèle pré-entraîné
+        device (int): -1 pour le CPU, sinon index du GPU (backend "eager" uniquement)
+        backend (str): "eager" (fp32, comportement historique), "int8" (quantification dynamique) ou "onnx" (ONNX Runtime)
+    Returns:
+        Pipeline Hugging Face
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+    if backend == "eager":
+        return pipeline(task, model=model, device=device)
+    if device != -1:
+        raise ValueError(f"le backend {backend} est réservé au CPU (device=-1)")
+    if backend == "int8":
+        return _int8_pipeline(task, model)
+    return _onnx_pipeline(task, model)
+
+
+def _int8_pipeline(task: str, model: str): # Couches Linear quantifiées en int8 (poids), activations en fp32
+    import torch # Import local : seul ce backend manipule directement PyTorch
+
+    path = artifact_path(model, "int8", weights_revision(model)) # Nouveaux poids : nouvel artefact, l'ancien n'est jamais relu
+    weights = os.path.join(path, "model.pt")
+    if os.path.exists(weights): # Artefact déjà converti
+        quantized = torch.load(weights, weights_only=False) # Modèle complet sérialisé par torch.save (artefact local)
+        tokenizer = AutoTokenizer.from_pretrained(path)
+    else:
+        eager = pipeline(task, model=model, device=-1)
+        quantized = torch.quantization.quantize_dynamic(eager.model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = eager.tokenizer
+        os.makedirs(path, exist_ok=True)
+        tokenizer.save_pretrained(path) # Tokenizer d'abord : model.pt n'existe que si l'artefact est complet
+        torch.save(quantized, weights + ".tmp")
+        os.replace(weights + ".tmp", weights) # Écriture atomique : un artefact incomplet n'est jamais relu
+    quantized.eval()
+    return pipeline(task, model=quantized, tokenizer=tokenizer, device=-1)
+
+
+def _onnx_pipeline(task: str, model: str): # Graphe exporté exécuté par ONNX Runtime (dépendance optionnelle : optimum[onnxruntime])
+    try:
+        from optimum import onnxruntime as ort # Export et exécution ONNX des modèles transformers
+        from optimum.pipelines import pipeline as ort_pipeline
+    except ImportError as error:
+        raise ImportError("le backend 'onnx' nécessite optimum[onnxruntime] (pip install optimum[onnxruntime])") from error
+
+    model_class = {"summarization": ort.ORTModelForSeq2SeqLM, "feature-extraction": ort.ORTModelForFeatureExtraction}.get(task, ort.ORTModelForSequenceClassification)
+    path = artifact_path(model, "onnx", weights_revision(model))
+    if os.path.exists(os.path.join(path, "config.json")): # Artefact déjà exporté
+        onnx_model = model_class.from_pretrained(path)
+        tokenizer = AutoTokenizer.from_pretrained(path)
+    else:
+        onnx_model = model_class.from_pretrained(model, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        temporary = f"{path}.tmp{os.getpid()}" # Export dans un dossier à part, propre au processus
+        shutil.rmtree(temporary, ignore_errors=True)
+        onnx_model.save_pretrained(temporary)
+        tokenizer.save_pretrained(temporary)
+        if not os.path.exists(os.path.join(path, "config.json")): # Export interrompu laissé par une version précédente
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(temporary, path) # Renommage atomique : un export incomplet n'est jamais relu
+        except OSError: # Un autre processus a publié le même artefact entre-temps
+            shutil.rmtree(temporary, ignore_errors=True)
+    return ort_pipeline(task, model=onnx_model, tokenizer=tokenizer, accelerator="ort")
@@ -0,0 +1,214 @@
+"""
+Module NLP : Regroupement des textes en lots (batching) pour l'inférence
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import asyncio # File d'attente asynchrone du micro-batching
+import time # Statistiques de latence des lots
+from concurrent.futures import Executor # Exécution des lots hors de la boucle asyncio
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+# ----- Local modules -----
+from src.nlp import metrics # Instrumentation optionnelle (tokens, troncatures)
+
+
+def count_tokens(tokenizer, texts: Sequence[str], model: Optional[str] = None) -> List[int]: # Fonction qui estime le nombre de tokens de chaque texte
+    """
+    Compte les tokens de chaque texte avec le tokenizer du modèle.
+    Args:
+        tokenizer: Tokenizer Hugging Face du pipeline (ou None)
+        texts (Sequence[str]): Textes à mesurer
+        model (str, optional): Identifiant du modèle pour l'instrumentation (tokens et troncatures)
+    Returns:
+        List[int]: Nombre de tokens par texte (plafonné à la taille max du modèle)
+    """
+    if not texts: # Rien à mesurer
+        return []
+    if tokenizer is None: # Sans tokenizer, on approxime (environ 4 caractères par token)
+        return [len(text) // 4 + 2 for text in texts]
+    encoded = tokenizer(list(texts), add_special_tokens=True, truncation=False)["input_ids"] # Un seul appel vectorisé (tokenizer rapide)
+    model_max = getattr(tokenizer, "model_max_length", None) or 10**9 # Taille max du modèle (valeur énorme si non définie)
+    if model is not None and metrics.metrics_enabled():
+        metrics.observe_tokens(model, [len(ids) for ids in encoded], model_max)
+    return [min(len(ids), model_max) for ids in encoded] # Le modèle tronque au-delà de model_max_length
+
+
+def bucket_by_length(lengths: Sequence[int], batch_size: int = 16, max_tokens: int = 8192) -> Iterator[List[int]]: # Générateur de lots de longueurs proches
+    """
+    Regroupe les indices des textes en lots de longueurs proches pour limiter le padding.
+    Args:
+        lengths (Sequence[int]): Longueur (en tokens) de chaque texte
+        batch_size (int): Nombre maximal de textes par lot
+        max_tokens (int): Budget de tokens par lot (plus long texte du lot x nombre de textes, padding compris)
+    Returns:
+        Iterator[List[int]]: Indices (dans l'ordre d'entrée) des textes de chaque lot
+    """
+    if batch_size < 1: # Garde-fou sur la taille de lot
+        raise ValueError("batch_size doit être >= 1")
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i]) # Tri des indices par longueur croissante
+    batch: List[int] = [] # Lot en cours de construction
+    for index in order: # Les textes arrivent du plus court au plus long
+        padded_cost = lengths[index] * (len(batch) + 1) # Coût du lot si on ajoute ce texte (il devient le plus long)
+        if batch and (len(batch) >= batch_size or padded_cost > max_tokens): # Lot plein ou budget dépassé
+            yield batch
+            batch = []
+        batch.append(index)
+    if batch: # Dernier lot incomplet
+        yield batch
+
+
+def batched_map(
+    texts: Sequence[str],
+    fn: Callable[[List[str]], List],
+    lengths: Sequence[int],
+    batch_size: int = 16,
+    max_tokens: int = 8192,
+) -> List: # Applique fn lot par lot et remet les résultats dans l'ordre d'entrée
+    """
+    Applique une fonction de lot sur des textes regroupés par longueur.
+    Args:
+        texts (Sequence[str]): Textes à traiter
+        fn (Callable): Fonction qui reçoit une liste de textes et retourne une liste de résultats de même taille
+        lengths (Sequence[int]): Longueur (en tokens) de chaque texte
+        batch_size (int): Nombre maximal de textes par lot
+        max_tokens (int): Budget de tokens par lot
+    Returns:
+        List: Résultats dans l'ordre des textes d'entrée
+    """
+    results: List[Optional[object]] = [None] * len(texts) # Résultats indexés comme l'entrée
+    for bucket in bucket_by_length(lengths, batch_size=batch_size, max_tokens=max_tokens): # Parcours des lots
+        outputs = fn([texts[i] for i in bucket]) # Un seul appel au modèle pour tout le lot
+        if len(outputs) != len(bucket): # zip() tronquerait en silence : des textes resteraient sans résultat
+            raise ValueError(f"fn a retourné {len(outputs)} résultats pour {len(bucket)} textes")
+        for index, output in zip(bucket, outputs): # Replace chaque résultat à sa position d'origine
+            results[index] = output
+    return results
+
+
+def as_list(result) -> List: # Normalise la sortie d'un pipeline appelé sur une liste
+    """Retourne toujours une liste (un pipeline appelé sur un seul texte peut retourner un dict)."""
+    return result if isinstance(result, list) else [result]
+
+
+def first(result): # Prend le premier élément si le pipeline a retourné une liste
+    """Retourne le premier élément d'une sortie de pipeline (dict ou liste de dicts)."""
+    return result[0] if isinstance(result, list) else result
+
+
+class QueueFullError(RuntimeError): # File d'attente pleine (à traduire en HTTP 429)
+    pass
+
+
+class MicroBatcher: # Regroupe les requêtes concurrentes en lots avant d'appeler le modèle
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_queue: int = 256,
+        executor: Optional[Executor] = None,
+        name: str = "",
+    ):
+        """
+        Args:
+            fn (Callable): Fonction bloquante qui traite une liste d'éléments et retourne une liste de résultats de même taille
+            max_batch_size (int): Taille maximale d'un lot
+            max_wait_ms (float): Attente maximale (en ms) après le premier élément pour compléter le lot
+            max_queue (int): Nombre maximal d'éléments en attente (au-delà : QueueFullError)
+            executor (Executor, optional): Pool de threads où s'exécute fn (None = pool par défaut de la boucle)
+            name (str): Nom du batcher (statistiques)
+        """
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.executor = executor
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None # Créée dans start(), sur la boucle du serveur
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"items": 0, "batches": 0, "rejected": 0, "errors": 0, "busy_seconds": 0.0}
+
+    async def start(self) -> None: # Lance la tâche de fond qui vide la file
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None: # Arrête la tâche de fond
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: Any) -> Any: # Ajoute un élément et attend son résultat
+        """
+        Ajoute un élément à la file et attend son résultat.
+        Raises:
+            QueueFullError: si la file est pleine (contre-pression)
+        """
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher non démarré (appeler start())")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise QueueFullError(f"file '{self.name}' pleine ({self.max_queue} requêtes en attente)")
+        return await future
+
+    def stats(self) -> dict: # Statistiques du batcher
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": self.counters["items"] / batches if batches else 0.0,
+        }
+
+    async def _run(self) -> None: # Boucle : attend un élément, complète le lot pendant max_wait, appelle fn
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try: # Éléments déjà en file : pas d'attente
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                getter = asyncio.ensure_future(self._queue.get())
+                try:
+                    done, _ = await asyncio.wait({getter}, timeout=timeout)
+                finally:
+                    if not getter.done(): # Fenêtre écoulée (ou arrêt) : on abandonne l'attente sans perdre d'élément
+                        getter.cancel()
+                if not done: # Fenêtre d'attente écoulée : on part avec le lot partiel
+                    break
+                batch.append(getter.result())
+            batch = [(item, future) for item, future in batch if not future.done()] # Requêtes annulées entre-temps
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.fn, [item for item, _ in batch])
+                if len(results) != len(batch): # Sinon les requêtes sans résultat attendraient indéfiniment
+                    raise ValueError(f"fn a retourné {len(results)} résultats pour {len(batch)} requêtes")
+            except Exception as error: # L'erreur est transmise à chaque requête du lot
+                self.counters["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            finally:
+                self.counters["busy_seconds"] += time.perf_counter() - start
+            self.counters["batches"] += 1
+            self.counters["items"] += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
@@ -0,0 +1,258 @@
+"""
+Module NLP : Cache persistant des résultats (adressé par le contenu)
+
+La clé d'un résultat est le hash du texte normalisé, de l'identifiant du modèle et des paramètres
+de l'appel (max_length, min_length...). Un premier niveau LRU en mémoire est adossé à une base
+SQLite locale qui survit aux redémarrages.
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import copy # Copie des résultats renvoyés (le cache ne doit pas être modifié par l'appelant)
+import hashlib # Hash du contenu pour construire les clés
+import json # Sérialisation des paramètres et des résultats
+import os # Création du dossier de la base
+import re # Normalisation du texte
+import sqlite3 # Stockage persistant sur disque
+import threading # Verrou : le cache est partagé entre threads
+import time # Date du dernier accès (éviction)
+from collections import OrderedDict # Niveau mémoire LRU
+from typing import Callable, Dict, List, Optional, Sequence
+# ----- Local modules -----
+from src.nlp import metrics # Instrumentation optionnelle (succès / échecs du cache)
+
+_SPACES = re.compile(r"[ \t]+") # Suites d'espaces ou tabulations
+_SPEAKER_TAG = re.compile(r"^(Client)_\d+:", re.MULTILINE) # Étiquette "Client_N:" en début de ligne
+
+
+def normalize_text(text: str, normalize_speakers: bool = False) -> str: # Normalise un texte avant hash
+    """
+    Normalise un texte pour que des variantes sans importance partagent la même clé.
+    Args:
+        text (str): Texte brut
+        normalize_speakers (bool): Remplace "Client_N:" par "Client:" (transcriptions générées à partir de templates)
+    Returns:
+        str: Texte normalisé
+    """
+    text = text.replace("\r\n", "\n").strip() # Fins de ligne Windows et espaces aux extrémités
+    text = "\n".join(_SPACES.sub(" ", line).strip() for line in text.split("\n")) # Espaces multiples dans chaque ligne
+    if normalize_speakers:
+        text = _SPEAKER_TAG.sub(r"\1:", text)
+    return text
+
+
+def model_revision(pipe) -> str: # Empreinte des poids d'un pipeline chargé
+    """Retourne la révision (commit du hub) ou le chemin du modèle, pour détecter un changement de poids."""
+    config = getattr(getattr(pipe, "model", None), "config", None)
+    return str(getattr(config, "_commit_hash", None) or getattr(config, "_name_or_path", ""))
+
+
+def loaded_revision(registry, spec) -> Optional[str]: # Révision d'un modèle déjà chargé, sans jamais le charger
+    """Retourne la révision du modèle s'il est dans le registre, None sinon (cached_batch vérifie alors après un calcul)."""
+    pipe = registry.peek(*spec)
+    return model_revision(pipe) if pipe is not None else None
+
+
+class ResultCache: # Cache à deux niveaux (mémoire LRU + SQLite) des sorties des analyseurs
+
+    def __init__(
+        self,
+        path: Optional[str] = "data/processed/nlp_cache.sqlite",
+        memory_entries: int = 10000,
+        max_disk_entries: int = 1_000_000,
+        normalize_speakers: bool = False,
+    ):
+        """
+        Args:
+            path (str, optional): Fichier SQLite (None = cache en mémoire uniquement)
+            memory_entries (int): Nombre de résultats gardés dans le niveau mémoire
+            max_disk_entries (int): Nombre de résultats au-delà duquel les plus anciens sont supprimés du disque
+            normalize_speakers (bool): Ignore le numéro de client dans la clé ("Client_N:" -> "Client:")
+        """
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.normalize_speakers = normalize_speakers
+        self._memory: "OrderedDict[str, object]" = OrderedDict() # Niveau mémoire, du moins au plus récent
+        self._lock = threading.Lock()
+        self._revisions: Dict[str, str] = {} # Révisions de modèles déjà vérifiées dans ce processus
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False) # Accès protégé par self._lock
+            self._db.execute("PRAGMA journal_mode=WAL") # Lectures et écritures concurrentes entre processus
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, model TEXT, value TEXT, accessed REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_model ON results (model)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, revision TEXT)")
+            self._db.commit()
+
+    def key(self, model: str, text: str, params: Optional[dict] = None) -> str: # Clé adressée par le contenu
+        payload = json.dumps([model, params or {}, normalize_text(text, self.normalize_speakers)], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, object]: # Recherche groupée (mémoire puis disque)
+        """
+        Args:
+            keys (Sequence[str]): Clés recherchées
+        Returns:
+            Dict[str, object]: Résultats trouvés, indexés par clé
+        """
+        found: Dict[str, object] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self.counters["memory_hits"] += len(found)
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self._db is not None:
+                now = time.time()
+                for start in range(0, len(missing), 500): # Limite du nombre de paramètres SQLite
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(f"SELECT key, value FROM results WHERE key IN ({placeholders})", chunk).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key])
+                    self._db.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(now, key) for key, _ in rows])
+                    self.counters["disk_hits"] += len(rows)
+                self._db.commit()
+            self.counters["misses"] += len([key for key in missing if key not in found])
+        return found
+
+    def put_many(self, model: str, items: Sequence[tuple]) -> None: # Enregistrement groupé
+        """
+        Args:
+            model (str): Identifiant du modèle (sert à l'invalidation)
+            items (Sequence[tuple]): Couples (clé, résultat sérialisable en JSON)
+        """
+        if not items:
+            return
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            if self._db is not None:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, model, value, accessed) VALUES (?, ?, ?, ?)",
+                    [(key, model, json.dumps(value, ensure_ascii=False), now) for key, value in items],
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def check_model(self, model: str, revision: str) -> bool: # Invalide les résultats si les poids du modèle ont changé
+        """Compare la révision du modèle chargé à celle enregistrée et purge ses résultats si elle a changé (retourne True)."""
+        with self._lock:
+            previous = self._revisions.get(model)
+            if previous == revision: # Déjà vérifié dans ce processus
+                return False
+            self._revisions[model] = revision
+            if self._db is None: # Cache en mémoire seulement : la révision précédente est celle de ce processus
+                if previous is not None:
+                    self._purge(model)
+                return previous is not None
+            row = self._db.execute("SELECT revision FROM models WHERE model = ?", (model,)).fetchone()
+            changed = row is not None and row[0] != revision
+            if changed:
+                self._purge(model)
+            self._db.execute("INSERT OR REPLACE INTO models (model, revision) VALUES (?, ?)", (model, revision))
+            self._db.commit()
+            return changed
+
+    def invalidate(self, model: Optional[str] = None) -> None: # Vide le cache (tout, ou pour un modèle)
+        with self._lock:
+            self._purge(model)
+            if self._db is not None:
+                self._db.commit()
+
+    def stats(self) -> dict: # Compteurs de succès / échecs
+        with self._lock:
+            counters = dict(self.counters)
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if self._db is not None else 0
+            memory_entries = len(self._memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries,
+        }
+
+    def close(self) -> None: # Ferme la base SQLite
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, value) -> None: # Ajout dans le niveau mémoire (appelé sous verrou)
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _purge(self, model: Optional[str]) -> None: # Suppression (appelé sous verrou)
+        self._memory.clear() # Le niveau mémoire ne connaît pas le modèle de chaque clé : on le vide entièrement
+        self.counters["invalidations"] += 1
+        if self._db is not None:
+            if model is None:
+                self._db.execute("DELETE FROM results")
+            else:
+                self._db.execute("DELETE FROM results WHERE model = ?", (model,))
+
+    def _evict_disk(self) -> None: # Supprime les 10 % les plus anciens quand la base dépasse sa taille (appelé sous verrou)
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count <= self.max_disk_entries:
+            return
+        excess = count - self.max_disk_entries + self.max_disk_entries // 10 # Marge pour ne pas évincer à chaque écriture
+        self._db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,))
+        self.counters["evictions"] += excess
+
+
+def cached_batch(
+    cache: Optional[ResultCache],
+    model: str,
+    params: dict,
+    texts: Sequence[str],
+    compute: Callable[[List[str]], List],
+    revision: Optional[Callable[[], Optional[str]]] = None,
+) -> List: # Applique compute() uniquement aux textes absents du cache
+    """
+    Retourne les résultats des textes, en ne calculant que ceux qui ne sont pas en cache.
+    Args:
+        cache (ResultCache, optional): Cache à utiliser (None = calcul direct)
+        model (str): Identifiant du modèle (fait partie de la clé)
+        params (dict): Paramètres de l'appel (font partie de la clé)
+        texts (Sequence[str]): Textes à traiter
+        compute (Callable): Calcule les résultats d'une liste de textes
+        revision (Callable, optional): Révision des poids du modèle, sans le charger (None = modèle pas encore chargé).
+            Connue, elle est comparée avant la recherche : un lot entièrement en cache voit un changement de poids.
+            Inconnue, un lot entièrement en cache ne charge pas le modèle ; la révision est vérifiée après le
+            calcul des absents (qui a chargé le modèle) et les résultats trouvés sont recalculés s'ils sont périmés.
+    Returns:
+        List: Résultats dans l'ordre des textes
+    """
+    if cache is None:
+        return compute(list(texts))
+    current = revision() if revision is not None else None
+    if current is not None: # Modèle déjà chargé : purge ses résultats si ses poids ont changé
+        cache.check_model(model, current)
+    keys = [cache.key(model, text, params) for text in texts]
+    found = cache.get_many(keys)
+    missing: Dict[str, int] = {} # Clé -> premier indice à calculer (les doublons ne sont calculés qu'une fois)
+    misses = 0
+    for index, key in enumerate(keys):
+        if key not in found:
+            missing.setdefault(key, index)
+            misses += 1
+    metrics.observe_cache(model, len(keys) - misses, misses)
+    if missing:
+        computed = compute([texts[index] for index in missing.values()])
+        new_items = list(zip(missing, computed))
+        loaded = revision() if revision is not None and current is None else None # Le calcul a pu charger le modèle
+        if loaded is not None and cache.check_model(model, loaded) and found: # Résultats trouvés avant la vérification : périmés
+            stale = {key: index for index, key in enumerate(keys) if key in found}
+            new_items += list(zip(stale, compute([texts[index] for index in stale.values()])))
+        cache.put_many(model, new_items)
+        found.update(new_items)
+    return [copy.deepcopy(found[key]) for key in keys]
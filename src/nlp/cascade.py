@@ -0,0 +1,279 @@
+"""
+Module NLP : Cascade "léger d'abord" pour la classification thématique
+
+Un classifieur léger (n-grammes de caractères TF-IDF + régression logistique) est entraîné
+automatiquement sur les labels déjà produits par le modèle zero-shot. Il répond seul quand
+il est confiant ; les textes incertains repartent vers le zero-shot (DeBERTa). Le réentraînement
+automatique se fait dans un thread de fond : aucune requête ne l'attend.
+
+Usage :
+    python -m src.nlp.cascade refit --transcripts data/raw/transcripts --out data/processed/topic_cascade.joblib
+    python -m src.nlp.cascade stats data/processed/topic_cascade.joblib
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import os # Gestion des chemins de fichiers
+import random # Tirage des textes audités
+import threading # Verrou autour de l'historique et du réentraînement
+from collections import deque # Historique borné des labels zero-shot
+from typing import Iterable, List, Optional, Sequence, Tuple
+# ----- Third party libraries -----
+import joblib # Sauvegarde et chargement du modèle léger
+import numpy as np # Calculs sur les probabilités
+from sklearn.feature_extraction.text import TfidfVectorizer # Vectorisation en n-grammes de caractères
+from sklearn.linear_model import LogisticRegression # Modèle linéaire léger
+from sklearn.model_selection import cross_val_predict # Estimation honnête de l'accord avant export
+from sklearn.pipeline import make_pipeline # Enchaînement vectoriseur + modèle
+
+FAST_TIER = "fast" # Réponse du classifieur léger
+ZERO_SHOT_TIER = "zero-shot" # Réponse du modèle zero-shot
+
+
+class TopicCascade: # Classe du premier étage de la cascade (classifieur léger auto-entraîné)
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        min_samples: int = 50,
+        refit_every: int = 200,
+        audit_rate: float = 0.05,
+        max_history: int = 50000,
+        seed: int = 42,
+        background: bool = True,
+    ):
+        """
+        Args:
+            threshold (float): Confiance minimale pour que le classifieur léger réponde seul
+            min_samples (int): Nombre de labels zero-shot nécessaires avant le premier entraînement
+            refit_every (int): Réentraînement automatique tous les refit_every nouveaux labels
+            audit_rate (float): Part des réponses confiantes revérifiées par le zero-shot (statistiques d'accord)
+            max_history (int): Nombre maximal de couples (texte, label) conservés pour l'entraînement
+            seed (int): Graine du tirage des audits
+            background (bool): Réentraînement automatique dans un thread de fond (False = dans observe())
+        """
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.refit_every = refit_every
+        self.audit_rate = audit_rate
+        self.history: deque = deque(maxlen=max_history) # Couples (texte, label zero-shot)
+        self.model = None # Pipeline scikit-learn, None tant que pas entraîné
+        self.generation = 0 # Numéro du modèle en service (fait partie des clés du cache de résultats)
+        self.background = background
+        self._refit_thread: Optional[threading.Thread] = None # Réentraînement de fond en cours
+        self._new_samples = 0 # Labels reçus depuis le dernier entraînement
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {"fast": 0, "zero_shot": 0, "audited": 0, "agreed": 0, "refits": 0} # Statistiques d'utilisation
+        self.seconds = {"fast": 0.0, "zero_shot": 0.0} # Temps cumulé par étage
+
+    @property
+    def is_ready(self) -> bool: # Le classifieur léger peut-il répondre ?
+        return self.model is not None
+
+    def predict(self, texts: Sequence[str]) -> List[Optional[Tuple[str, float]]]: # Prédiction du classifieur léger
+        """
+        Prédit le thème des textes avec le classifieur léger.
+        Args:
+            texts (Sequence[str]): Textes à classifier
+        Returns:
+            List: (label, confiance) par texte, ou None partout si le modèle n'est pas encore entraîné
+        """
+        model = self.model # Copie locale : un réentraînement concurrent remplace l'objet sans le modifier
+        if model is None or not texts:
+            return [None] * len(texts)
+        probabilities = model.predict_proba(list(texts))
+        best = probabilities.argmax(axis=1)
+        classes = model.classes_
+        return [(str(classes[i]), float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def accepts(self, prediction: Optional[Tuple[str, float]]) -> bool: # La prédiction légère suffit-elle ?
+        return prediction is not None and prediction[1] >= self.threshold
+
+    def should_audit(self) -> bool: # Tirage d'une vérification par le zero-shot
+        with self._lock:
+            return self._random.random() < self.audit_rate
+
+    def observe(self, texts: Iterable[str], labels: Iterable[str], refit: bool = True) -> None: # Enregistre des labels zero-shot
+        """Ajoute des labels zero-shot à l'historique et réentraîne le modèle léger quand c'est le moment (refit=False : jamais, l'appelant s'en charge)."""
+        with self._lock:
+            for text, label in zip(texts, labels):
+                self.history.append((text, label))
+                self._new_samples += 1
+            due = refit and len(self.history) >= self.min_samples and (self.model is None or self._new_samples >= self.refit_every)
+            if due and self.background:
+                if self._refit_thread is not None and self._refit_thread.is_alive(): # Un seul réentraînement à la fois
+                    return
+                self._refit_thread = threading.Thread(target=self.refit, name="cascade-refit", daemon=True)
+                self._refit_thread.start()
+                return
+        if due:
+            self.refit()
+
+    def wait(self, timeout: Optional[float] = None) -> None: # Attend la fin du réentraînement de fond en cours
+        thread = self._refit_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def record_audit(self, fast_label: str, zero_shot_label: str) -> None: # Compare les deux étages sur un texte audité
+        with self._lock:
+            self.counters["audited"] += 1
+            self.counters["agreed"] += int(fast_label == zero_shot_label)
+
+    def record_tier(self, tier: str, count: int, seconds: float) -> None: # Compte les réponses et le temps par étage
+        key = "fast" if tier == FAST_TIER else "zero_shot"
+        with self._lock:
+            self.counters[key] += count
+            self.seconds[key] += seconds
+
+    def refit(self) -> bool: # Réentraîne le modèle léger sur tout l'historique
+        """
+        Réentraîne le classifieur léger sur l'historique des labels zero-shot.
+        Returns:
+            bool: True si un modèle a été entraîné (il faut au moins deux thèmes distincts)
+        """
+        with self._lock:
+            samples = list(self.history)
+            self._new_samples = 0
+        texts = [text for text, _ in samples]
+        labels = [label for _, label in samples]
+        if len(set(labels)) < 2: # Une régression logistique a besoin d'au moins deux classes
+            return False
+        model = _build_model()
+        model.fit(texts, labels)
+        with self._lock:
+            self.model = model # Remplacement atomique : les prédictions en cours gardent l'ancien modèle
+            self.generation += 1
+            self.counters["refits"] += 1
+        return True
+
+    def threshold_report(self, thresholds: Sequence[float] = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95), folds: int = 5) -> List[dict]: # Accord et couverture selon le seuil
+        """
+        Estime, par validation croisée sur l'historique, la part des textes traités par le modèle léger
+        (couverture) et son accord avec le zero-shot pour chaque seuil.
+        Returns:
+            List[dict]: Une ligne par seuil (threshold, coverage, agreement)
+        """
+        with self._lock:
+            samples = list(self.history)
+        texts = [text for text, _ in samples]
+        labels = np.array([label for _, label in samples])
+        _, counts = np.unique(labels, return_counts=True)
+        folds = min(folds, int(counts.min())) if len(counts) >= 2 else 0 # Chaque classe doit apparaître dans chaque pli
+        if folds < 2:
+            return []
+        model = _build_model()
+        probabilities = cross_val_predict(model, texts, labels, cv=folds, method="predict_proba")
+        classes = np.unique(labels) # Ordre des colonnes de predict_proba
+        confidence = probabilities.max(axis=1)
+        predicted = classes[probabilities.argmax(axis=1)]
+        report = []
+        for threshold in thresholds:
+            answered = confidence >= threshold
+            report.append({
+                "threshold": threshold,
+                "coverage": float(answered.mean()),
+                "agreement": float((predicted[answered] == labels[answered]).mean()) if answered.any() else None,
+            })
+        return report
+
+    def stats(self) -> dict: # Statistiques d'utilisation de la cascade
+        with self._lock:
+            counters = dict(self.counters)
+            seconds = dict(self.seconds)
+        total = counters["fast"] + counters["zero_shot"]
+        return {
+            **counters,
+            "fast_ratio": counters["fast"] / total if total else 0.0,
+            "agreement": counters["agreed"] / counters["audited"] if counters["audited"] else None,
+            "fast_ms_per_text": 1000 * seconds["fast"] / counters["fast"] if counters["fast"] else None,
+            "zero_shot_ms_per_text": 1000 * seconds["zero_shot"] / counters["zero_shot"] if counters["zero_shot"] else None,
+            "history": len(self.history),
+            "threshold": self.threshold,
+        }
+
+    def save(self, path: str) -> None: # Exporte le modèle léger et son historique
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            state = {
+                "model": self.model,
+                "generation": self.generation,
+                "history": list(self.history),
+                "threshold": self.threshold,
+                "counters": dict(self.counters),
+            }
+        joblib.dump(state, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "TopicCascade": # Recharge une cascade exportée
+        state = joblib.load(path)
+        kwargs.setdefault("threshold", state["threshold"])
+        cascade = cls(**kwargs)
+        cascade.model = state["model"]
+        cascade.generation = state.get("generation", int(state["model"] is not None))
+        cascade.history.extend(state["history"])
+        cascade.counters.update(state["counters"])
+        return cascade
+
+    def __getstate__(self): # Les verrous ne se sérialisent pas (envoi vers un autre processus)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_refit_thread"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def _build_model(): # Classifieur léger : n-grammes de caractères + régression logistique
+    return make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), sublinear_tf=True, lowercase=True),
+        LogisticRegression(max_iter=1000),
+    )
+
+
+def _read_transcripts(pattern: str) -> List[str]: # Lit les transcriptions d'un dossier ou d'un motif glob
+    paths = sorted(glob.glob(os.path.join(pattern, "*.txt")) if os.path.isdir(pattern) else glob.glob(pattern))
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            texts.append(file.read())
+    return texts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Commande de réentraînement / export / statistiques
+    parser = argparse.ArgumentParser(description="Cascade de classification thématique")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refit = commands.add_parser("refit", help="Étiquette des transcriptions avec le zero-shot, entraîne et exporte le modèle léger")
+    refit.add_argument("--transcripts", default="data/raw/transcripts", help="Dossier ou motif glob des transcriptions")
+    refit.add_argument("--out", default="data/processed/topic_cascade.joblib", help="Fichier d'export")
+    refit.add_argument("--from-model", help="Cascade existante à compléter")
+    refit.add_argument("--threshold", type=float, default=0.8, help="Seuil de confiance du modèle léger")
+    stats = commands.add_parser("stats", help="Affiche les statistiques d'une cascade exportée")
+    stats.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "refit":
+        from src.nlp.classifier import DialogueClassifier # Import local : le zero-shot n'est nécessaire que pour refit
+        cascade = TopicCascade.load(args.from_model, threshold=args.threshold, background=False) if args.from_model else TopicCascade(threshold=args.threshold, background=False)
+        texts = [text for text in _read_transcripts(args.transcripts) if text]
+        labels = [result["label"] for result in DialogueClassifier().classify_batch(texts)] # Labels "enseignant" du zero-shot
+        cascade.observe(texts, labels, refit=False) # Un seul entraînement, juste après
+        if not cascade.refit():
+            print("Pas assez de thèmes distincts pour entraîner le modèle léger.")
+            return
+        cascade.save(args.out)
+        print(f"Modèle léger exporté : {args.out} ({len(cascade.history)} exemples)")
+    else:
+        cascade = TopicCascade.load(args.path)
+    print(cascade.stats())
+    for row in cascade.threshold_report(): # Aide au choix du seuil : couverture vs accord
+        agreement = f"{row['agreement']:.1%}" if row["agreement"] is not None else "-"
+        print(f"seuil={row['threshold']:.2f}  couverture={row['coverage']:.1%}  accord={agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Module NLP : Découpage des longs dialogues en morceaux (chunks) respectant un budget de tokens
+
+Les dialogues sont coupés aux changements de locuteur ("Client:" / "Agent:") plutôt qu'au
+caractère près, pour qu'aucune partie de l'appel ne soit ignorée silencieusement.
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import re # Détection des lignes de locuteur
+from typing import List, NamedTuple, Sequence
+
+SPEAKER_LINE = re.compile(r"^\s*(Client(?:_\d+)?|Agent)\s*:", re.IGNORECASE) # Début d'un tour de parole
+
+
+class Chunk(NamedTuple): # Morceau de dialogue envoyé au modèle
+    text: str # Texte du morceau (tours de parole complets, séparés par des sauts de ligne)
+    n_tokens: int # Nombre de tokens estimé (sans les tokens spéciaux)
+
+
+def split_turns(text: str) -> List[str]: # Découpe un dialogue en tours de parole
+    """
+    Découpe un dialogue en tours de parole. Une ligne sans étiquette de locuteur est rattachée
+    au tour précédent ; un texte sans aucune étiquette est découpé ligne par ligne.
+    Args:
+        text (str): Dialogue au format "Client_N: ..." / "Agent: ..."
+    Returns:
+        List[str]: Tours de parole, dans l'ordre
+    """
+    lines = [line.strip() for line in text.replace("\r\n", "\n").split("\n")]
+    lines = [line for line in lines if line] # Lignes vides ignorées
+    if not any(SPEAKER_LINE.match(line) for line in lines): # Aucune étiquette (ex: résumés concaténés) : une ligne par tour
+        return lines
+    turns: List[str] = []
+    for line in lines:
+        if SPEAKER_LINE.match(line) or not turns: # Nouveau tour de parole
+            turns.append(line)
+        else: # Suite du tour précédent
+            turns[-1] += " " + line
+    return turns
+
+
+def speaker_of(turn: str) -> str: # Locuteur d'un tour de parole ("client", "agent" ou "")
+    match = SPEAKER_LINE.match(turn)
+    if match is None:
+        return ""
+    return "agent" if match.group(1).lower() == "agent" else "client"
+
+
+def _token_lengths(tokenizer, texts: Sequence[str]) -> List[int]: # Nombre de tokens sans tokens spéciaux
+    if tokenizer is None: # Approximation : environ 4 caractères par token
+        return [len(text) // 4 + 1 for text in texts]
+    return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+
+
+def _split_long_turn(turn: str, tokenizer, max_tokens: int) -> List[Chunk]: # Coupe un tour trop long pour un seul morceau
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False): # Coupe exacte grâce aux positions des tokens
+        offsets = tokenizer(turn, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        pieces = []
+        for start in range(0, len(offsets), max_tokens):
+            end = min(start + max_tokens, len(offsets))
+            pieces.append(Chunk(turn[offsets[start][0]:offsets[end - 1][1]], end - start))
+        return pieces
+    width = max_tokens * 4 # Sans positions de tokens : coupe en caractères (environ 4 caractères par token)
+    return [Chunk(turn[start:start + width], min(max_tokens, len(turn[start:start + width]) // 4 + 1)) for start in range(0, len(turn), width)]
+
+
+def chunk_dialogue(text: str, tokenizer, max_tokens: int, overlap_turns: int = 0) -> List[Chunk]: # Découpe un dialogue en morceaux
+    """
+    Regroupe les tours de parole en morceaux qui tiennent dans le budget de tokens du modèle.
+    Args:
+        text (str): Dialogue complet
+        tokenizer: Tokenizer du modèle (None = estimation en caractères)
+        max_tokens (int): Budget de tokens par morceau (hors tokens spéciaux)
+        overlap_turns (int): Nombre de tours répétés au début du morceau suivant (contexte)
+    Returns:
+        List[Chunk]: Morceaux dans l'ordre du dialogue
+    """
+    turns = split_turns(text)
+    if not turns:
+        return []
+    pieces: List[Chunk] = []
+    for turn, n_tokens in zip(turns, _token_lengths(tokenizer, turns)):
+        if n_tokens <= max_tokens:
+            pieces.append(Chunk(turn, n_tokens))
+        else: # Un tour plus long que le budget est lui-même découpé
+            pieces.extend(_split_long_turn(turn, tokenizer, max_tokens))
+
+    chunks: List[Chunk] = []
+    start = 0
+    while start < len(pieces):
+        end, total = start + 1, pieces[start].n_tokens # Un morceau contient au moins un tour
+        while end < len(pieces) and total + pieces[end].n_tokens <= max_tokens:
+            total += pieces[end].n_tokens
+            end += 1
+        chunks.append(Chunk("\n".join(piece.text for piece in pieces[start:end]), total))
+        if end >= len(pieces):
+            break
+        next_start = max(end - overlap_turns, start + 1) # Chevauchement, sans jamais reculer
+        while next_start < end and sum(piece.n_tokens for piece in pieces[next_start:end + 1]) > max_tokens:
+            next_start += 1 # Le contexte répété ne doit pas empêcher le tour suivant d'entrer dans le morceau
+        start = next_start
+    return chunks
+
+
+def token_budget(tokenizer, reserved: int = 2, default: int = 512) -> int: # Budget de tokens utilisable par morceau
+    """Taille max du modèle moins les tokens réservés (tokens spéciaux, hypothèse du zero-shot...)."""
+    model_max = getattr(tokenizer, "model_max_length", None)
+    if not model_max or model_max > 100_000: # Valeur "infinie" quand le tokenizer ne la connaît pas
+        model_max = default
+    return max(model_max - reserved, 16)
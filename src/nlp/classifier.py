@@ -4,17 +4,28 @@ Module NLP : Classification thématique des dialogues téléphoniques
 
 # ----- Import libraries PEP 8 -----
 # ----- Standard library -----
-from transformers import pipeline # Librairie pour le traitement du langage naturel (NLP)
+import time # Mesure du temps passé dans chaque étage de la cascade
+from typing import Iterable, List, Optional, Union # Annotations de type
+# ----- Local modules -----
+from src.nlp.batching import as_list, batched_map, count_tokens # Outils de regroupement en lots
+from src.nlp.cache import ResultCache, cached_batch, loaded_revision # Cache optionnel des résultats
+from src.nlp import metrics # Instrumentation optionnelle (temps, tokens, troncatures)
+from src.nlp.chunking import chunk_dialogue, token_budget # Découpage des longs dialogues aux tours de parole
+from src.nlp.cascade import FAST_TIER, ZERO_SHOT_TIER, TopicCascade # Classifieur léger en premier étage
+from src.nlp.registry import ModelRegistry, ModelSpec, get_registry # Registre partagé des modèles (chargement paresseux)
 
 
 class DialogueClassifier: # Classe pour classifier le type de dialogue, utilise le zero-shot classification
 
-    def __init__(self):  # __init__() initialise le modèle
+    def __init__(self, model: str = "MoritzLaurer/DeBERTa-v3-base-mnli-fever-anli", device: int = -1, backend: str = "eager", registry: Optional[ModelRegistry] = None, cascade: Union[bool, TopicCascade] = False, cache: Optional[ResultCache] = None):  # __init__() décrit le modèle, qui n'est chargé qu'au premier appel
 
-        self.classifier = pipeline( # .classifier est un pipeline de classification
+        self.spec = ModelSpec( # .spec identifie le pipeline dans le registre partagé
             "zero-shot-classification", # Type de tâche NLP
-            model="MoritzLaurer/DeBERTa-v3-base-mnli-fever-anli" # Modèle pré-entraîné (DeBERTa v3)
+            model, # Modèle pré-entraîné (DeBERTa v3 par défaut)
+            device, # -1 = CPU
+            backend # "eager" (fp32), "int8" ou "onnx" (voir src.nlp.backends)
         )
+        self.registry = registry or get_registry() # Registre partagé par toutes les instances du processus
 
         self.labels = [ #.labels prédéfinis pour la classification
             "facturation",
@@ -25,10 +36,184 @@ class DialogueClassifier: # Classe pour classifier le type de dialogue, utilise
             "autre"
         ]
 
+        if cascade is True: # Mode cascade avec les réglages par défaut
+            cascade = TopicCascade()
+        self.cascade = cascade or None # .cascade est le classifieur léger (None = zero-shot seul)
+        self.cache = cache # .cache est le cache optionnel des résultats (None = pas de cache)
+
+    @property
+    def classifier(self): # .classifier est le pipeline de classification partagé (chargé au premier accès)
+        return self.registry.get(*self.spec)
+
+    def revision(self) -> Optional[str]: # Révision des poids du modèle (invalidation du cache), None s'il n'est pas encore chargé
+        return loaded_revision(self.registry, self.spec)
+
     def classify(self, text: str, max_length: int = 512) -> dict: # Classe pour classifier le texte selon des thèmes prédéfinis
         
         # Condition pour gérer le texte vide
         if not text: # Si le texte est vide
             return {"label": "autre", "score": 0.0} # Retourne "autre" avec score 0
-        result = self.classifier(text[:max_length], self.labels) # .classifier applique le modèle au texte tronqué, :max_length limite la taille, .labels sont les thèmes
+        if self.cascade is not None or self.cache is not None: # Cascade ou cache : même chemin que le traitement en lots
+            return self.classify_batch([text], max_length=max_length)[0]
+        metrics.observe_truncation(self.spec.cache_id, (text,), max_length)
+        with self.registry.use(*self.spec) as classifier: # Le modèle ne peut pas être déchargé pendant l'appel
+            result = classifier(text[:max_length], self.labels) # classifier applique le modèle au texte tronqué, :max_length limite la taille, .labels sont les thèmes
         return {"label": result["labels"][0], "score": float(result["scores"][0])}  # Retourne le label et le score du thème le plus probable
+
+    def classify_batch(self, texts: Iterable[str], max_length: int = 512, batch_size: int = 16, max_tokens: int = 8192) -> List[dict]: # Méthode pour classifier plusieurs textes en lots
+        """
+        Classifie plusieurs textes en regroupant les textes de longueurs proches.
+        Args:
+            texts (Iterable[str]): Textes à classifier
+            max_length (int): Longueur maximale de chaque texte
+            batch_size (int): Nombre maximal de textes par lot
+            max_tokens (int): Budget de tokens par lot (toutes hypothèses comprises)
+        Returns:
+            List[dict]: Un résultat (label et score) par texte, dans l'ordre d'entrée ;
+                en mode cascade, la clé "tier" indique l'étage qui a répondu ("fast" ou "zero-shot")
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = [{"label": "autre", "score": 0.0} for _ in texts] # Valeur par défaut (texte vide)
+        todo = [i for i, text in enumerate(texts) if text] # Indices des textes non vides
+        if not todo: # Rien à envoyer au modèle
+            return results
+        metrics.observe_truncation(self.spec.cache_id, (texts[i] for i in todo), max_length)
+        truncated = [texts[i][:max_length] for i in todo] # Même troncature que classify()
+        compute = self._cascade_batch if self.cascade is not None else self._zero_shot_batch # Classifieur léger d'abord si cascade
+        namespace = self.spec.cache_id + ("+cascade" if self.cascade is not None else "") # Les réponses de la cascade sont mises en cache à part
+        params = {"max_length": max_length, "labels": self.labels} # Paramètres qui changent le résultat
+        if self.cascade is not None: # Un réentraînement du modèle léger change les réponses de la cascade
+            params["generation"] = self.cascade.generation
+        outputs = cached_batch(self.cache, namespace, params, truncated, lambda batch: compute(batch, batch_size, max_tokens), self.revision)
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def score_batch(self, texts: Iterable[str], max_length: int = 512, batch_size: int = 16, max_tokens: int = 8192) -> List[dict]: # Scores de tous les thèmes
+        """
+        Retourne les scores zero-shot de tous les thèmes pour chaque texte (ex: estimation incrémentale du thème).
+        Returns:
+            List[dict]: {thème: score} par texte, dans l'ordre d'entrée ({} pour un texte vide)
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results: List[dict] = [{} for _ in texts] # Valeur par défaut (texte vide)
+        todo = [i for i, text in enumerate(texts) if text] # Indices des textes non vides
+        if not todo: # Rien à envoyer au modèle
+            return results
+        metrics.observe_truncation(self.spec.cache_id, (texts[i] for i in todo), max_length)
+        truncated = [texts[i][:max_length] for i in todo]
+        params = {"mode": "scores", "max_length": max_length, "labels": self.labels}
+        outputs = cached_batch(self.cache, self.spec.cache_id, params, truncated, lambda batch: self._zero_shot_scores(batch, batch_size, max_tokens), self.revision)
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def classify_long(self, text: str, reduce: str = "max", max_tokens: Optional[int] = None, overlap_turns: int = 0) -> dict: # Classification d'un long dialogue complet
+        """
+        Classifie un long dialogue sans le tronquer : il est découpé aux tours de parole en morceaux
+        qui tiennent dans la fenêtre du modèle, puis les scores des morceaux sont combinés.
+        Args:
+            text (str): Dialogue complet
+            reduce (str): "max" (un thème présent dans un seul morceau suffit) ou "mean" (moyenne pondérée par les tokens)
+            max_tokens (int, optional): Budget de tokens par morceau (par défaut : fenêtre du modèle moins l'hypothèse)
+            overlap_turns (int): Nombre de tours répétés entre deux morceaux consécutifs
+        Returns:
+            dict: Label, score, scores de tous les thèmes et nombre de morceaux
+        """
+        return self.classify_long_batch([text], reduce=reduce, max_tokens=max_tokens, overlap_turns=overlap_turns)[0]
+
+    def classify_long_batch(self, texts: Iterable[str], reduce: str = "max", max_tokens: Optional[int] = None, overlap_turns: int = 0, batch_size: int = 16, batch_tokens: int = 8192) -> List[dict]: # Plusieurs longs dialogues
+        """
+        Comme classify_long(), pour plusieurs dialogues : tous les morceaux de tous les textes passent dans les mêmes lots.
+        Returns:
+            List[dict]: Un résultat par texte, dans l'ordre d'entrée
+        """
+        if reduce not in ("max", "mean"):
+            raise ValueError("reduce doit valoir 'max' ou 'mean'")
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = [{"label": "autre", "score": 0.0, "scores": {}, "chunks": 0} for _ in texts] # Valeur par défaut (texte vide)
+        todo = [i for i, text in enumerate(texts) if text] # Indices des textes non vides
+        if not todo: # Rien à envoyer au modèle
+            return results
+        params = {"mode": "long", "reduce": reduce, "max_tokens": max_tokens, "overlap_turns": overlap_turns, "labels": self.labels}
+        outputs = cached_batch(self.cache, self.spec.cache_id, params, [texts[i] for i in todo],
+                               lambda batch: self._classify_long(batch, reduce, max_tokens, overlap_turns, batch_size, batch_tokens), self.revision)
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def _classify_long(self, texts: List[str], reduce: str, max_tokens: Optional[int], overlap_turns: int, batch_size: int, batch_tokens: int) -> List[dict]: # Découpe, inférence groupée, réduction
+        tokenizer = self.classifier.tokenizer
+        budget = max_tokens or token_budget(tokenizer, reserved=32) # Place réservée pour l'hypothèse "This example is {label}."
+        owners, chunks = [], [] # Texte d'origine de chaque morceau
+        for owner, text in enumerate(texts):
+            for chunk in chunk_dialogue(text, tokenizer, budget, overlap_turns):
+                owners.append(owner)
+                chunks.append(chunk)
+        chunk_scores = self._zero_shot_scores([chunk.text for chunk in chunks], batch_size, batch_tokens) # Tous les morceaux en lots
+        totals = [dict.fromkeys(self.labels, 0.0) for _ in texts]
+        weights = [0.0] * len(texts)
+        counts = [0] * len(texts)
+        for owner, chunk, scores in zip(owners, chunks, chunk_scores):
+            counts[owner] += 1
+            weights[owner] += chunk.n_tokens
+            for label, score in scores.items():
+                if reduce == "max":
+                    totals[owner][label] = max(totals[owner][label], score)
+                else: # Moyenne pondérée par la taille du morceau
+                    totals[owner][label] += score * chunk.n_tokens
+        outputs = []
+        for owner in range(len(texts)):
+            scores = totals[owner]
+            if reduce == "mean" and weights[owner]:
+                scores = {label: score / weights[owner] for label, score in scores.items()}
+            label = max(scores, key=scores.get)
+            outputs.append({"label": label, "score": float(scores[label]), "scores": scores, "chunks": counts[owner]})
+        return outputs
+
+    def _zero_shot_batch(self, truncated: List[str], batch_size: int, max_tokens: int) -> List[dict]: # Zero-shot en lots (thème le plus probable)
+        outputs = []
+        for scores in self._zero_shot_scores(truncated, batch_size, max_tokens):
+            label = max(scores, key=scores.get)
+            outputs.append({"label": label, "score": scores[label]})
+        return outputs
+
+    def _zero_shot_scores(self, truncated: List[str], batch_size: int, max_tokens: int) -> List[dict]: # Zero-shot en lots (scores de tous les thèmes)
+        per_label_budget = max(max_tokens // len(self.labels), 1) # Chaque texte est évalué une fois par label
+        with self.registry.use(*self.spec) as classifier: # Le modèle reste chargé pendant tout le traitement
+            lengths = count_tokens(classifier.tokenizer, truncated, model=self.spec.cache_id) # Longueur en tokens de chaque texte
+
+            def run(batch: List[str]) -> List[dict]: # Appel du pipeline sur un lot
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    outputs = as_list(classifier(batch, self.labels, batch_size=len(batch) * len(self.labels)))
+                    return [{label: float(score) for label, score in zip(out["labels"], out["scores"])} for out in outputs]
+
+            return batched_map(truncated, run, lengths, batch_size=batch_size, max_tokens=per_label_budget) # Résultats dans l'ordre
+
+    def _cascade_batch(self, truncated: List[str], batch_size: int, max_tokens: int) -> List[dict]: # Cascade léger -> zero-shot
+        cascade = self.cascade
+        start = time.perf_counter()
+        predictions = cascade.predict(truncated) # Un seul passage du modèle léger pour tout le lot
+        outputs: List[Optional[dict]] = [None] * len(truncated)
+        uncertain, audited = [], {} # Textes envoyés au zero-shot : incertains, ou confiants tirés pour audit
+        for i, prediction in enumerate(predictions):
+            if cascade.accepts(prediction): # Confiance suffisante : réponse immédiate
+                outputs[i] = {"label": prediction[0], "score": prediction[1], "tier": FAST_TIER}
+                if cascade.should_audit(): # Vérification en arrière-plan pour mesurer l'accord
+                    audited[i] = prediction[0]
+            else:
+                uncertain.append(i)
+        cascade.record_tier(FAST_TIER, len(truncated) - len(uncertain), time.perf_counter() - start)
+
+        slow = uncertain + list(audited)
+        if slow:
+            start = time.perf_counter()
+            zero_shot = self._zero_shot_batch([truncated[i] for i in slow], batch_size, max_tokens)
+            cascade.record_tier(ZERO_SHOT_TIER, len(uncertain), (time.perf_counter() - start) * len(uncertain) / len(slow))
+            for i, result in zip(slow, zero_shot):
+                if i in audited: # Texte audité : la réponse légère est conservée, on compte seulement l'accord
+                    cascade.record_audit(audited[i], result["label"])
+                else:
+                    outputs[i] = {**result, "tier": ZERO_SHOT_TIER}
+            cascade.observe([truncated[i] for i in slow], [result["label"] for result in zero_shot]) # Nouveaux exemples d'entraînement
+        return outputs
@@ -0,0 +1,344 @@
+"""
+Module NLP : Regroupement incrémental des appels et recherche d'appels similaires
+
+- Les embeddings des appels (src.nlp.embeddings) sont ajoutés à un fichier float32 sur disque,
+  relu en mémoire mappée : un appel déjà indexé n'est jamais ré-encodé.
+- Les thèmes sont des clusters MiniBatchKMeans mis à jour par partial_fit avec les seuls nouveaux appels ;
+  les termes de chaque cluster sont comptés au fil de l'eau (c-TF-IDF calculé à la lecture).
+- La recherche "appels similaires" utilise un index IVF : les vecteurs sont rangés dans des cellules
+  (k-means grossier entraîné une fois) et une requête ne parcourt que les nprobe cellules les plus proches.
+
+Usage :
+    python -m src.nlp.clustering add data/raw/transcripts
+    python -m src.nlp.clustering similar "Mon internet ne fonctionne plus"
+    python -m src.nlp.clustering stats
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import math # Pondération des termes (c-TF-IDF)
+import os # Gestion des chemins de fichiers
+import sqlite3 # Table des appels indexés (identifiant, cluster, cellule)
+import threading # Un seul ajout à la fois
+from collections import Counter # Comptage incrémental des termes par cluster
+from pathlib import Path # Identifiant d'appel déduit du nom de fichier
+from typing import Dict, List, Optional, Sequence, Tuple
+# ----- Third party libraries -----
+import joblib # Sauvegarde des modèles k-means et des compteurs de termes
+import numpy as np # Calculs sur les vecteurs
+from sklearn.cluster import MiniBatchKMeans # k-means incrémental (partial_fit)
+# ----- Local modules -----
+from src.nlp.embeddings import TextEmbedder # Embeddings de phrases
+from src.nlp.extractive import terms_of # Mots porteurs de sens (mots vides du notebook 5 retirés)
+
+
+class CallClusterer: # Classe qui regroupe les appels et répond aux requêtes "appels similaires"
+
+    def __init__(self, directory: str = "data/processed/clusters", n_clusters: int = 8, n_cells: int = 256, embedder: Optional[TextEmbedder] = None, seed: int = 0): # __init__() recharge l'état sauvegardé s'il existe
+        """
+        Args:
+            directory (str): Dossier de l'index (vecteurs, table des appels, modèles)
+            n_clusters (int): Nombre de thèmes
+            n_cells (int): Nombre de cellules de l'index IVF (entraîné à partir de 39 vecteurs par cellule)
+            embedder (TextEmbedder, optional): Modèle d'embeddings (par défaut : MiniLM multilingue)
+            seed (int): Graine des k-means
+        """
+        self.directory = directory
+        self.embedder = embedder or TextEmbedder()
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.state_path = os.path.join(directory, "state.joblib")
+        self._db = sqlite3.connect(os.path.join(directory, "calls.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS calls (row INTEGER PRIMARY KEY, call_id TEXT UNIQUE, cluster INTEGER, cell INTEGER)")
+        if os.path.exists(self.state_path):
+            self.state = joblib.load(self.state_path)
+        else:
+            self.state = {
+                "dim": None, # Dimension des embeddings (connue au premier ajout)
+                "rows": 0, # Nombre de vecteurs dans vectors.f32
+                "n_clusters": n_clusters,
+                "n_cells": n_cells,
+                "kmeans": MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=3, batch_size=1024),
+                "fitted": False,
+                "cells": None, # Centres des cellules IVF (None = pas encore entraîné : recherche exhaustive)
+                "terms": [Counter() for _ in range(n_clusters)], # Occurrences des termes par cluster
+                "sizes": [0] * n_clusters, # Nombre d'appels par cluster
+                "pending": {}, # Textes des appels en attente du premier entraînement (ligne -> texte)
+                "seed": seed,
+            }
+        self._reconcile()
+        self._vectors = None # Mémoire mappée de vectors.f32 (rouverte après chaque ajout)
+        self._lists: Optional[Dict[int, np.ndarray]] = None # Listes inversées IVF : cellule -> lignes
+
+    def __len__(self) -> int:
+        return self.state["rows"]
+
+    def add(self, call_ids: Sequence[str], texts: Sequence[str], batch_size: int = 32) -> List[int]: # Indexe de nouveaux appels
+        """
+        Encode et indexe de nouveaux appels (les identifiants déjà indexés sont ignorés), met à jour
+        les clusters avec ces seuls appels et retourne leur cluster.
+        Args:
+            call_ids (Sequence[str]): Identifiants des appels
+            texts (Sequence[str]): Transcriptions
+            batch_size (int): Taille des lots d'inférence
+        Returns:
+            List[int]: Cluster de chaque appel (-1 tant que le modèle n'a pas vu n_clusters appels)
+        """
+        with self._lock:
+            known = self._known(call_ids)
+            new = [i for i, call_id in enumerate(call_ids) if call_id not in known]
+            new = list({call_ids[i]: i for i in new}.values()) # Doublons dans le même lot : une seule fois
+            if new:
+                vectors = self.embedder.embed_batch([texts[i] for i in new], batch_size=batch_size)
+                self._append([call_ids[i] for i in new], [texts[i] for i in new], vectors)
+            return self._clusters_of(call_ids)
+
+    def assign(self, texts: Sequence[str]) -> List[int]: # Cluster de textes, sans les indexer
+        if not self.state["fitted"]:
+            return [-1] * len(texts)
+        return [int(label) for label in self.state["kmeans"].predict(self.embedder.embed_batch(texts))]
+
+    def similar(self, text: str, k: int = 5, nprobe: int = 8) -> List[dict]: # Appels les plus proches d'un texte
+        """
+        Retourne les k appels indexés les plus proches d'un texte (cosinus).
+        Args:
+            text (str): Texte de la requête
+            k (int): Nombre de résultats
+            nprobe (int): Nombre de cellules IVF parcourues (plus = plus exact, plus lent)
+        Returns:
+            List[dict]: call_id, score et cluster, du plus proche au moins proche
+        """
+        return self.search(self.embedder.embed(text), k=k, nprobe=nprobe)
+
+    def similar_to(self, call_id: str, k: int = 5, nprobe: int = 8) -> List[dict]: # Appels proches d'un appel indexé
+        with self._lock:
+            row = self._db.execute("SELECT row FROM calls WHERE call_id = ?", (call_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"appel non indexé : {call_id}")
+            results = self.search(np.array(self._matrix()[row[0]]), k=k + 1, nprobe=nprobe)
+        return [result for result in results if result["call_id"] != call_id][:k]
+
+    def search(self, query: np.ndarray, k: int = 5, nprobe: int = 8) -> List[dict]: # Recherche par vecteur
+        with self._lock:
+            if not self.state["rows"]:
+                return []
+            matrix = self._matrix()
+            if self.state["cells"] is None: # Index pas encore entraîné : parcours exhaustif
+                rows = np.arange(self.state["rows"])
+                candidates = matrix
+            else: # Seules les cellules dont le centre est le plus proche de la requête sont parcourues
+                cells = np.argsort(-(self.state["cells"] @ query))[:nprobe]
+                lists = self._inverted_lists()
+                rows = np.sort(np.concatenate([lists.get(int(cell), np.zeros(0, dtype=np.int64)) for cell in cells]))
+                candidates = matrix[rows]
+            if not len(rows):
+                return []
+            scores = candidates @ query
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found = self._rows(rows[top])
+            return [{"call_id": found[int(rows[i])][0], "score": float(scores[i]), "cluster": found[int(rows[i])][1]} for i in top]
+
+    def top_terms(self, n: int = 10) -> Dict[int, List[Tuple[str, float]]]: # Termes caractéristiques de chaque cluster
+        """Retourne, par cluster, les n termes au c-TF-IDF le plus élevé (fréquents dans le cluster, rares ailleurs)."""
+        terms = self.state["terms"]
+        document_frequency = Counter(term for counter in terms for term in counter)
+        result = {}
+        for cluster, counter in enumerate(terms):
+            total = sum(counter.values()) or 1
+            scores = {term: count / total * math.log(1 + len(terms) / document_frequency[term]) for term, count in counter.items()}
+            result[cluster] = sorted(scores.items(), key=lambda item: -item[1])[:n]
+        return result
+
+    def clusters(self, n_terms: int = 8) -> List[dict]: # Résumé des clusters (tableau de bord)
+        top = self.top_terms(n_terms)
+        return [{"cluster": cluster, "size": size, "terms": [term for term, _ in top[cluster]]} for cluster, size in enumerate(self.state["sizes"])]
+
+    def points(self, limit: int = 2000, seed: int = 0) -> dict: # Projection 2D d'un échantillon (visualisation)
+        """Retourne call_id, cluster et coordonnées (x, y) d'un échantillon d'appels, projetés sur les 2 axes principaux de l'échantillon."""
+        with self._lock:
+            rows = self.state["rows"]
+            if not rows:
+                return {"call_id": [], "cluster": [], "x": [], "y": []}
+            sample = np.sort(np.random.default_rng(seed).choice(rows, size=min(limit, rows), replace=False))
+            vectors = np.asarray(self._matrix()[sample])
+            centered = vectors - vectors.mean(axis=0)
+            _, _, axes = np.linalg.svd(centered, full_matrices=False) # Analyse en composantes principales
+            coordinates = centered @ axes[:2].T if len(axes) >= 2 else np.zeros((len(sample), 2))
+            found = self._rows(sample)
+            return {
+                "call_id": [found[int(row)][0] for row in sample],
+                "cluster": [found[int(row)][1] for row in sample],
+                "x": coordinates[:, 0].tolist(),
+                "y": coordinates[:, 1].tolist() if coordinates.shape[1] > 1 else [0.0] * len(sample),
+            }
+
+    def stats(self) -> dict: # Résumé de l'index
+        return {"calls": self.state["rows"], "dim": self.state["dim"], "fitted": self.state["fitted"],
+                "ivf": self.state["cells"] is not None, "sizes": list(self.state["sizes"])}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _reconcile(self) -> None: # Remet la table des appels en accord avec l'état sauvegardé (point de validation d'un ajout)
+        """
+        Un ajout valide la table des appels avant de sauvegarder l'état : après un arrêt entre les deux,
+        les lignes au-delà de state["rows"] sont retirées (ces appels seront ré-indexés au prochain ajout),
+        ainsi que les clusters et cellules attribués par un modèle ou un index IVF jamais sauvegardé.
+        """
+        state = self.state
+        changed = self._db.execute("DELETE FROM calls WHERE row >= ?", (state["rows"],)).rowcount
+        if not state["fitted"]:
+            changed += self._db.execute("UPDATE calls SET cluster = -1 WHERE cluster != -1").rowcount
+        if state["cells"] is None:
+            changed += self._db.execute("UPDATE calls SET cell = -1 WHERE cell != -1").rowcount
+        if changed:
+            self._db.commit()
+
+    def _known(self, call_ids: Sequence[str]) -> set: # Identifiants déjà indexés
+        known = set()
+        for start in range(0, len(call_ids), 500): # Limite du nombre de paramètres SQLite
+            batch = list(call_ids[start:start + 500])
+            known.update(row[0] for row in self._db.execute(f"SELECT call_id FROM calls WHERE call_id IN ({','.join('?' * len(batch))})", batch))
+        return known
+
+    def _rows(self, rows: Sequence[int]) -> Dict[int, Tuple[str, int]]: # Ligne -> (call_id, cluster)
+        found = {}
+        rows = [int(row) for row in rows]
+        for start in range(0, len(rows), 500): # Limite du nombre de paramètres SQLite
+            batch = rows[start:start + 500]
+            found.update((row, (call_id, cluster)) for row, call_id, cluster in self._db.execute(f"SELECT row, call_id, cluster FROM calls WHERE row IN ({','.join('?' * len(batch))})", batch))
+        return found
+
+    def _clusters_of(self, call_ids: Sequence[str]) -> List[int]:
+        clusters = {}
+        for start in range(0, len(call_ids), 500):
+            batch = list(call_ids[start:start + 500])
+            clusters.update(self._db.execute(f"SELECT call_id, cluster FROM calls WHERE call_id IN ({','.join('?' * len(batch))})", batch).fetchall())
+        return [clusters.get(call_id, -1) for call_id in call_ids]
+
+    def _append(self, call_ids: List[str], texts: List[str], vectors: np.ndarray) -> None: # Ajoute des vecteurs et met à jour les modèles
+        state = self.state
+        state["dim"] = state["dim"] or vectors.shape[1]
+        first = state["rows"]
+        with open(self.vectors_path, "ab") as file: # Ajout en fin de fichier : les vecteurs existants ne sont pas relus
+            file.truncate(first * state["dim"] * 4) # Octets écrits par un ajout interrompu avant la sauvegarde de l'état
+            file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        state["rows"] += len(vectors)
+        self._vectors = None
+        rows = np.arange(first, state["rows"])
+
+        kmeans = state["kmeans"]
+        if state["fitted"]: # Mise à jour incrémentale avec les seuls nouveaux appels
+            kmeans.partial_fit(vectors)
+            labels = kmeans.predict(vectors)
+            self._count_terms(labels, texts)
+        elif state["rows"] >= state["n_clusters"]: # Premier entraînement : tous les appels en attente (cluster -1) sont rattrapés
+            pending = np.asarray(self._matrix())
+            kmeans.partial_fit(pending)
+            state["fitted"] = True
+            pending_texts = state.pop("pending", {})
+            pending_rows = sorted(pending_texts)
+            labels_all = kmeans.predict(pending)
+            self._db.executemany("UPDATE calls SET cluster = ? WHERE row = ?", [(int(labels_all[row]), row) for row in pending_rows])
+            self._count_terms(labels_all[pending_rows], [pending_texts[row] for row in pending_rows])
+            labels = labels_all[first:]
+            self._count_terms(labels, texts)
+        else: # Pas encore assez d'appels pour n_clusters clusters : textes gardés pour le rattrapage
+            labels = np.full(len(vectors), -1)
+            state.setdefault("pending", {}).update(zip(rows.tolist(), texts))
+
+        cells = np.full(len(vectors), -1)
+        trained = state["cells"] is None and state["rows"] >= 39 * state["n_cells"] # Assez de vecteurs pour entraîner l'index IVF
+        if trained:
+            self._train_cells()
+        if state["cells"] is not None:
+            cells = np.argmax(vectors @ state["cells"].T, axis=1)
+        self._db.executemany("INSERT INTO calls (row, call_id, cluster, cell) VALUES (?, ?, ?, ?)",
+                             [(int(row), call_id, int(label), int(cell)) for row, call_id, label, cell in zip(rows, call_ids, labels, cells)])
+        self._db.commit()
+        joblib.dump(state, self.state_path + ".tmp") # Point de validation : une table en avance sur l'état est corrigée à l'ouverture (_reconcile)
+        os.replace(self.state_path + ".tmp", self.state_path) # Écriture atomique
+        if trained: # Toutes les lignes viennent d'être rangées : listes reconstruites à la prochaine recherche
+            self._lists = None
+        elif self._lists is not None and state["cells"] is not None: # Seules les nouvelles lignes sont ajoutées aux listes
+            for cell, cell_rows in self._group_by_cell(rows, cells).items():
+                self._lists[cell] = np.concatenate([self._lists.get(cell, np.zeros(0, dtype=np.int64)), cell_rows])
+
+    def _count_terms(self, labels: np.ndarray, texts: Sequence[str]) -> None: # Comptage incrémental des termes
+        for label, text in zip(labels, texts):
+            self.state["terms"][int(label)].update(terms_of(text))
+            self.state["sizes"][int(label)] += 1
+
+    def _train_cells(self) -> None: # Entraîne les cellules IVF sur un échantillon, puis y range tous les vecteurs existants
+        state = self.state
+        matrix = self._matrix()
+        rng = np.random.default_rng(state["seed"])
+        sample = np.sort(rng.choice(state["rows"], size=min(state["rows"], 256 * state["n_cells"]), replace=False))
+        coarse = MiniBatchKMeans(n_clusters=state["n_cells"], random_state=state["seed"], n_init=1, batch_size=4096).fit(np.asarray(matrix[sample]))
+        centers = coarse.cluster_centers_
+        state["cells"] = (centers / np.linalg.norm(centers, axis=1, keepdims=True).clip(min=1e-9)).astype(np.float32)
+        updates = []
+        for start in range(0, state["rows"], 100_000): # Par blocs : la matrice complète n'est jamais chargée
+            block = np.asarray(matrix[start:start + 100_000])
+            for offset, cell in enumerate(np.argmax(block @ state["cells"].T, axis=1)):
+                updates.append((int(cell), start + offset))
+        self._db.executemany("UPDATE calls SET cell = ? WHERE row = ?", updates)
+
+    def _matrix(self) -> np.ndarray: # Vecteurs en mémoire mappée
+        if self._vectors is None:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.state["rows"], self.state["dim"]))
+        return self._vectors
+
+    def _inverted_lists(self) -> Dict[int, np.ndarray]: # Cellule -> lignes (lues une fois, puis complétées à chaque ajout)
+        if self._lists is None:
+            rows, cells = [], []
+            for row, cell in self._db.execute("SELECT row, cell FROM calls ORDER BY row"):
+                rows.append(row)
+                cells.append(cell)
+            self._lists = self._group_by_cell(np.asarray(rows, dtype=np.int64), np.asarray(cells, dtype=np.int64))
+        return self._lists
+
+    @staticmethod
+    def _group_by_cell(rows: np.ndarray, cells: np.ndarray) -> Dict[int, np.ndarray]: # Cellule -> lignes (ordre croissant conservé)
+        rows, cells = np.asarray(rows, dtype=np.int64), np.asarray(cells, dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        boundaries = np.flatnonzero(np.diff(cells[order])) + 1
+        return {int(cells[group[0]]): rows[group] for group in np.split(order, boundaries) if len(group)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Indexation et requêtes en ligne de commande
+    parser = argparse.ArgumentParser(description="Regroupement des appels et recherche d'appels similaires")
+    parser.add_argument("--index", default="data/processed/clusters", help="Dossier de l'index")
+    parser.add_argument("--clusters", type=int, default=8, help="Nombre de clusters (à la création de l'index)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Indexe des transcriptions (les appels déjà indexés sont ignorés)")
+    add.add_argument("source", help="Dossier ou motif glob des transcriptions")
+    add.add_argument("--batch-size", type=int, default=32, help="Taille des lots d'inférence")
+    similar = commands.add_parser("similar", help="Appels les plus proches d'un texte")
+    similar.add_argument("text", help="Texte de la requête")
+    similar.add_argument("-k", type=int, default=5, help="Nombre de résultats")
+    commands.add_parser("stats", help="Taille de l'index et termes des clusters")
+    args = parser.parse_args(argv)
+
+    clusterer = CallClusterer(args.index, n_clusters=args.clusters)
+    if args.command == "add":
+        paths = sorted(glob.glob(os.path.join(args.source, "**", "*.txt"), recursive=True) if os.path.isdir(args.source) else glob.glob(args.source))
+        for start in range(0, len(paths), 10_000): # Par paquets : mémoire bornée
+            batch = paths[start:start + 10_000]
+            texts = [Path(path).read_text(encoding="utf-8") for path in batch]
+            clusterer.add([Path(path).stem for path in batch], texts, batch_size=args.batch_size)
+            print(f"{min(start + 10_000, len(paths))}/{len(paths)} transcriptions indexées")
+    elif args.command == "similar":
+        for result in clusterer.similar(args.text, k=args.k):
+            print(f"{result['score']:.3f}  {result['call_id']}  (cluster {result['cluster']})")
+    print(clusterer.stats())
+    for cluster in clusterer.clusters():
+        print(f"cluster {cluster['cluster']} ({cluster['size']} appels) : {', '.join(cluster['terms'])}")
+
+
+if __name__ == "__main__":
+    main()
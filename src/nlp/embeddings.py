@@ -0,0 +1,73 @@
+"""
+Module NLP : Embeddings de phrases pour le regroupement et la recherche d'appels similaires
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+from typing import Iterable, List, Optional # Annotations de type
+# ----- Third party libraries -----
+import numpy as np # Vecteurs d'embeddings
+# ----- Local modules -----
+from src.nlp.batching import batched_map, count_tokens # Outils de regroupement en lots
+from src.nlp.cache import ResultCache, cached_batch, loaded_revision # Cache optionnel des résultats
+from src.nlp import metrics # Instrumentation optionnelle (temps, tokens, troncatures)
+from src.nlp.registry import ModelRegistry, ModelSpec, get_registry # Registre partagé des modèles (chargement paresseux)
+
+
+class TextEmbedder: # Classe qui calcule des embeddings de phrases (moyenne des tokens, normalisée)
+
+    def __init__(self, model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", device: int = -1, backend: str = "eager", registry: Optional[ModelRegistry] = None, cache: Optional[ResultCache] = None): # Description du modèle, chargé seulement au premier appel
+
+        self.spec = ModelSpec( # .spec identifie le pipeline dans le registre partagé
+            "feature-extraction", # Type de tâche NLP
+            model, # Modèle d'embeddings multilingue (français compris)
+            device, # -1 = CPU
+            backend # "eager" (fp32), "int8" ou "onnx" (voir src.nlp.backends)
+        )
+        self.registry = registry or get_registry() # Registre partagé par toutes les instances du processus
+        self.cache = cache # .cache est le cache optionnel des résultats (None = pas de cache)
+
+    def revision(self) -> Optional[str]: # Révision des poids du modèle (invalidation du cache), None s'il n'est pas encore chargé
+        return loaded_revision(self.registry, self.spec)
+
+    def embed(self, text: str, max_length: int = 2048) -> np.ndarray: # Embedding d'un texte
+        return self.embed_batch([text], max_length=max_length)[0]
+
+    def embed_batch(self, texts: Iterable[str], max_length: int = 2048, batch_size: int = 32, max_tokens: int = 8192) -> np.ndarray: # Embeddings de plusieurs textes en lots
+        """
+        Calcule les embeddings de plusieurs textes en regroupant les textes de longueurs proches.
+        Args:
+            texts (Iterable[str]): Textes à encoder
+            max_length (int): Longueur maximale de chaque texte (en caractères)
+            batch_size (int): Nombre maximal de textes par lot
+            max_tokens (int): Budget de tokens par lot (padding compris)
+        Returns:
+            np.ndarray: Matrice (n_textes, dimension) en float32, lignes de norme 1 (produit scalaire = cosinus)
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        metrics.observe_truncation(self.spec.cache_id, texts, max_length)
+        truncated = [text[:max_length] for text in texts]
+        outputs = cached_batch(self.cache, self.spec.cache_id, {"max_length": max_length}, truncated,
+                               lambda batch: self._embed_batch(batch, batch_size, max_tokens), self.revision) # Seuls les textes absents du cache passent par le modèle
+        if not outputs:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(outputs, dtype=np.float32)
+
+    def _embed_batch(self, truncated: List[str], batch_size: int, max_tokens: int) -> List[list]: # Inférence en lots
+        import torch # Import local : la moyenne des tokens se fait directement sur les tenseurs du modèle
+
+        with self.registry.use(*self.spec) as extractor: # Le modèle reste chargé pendant tout le traitement
+            tokenizer, model = extractor.tokenizer, extractor.model
+            lengths = count_tokens(tokenizer, truncated, model=self.spec.cache_id) # Longueur en tokens de chaque texte
+
+            def run(batch: List[str]) -> List[list]: # Moyenne des états cachés, pondérée par le masque d'attention
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    inputs = tokenizer(batch, padding=True, truncation=True, return_tensors="pt").to(model.device)
+                    with torch.no_grad():
+                        hidden = model(**inputs).last_hidden_state
+                    mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                    pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                    pooled = torch.nn.functional.normalize(pooled, dim=-1)
+                    return pooled.cpu().numpy().tolist() # Listes : sérialisables par le cache de résultats
+
+            return batched_map(truncated, run, lengths, batch_size=batch_size, max_tokens=max_tokens) # Résultats dans l'ordre
@@ -0,0 +1,157 @@
+"""
+Module NLP : Résumé extractif des dialogues et routage entre résumé extractif et BART
+
+Le résumé extractif garde les tours de parole les plus centraux du dialogue (TextRank sur la
+similarité TF-IDF entre tours, ou centralité TF-IDF simple) : quelques millisecondes sur CPU,
+sans modèle. Le routeur n'envoie à la génération abstractive (BART) que les appels longs ou à
+forte valeur ; chaque résumé indique l'étage qui l'a produit.
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import math # Pondération TF-IDF et normes
+import re # Découpage des tours de parole en mots
+import threading # Compteurs partagés entre threads
+from collections import Counter # Fréquences des termes
+from typing import Callable, List, Optional, Sequence
+# ----- Local modules -----
+from src.nlp.chunking import split_turns, speaker_of # Découpage aux tours de parole
+
+EXTRACTIVE_TIER = "extractive" # Résumé par sélection de tours de parole
+ABSTRACTIVE_TIER = "abstractive" # Résumé généré par BART
+
+WORD = re.compile(r"[a-zàâäçéèêëîïôöûùüÿœ]{3,}") # Mots d'au moins 3 lettres (minuscules)
+SPEAKER_TAG = re.compile(r"^\s*(Client(_\d+)?|Agent)\s*:", re.MULTILINE) # Étiquettes des locuteurs, ignorées dans les termes
+FRENCH_STOP_WORDS = frozenset(( # Mots vides (notebook 5), plus les mots de politesse des dialogues
+    "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en", "et", "eux", "il", "je", "la", "le",
+    "leur", "lui", "ma", "mais", "me", "même", "mes", "moi", "mon", "ne", "nos", "notre", "nous", "on", "ou", "par",
+    "pas", "pour", "qu", "que", "qui", "sa", "se", "ses", "son", "sur", "ta", "te", "tes", "toi", "ton", "tu", "un",
+    "une", "vos", "votre", "vous", "été", "étant", "suis", "es", "est", "sommes", "êtes", "sont", "sera", "serait",
+    "était", "ayant", "ai", "as", "avons", "avez", "ont", "aura", "avait", "ceci", "cela", "cet", "cette", "ici",
+    "ils", "les", "leurs", "quel", "quels", "quelle", "quelles", "sans", "soi", "bonjour", "merci", "oui", "non",
+    "bien", "sûr", "pouvez", "peux", "vais", "fait", "faire", "plus", "tout", "très",
+))
+HIGH_VALUE_TERMS = ("résili", "réclamation", "litige", "avocat", "plainte", "médiateur") # Appels envoyés à BART quelle que soit leur longueur
+
+
+def terms_of(text: str) -> List[str]: # Mots porteurs de sens d'un texte
+    return [word for word in WORD.findall(SPEAKER_TAG.sub(" ", text).lower()) if word not in FRENCH_STOP_WORDS]
+
+
+def rank_turns(turns: Sequence[str], method: str = "textrank", damping: float = 0.85, iterations: int = 30) -> List[float]: # Score de centralité de chaque tour
+    """
+    Score chaque tour de parole selon sa centralité dans le dialogue.
+    Args:
+        turns (Sequence[str]): Tours de parole
+        method (str): "textrank" (PageRank sur le graphe des similarités) ou "tfidf" (somme des similarités)
+        damping (float): Facteur d'amortissement de TextRank
+        iterations (int): Nombre maximal d'itérations de TextRank
+    Returns:
+        List[float]: Un score par tour (plus élevé = plus représentatif)
+    """
+    if method not in ("textrank", "tfidf"):
+        raise ValueError("method doit valoir 'textrank' ou 'tfidf'")
+    n = len(turns)
+    counts = [Counter(terms_of(turn)) for turn in turns]
+    document_frequency = Counter(term for counter in counts for term in counter)
+    vectors = [{term: count * (math.log((1 + n) / (1 + document_frequency[term])) + 1) for term, count in counter.items()} for counter in counts]
+    norms = [math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0 for vector in vectors]
+    similarity = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            small, large = (vectors[i], vectors[j]) if len(vectors[i]) <= len(vectors[j]) else (vectors[j], vectors[i])
+            value = sum(weight * large.get(term, 0.0) for term, weight in small.items()) / (norms[i] * norms[j])
+            similarity[i][j] = similarity[j][i] = value
+    prior = [len(counter) * 1e-6 for counter in counts] # Départage : à score égal, le tour le plus riche en termes
+    if method == "tfidf":
+        return [sum(row) + prior[i] for i, row in enumerate(similarity)]
+    out_weights = [sum(row) or 1.0 for row in similarity]
+    scores = [1.0 / n] * n if n else []
+    for _ in range(iterations):
+        updated = [(1 - damping) / n + damping * sum(similarity[j][i] / out_weights[j] * scores[j] for j in range(n)) for i in range(n)]
+        converged = max(abs(a - b) for a, b in zip(updated, scores)) < 1e-6
+        scores = updated
+        if converged:
+            break
+    return [score + prior[i] for i, score in enumerate(scores)]
+
+
+def extractive_summary(text: str, n_turns: int = 2, method: str = "textrank", keep_request: bool = True, max_chars: Optional[int] = None) -> str: # Résumé extractif d'un dialogue
+    """
+    Résume un dialogue en gardant ses tours de parole les plus centraux, dans l'ordre du dialogue.
+    Args:
+        text (str): Dialogue au format "Client_N: ..." / "Agent: ..."
+        n_turns (int): Nombre de tours gardés
+        method (str): "textrank" ou "tfidf" (voir rank_turns)
+        keep_request (bool): Garde toujours le premier tour du client (la demande)
+        max_chars (int, optional): Longueur maximale du résumé en caractères
+    Returns:
+        str: Tours sélectionnés, séparés par des espaces
+    """
+    turns = split_turns(text)
+    if len(turns) <= n_turns:
+        selected = list(range(len(turns)))
+    else:
+        scores = rank_turns(turns, method=method)
+        selected = []
+        if keep_request:
+            selected = [next((i for i, turn in enumerate(turns) if speaker_of(turn) == "client"), 0)]
+        for i in sorted(range(len(turns)), key=lambda i: (-scores[i], i)):
+            if len(selected) >= n_turns:
+                break
+            if i not in selected:
+                selected.append(i)
+    summary = " ".join(turns[i] for i in sorted(selected))
+    return summary[:max_chars] if max_chars else summary
+
+
+class SummaryRouter: # Politique de routage : résumé extractif (rapide) ou BART (coûteux)
+
+    def __init__(self, max_turns: int = 12, max_chars: int = 1500, high_value_terms: Sequence[str] = HIGH_VALUE_TERMS, is_high_value: Optional[Callable[[str], bool]] = None, n_turns: int = 2, method: str = "textrank"):
+        """
+        Args:
+            max_turns (int): Au-delà de ce nombre de tours de parole, le dialogue va à BART
+            max_chars (int): Au-delà de cette longueur (caractères), le dialogue va à BART
+            high_value_terms (Sequence[str]): Débuts de mots qui envoient l'appel à BART (résiliation, litige...)
+            is_high_value (Callable, optional): Règle métier supplémentaire (texte -> True pour BART)
+            n_turns (int): Nombre de tours gardés par le résumé extractif
+            method (str): Classement des tours du résumé extractif ("textrank" ou "tfidf")
+        """
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.high_value = re.compile("|".join(re.escape(term) for term in high_value_terms), re.IGNORECASE) if high_value_terms else None
+        self.is_high_value = is_high_value
+        self.n_turns = n_turns
+        self.method = method
+        self._lock = threading.Lock()
+        self.counters = {EXTRACTIVE_TIER: 0, ABSTRACTIVE_TIER: 0} # Résumés produits par étage
+        self.seconds = {EXTRACTIVE_TIER: 0.0, ABSTRACTIVE_TIER: 0.0} # Temps cumulé par étage
+
+    def route(self, text: str) -> str: # Étage qui doit résumer ce texte
+        if len(text) > self.max_chars or len(split_turns(text)) > self.max_turns:
+            return ABSTRACTIVE_TIER
+        if self.high_value is not None and self.high_value.search(text):
+            return ABSTRACTIVE_TIER
+        if self.is_high_value is not None and self.is_high_value(text):
+            return ABSTRACTIVE_TIER
+        return EXTRACTIVE_TIER
+
+    def summarize(self, text: str, max_chars: Optional[int] = None) -> str: # Résumé extractif selon les réglages du routeur
+        return extractive_summary(text, n_turns=self.n_turns, method=self.method, max_chars=max_chars)
+
+    def record_tier(self, tier: str, count: int, seconds: float) -> None: # Compte les résumés et le temps par étage
+        with self._lock:
+            self.counters[tier] += count
+            self.seconds[tier] += seconds
+
+    def stats(self) -> dict: # Statistiques d'utilisation du routeur
+        with self._lock:
+            counters = dict(self.counters)
+            seconds = dict(self.seconds)
+        total = sum(counters.values())
+        return {
+            **counters,
+            "extractive_ratio": counters[EXTRACTIVE_TIER] / total if total else 0.0,
+            "extractive_ms_per_text": 1000 * seconds[EXTRACTIVE_TIER] / counters[EXTRACTIVE_TIER] if counters[EXTRACTIVE_TIER] else None,
+            "abstractive_ms_per_text": 1000 * seconds[ABSTRACTIVE_TIER] / counters[ABSTRACTIVE_TIER] if counters[ABSTRACTIVE_TIER] else None,
+        }
@@ -0,0 +1,252 @@
+"""
+Module NLP : Instrumentation des analyseurs (temps par étape, tokens, troncatures, lots, cache)
+
+Désactivée par défaut : chaque point de mesure se réduit alors à un test de booléen, ce qui permet
+de la laisser dans le code en production. Activation par NLP_METRICS=1 (et NLP_TRACING=1 pour les
+spans OpenTelemetry) ou par configure_metrics(). Les mesures sont exposées au format texte Prometheus.
+
+Étapes mesurées, par modèle :
+- "preprocess" : tokenisation du pipeline
+- "forward" : passe avant du modèle ("generate" pour le résumé : génération BART)
+- "postprocess" : décodage / softmax du pipeline
+- "batch" : un lot complet côté analyseur (appel du pipeline + mise en forme des résultats)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Activation par variables d'environnement
+import threading # Verrou des compteurs (analyseurs appelés depuis plusieurs threads)
+import time # Mesure des durées
+from bisect import bisect_left # Recherche du bucket d'un histogramme
+from contextlib import contextmanager, nullcontext # Mesure d'un bloc with (et version vide si désactivée)
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0) # Secondes
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096) # Tokens par texte
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128) # Textes par lot
+
+_NULL = nullcontext() # Contexte vide réutilisé quand l'instrumentation est désactivée
+_END = object() # Fin d'un générateur mesuré
+
+
+class _Histogram: # Histogramme cumulatif au sens Prometheus
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Dernier bucket : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _State: # Mesures du processus
+    def __init__(self):
+        self.enabled = os.getenv("NLP_METRICS", "0") == "1"
+        self.tracer = None # Tracer OpenTelemetry (None = pas de spans)
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], _Histogram] = {}
+        self.gauges: Dict[Tuple[str, Tuple], float] = {}
+
+
+_state = _State()
+_HELP = { # Description et type des séries exposées
+    "nlp_stage_seconds": ("Durée de chaque étape d'inférence", "histogram"),
+    "nlp_input_tokens": ("Tokens par texte avant troncature", "histogram"),
+    "nlp_batch_size": ("Textes par lot envoyé au pipeline", "histogram"),
+    "nlp_truncated_texts_total": ("Textes coupés par max_length (chars) ou par la fenêtre du modèle (tokens)", "counter"),
+    "nlp_texts_total": ("Textes reçus par les analyseurs (hors textes vides)", "counter"),
+    "nlp_cache_lookups_total": ("Recherches dans le cache de résultats", "counter"),
+}
+
+
+def configure_metrics(enabled: bool = True, tracing: bool = False) -> None: # Active ou désactive l'instrumentation
+    """
+    Active (ou désactive) l'instrumentation du processus.
+    Args:
+        enabled (bool): Enregistre les compteurs et histogrammes
+        tracing (bool): Crée aussi un span OpenTelemetry par étape (nécessite opentelemetry-api)
+    """
+    tracer = None
+    if enabled and tracing:
+        try:
+            from opentelemetry import trace # Dépendance optionnelle : spans exportés par le SDK configuré par l'application
+        except ImportError as error:
+            raise ImportError("le traçage nécessite opentelemetry-api (pip install opentelemetry-api)") from error
+        tracer = trace.get_tracer("src.nlp")
+    _state.tracer = tracer
+    _state.enabled = enabled
+
+
+def metrics_enabled() -> bool: # Indique si l'instrumentation est active
+    return _state.enabled
+
+
+def reset_metrics() -> None: # Remet toutes les mesures à zéro
+    with _state.lock:
+        _state.counters.clear()
+        _state.histograms.clear()
+        _state.gauges.clear()
+
+
+def _inc(name: str, labels: Tuple, value: float = 1.0) -> None:
+    key = (name, labels)
+    with _state.lock:
+        _state.counters[key] = _state.counters.get(key, 0.0) + value
+
+
+def _observe(name: str, labels: Tuple, values: Iterable[float], buckets: Tuple[float, ...]) -> None:
+    key = (name, labels)
+    with _state.lock:
+        histogram = _state.histograms.get(key)
+        if histogram is None:
+            histogram = _state.histograms[key] = _Histogram(buckets)
+        for value in values:
+            histogram.observe(value)
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None: # Valeur instantanée (ex: profondeur des files de l'API)
+    if _state.enabled:
+        with _state.lock:
+            _state.gauges[(name, tuple(sorted(labels.items())))] = float(value)
+
+
+@contextmanager
+def _timed(model: str, stage: str) -> Iterator[None]: # Mesure un bloc (et ouvre un span si le traçage est actif)
+    span = _state.tracer.start_as_current_span(f"nlp.{stage}", attributes={"nlp.model": model}) if _state.tracer else _NULL
+    start = time.perf_counter()
+    try:
+        with span:
+            yield
+    finally:
+        _observe("nlp_stage_seconds", (("model", model), ("stage", stage)), (time.perf_counter() - start,), LATENCY_BUCKETS)
+
+
+def stage(model: str, name: str): # Contexte de mesure d'une étape (vide si l'instrumentation est désactivée)
+    """
+    Mesure la durée d'un bloc with dans nlp_stage_seconds{model, stage}.
+    Args:
+        model (str): Identifiant du modèle (ModelSpec.cache_id)
+        name (str): Nom de l'étape
+    """
+    return _timed(model, name) if _state.enabled else _NULL
+
+
+def batch(model: str, size: int): # Contexte de mesure d'un lot : taille et durée
+    if not _state.enabled:
+        return _NULL
+    _observe("nlp_batch_size", (("model", model),), (size,), BATCH_BUCKETS)
+    return _timed(model, "batch")
+
+
+def observe_tokens(model: str, lengths: Sequence[int], limit: Optional[int]) -> None: # Tokens par texte et troncatures par la fenêtre du modèle
+    if not _state.enabled:
+        return
+    _observe("nlp_input_tokens", (("model", model),), lengths, TOKEN_BUCKETS)
+    if limit:
+        truncated = sum(length > limit for length in lengths)
+        if truncated:
+            _inc("nlp_truncated_texts_total", (("model", model), ("kind", "tokens")), truncated)
+
+
+def observe_truncation(model: str, texts: Iterable[str], max_length: int) -> None: # Textes coupés par le max_length (en caractères) des analyseurs
+    if not _state.enabled:
+        return
+    lengths = [len(text) for text in texts]
+    _inc("nlp_texts_total", (("model", model),), len(lengths))
+    truncated = sum(length > max_length for length in lengths)
+    if truncated:
+        _inc("nlp_truncated_texts_total", (("model", model), ("kind", "chars")), truncated)
+
+
+def observe_cache(model: str, hits: int, misses: int) -> None: # Succès et échecs du cache de résultats
+    if not _state.enabled:
+        return
+    if hits:
+        _inc("nlp_cache_lookups_total", (("model", model), ("result", "hit")), hits)
+    if misses:
+        _inc("nlp_cache_lookups_total", (("model", model), ("result", "miss")), misses)
+
+
+def instrument_pipeline(pipe, model: str): # Mesure les étapes internes d'un pipeline transformers
+    """
+    Enveloppe preprocess, _forward et postprocess du pipeline (attributs d'instance) : les trois étapes
+    sont mesurées dès que l'instrumentation est active, même si elle a été activée après le chargement.
+    Args:
+        pipe: Pipeline Hugging Face
+        model (str): Identifiant du modèle (ModelSpec.cache_id)
+    Returns:
+        Le même pipeline
+    """
+    forward = "generate" if getattr(pipe, "task", "") in ("summarization", "text2text-generation") else "forward"
+    for attribute, name in (("preprocess", "preprocess"), ("_forward", forward), ("postprocess", "postprocess")):
+        method = getattr(pipe, attribute, None)
+        if method is not None and not getattr(method, "_nlp_instrumented", False):
+            wrapper = _wrap(method, model, name)
+            wrapper._nlp_instrumented = True
+            setattr(pipe, attribute, wrapper)
+    return pipe
+
+
+def _wrap(method, model: str, name: str):
+    def wrapper(*args, **kwargs):
+        if not _state.enabled: # Chemin rapide : un seul test
+            return method(*args, **kwargs)
+        with _timed(model, name):
+            result = method(*args, **kwargs)
+        if hasattr(result, "__next__"): # preprocess des pipelines par morceaux (zero-shot) : générateur, mesuré pendant l'itération
+            return _timed_iter(result, model, name)
+        return result
+    return wrapper
+
+
+def _timed_iter(iterator, model: str, name: str): # Mesure chaque élément produit par un générateur
+    while True:
+        with _timed(model, name):
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+def _escape(value) -> str: # Échappement des valeurs de labels
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Tuple, extra: Tuple = ()) -> str: # {model="...",stage="..."}
+    items = [f'{key}="{_escape(value)}"' for key, value in labels + extra]
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def render_prometheus() -> str: # Format texte d'exposition Prometheus
+    """Retourne toutes les mesures au format texte Prometheus (route /metrics de l'API)."""
+    with _state.lock:
+        counters = dict(_state.counters)
+        gauges = dict(_state.gauges)
+        histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in _state.histograms.items()}
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in gauges} | {name for name, _ in histograms})
+    for name in names:
+        description, kind = _HELP.get(name, (name, "gauge"))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (series, labels), value in sorted({**counters, **gauges}.items()):
+            if series == name:
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (series, labels), (buckets, counts, total, count) in sorted(histograms.items(), key=lambda item: item[0]):
+            if series != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, (('le', bound if bound == '+Inf' else f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:g}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+if _state.enabled and os.getenv("NLP_TRACING", "0") == "1": # Traçage demandé par l'environnement
+    configure_metrics(True, tracing=True)
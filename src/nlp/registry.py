@@ -0,0 +1,197 @@
+"""
+Module NLP : Registre partagé des modèles (chargement paresseux, partage entre instances, éviction LRU)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Lecture de la variable d'environnement pour le plafond mémoire
+import threading # Verrous pour un accès concurrent sûr au registre
+import time # Horodatage des chargements et utilisations
+from collections import OrderedDict # Dictionnaire ordonné, sert de file LRU
+from contextlib import contextmanager # Gestionnaire de contexte pour marquer un modèle "en cours d'utilisation"
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+# ----- Local modules -----
+from src.nlp.backends import build_pipeline # Construction du pipeline selon le backend (eager, int8, onnx)
+from src.nlp.metrics import instrument_pipeline # Mesure des étapes du pipeline (active seulement si l'instrumentation l'est)
+
+
+class ModelSpec(NamedTuple): # Clé d'un modèle dans le registre
+    task: str # Type de tâche NLP (ex: "sentiment-analysis")
+    model: str # Identifiant du modèle pré-entraîné
+    device: int = -1 # -1 = CPU, sinon index du GPU
+    backend: str = "eager" # Backend d'inférence (voir src.nlp.backends)
+
+    @property
+    def cache_id(self) -> str: # Identifiant pour le cache de résultats : le backend peut changer les sorties
+        return self.model if self.backend == "eager" else f"{self.model}@{self.backend}"
+
+
+class _Entry: # Modèle chargé et ses métadonnées
+    def __init__(self, pipe, size_bytes: int, load_seconds: float):
+        self.pipe = pipe # Pipeline Hugging Face
+        self.size_bytes = size_bytes # Taille estimée des poids en mémoire
+        self.load_seconds = load_seconds # Durée du chargement
+        self.in_use = 0 # Nombre d'appels en cours sur ce modèle
+        self.last_used = time.monotonic() # Dernière utilisation
+
+
+def _model_size_bytes(pipe) -> int: # Estime la mémoire occupée par les poids d'un pipeline
+    model = getattr(pipe, "model", None)
+    if model is None or not hasattr(model, "parameters"): # Pipeline sans modèle PyTorch
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers()) # Poids + buffers (embeddings de position, etc.)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelRegistry: # Classe qui charge les pipelines à la demande et les partage entre analyseurs
+
+    def __init__(self, max_memory_mb: Optional[float] = None): # __init__() ne charge aucun modèle
+        """
+        Args:
+            max_memory_mb (float, optional): Plafond mémoire des modèles chargés ; au-delà,
+                les modèles inactifs les moins récemment utilisés sont déchargés
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None # None = pas de plafond
+        self._entries: "OrderedDict[ModelSpec, _Entry]" = OrderedDict() # Modèles chargés, du moins au plus récemment utilisé
+        self._lock = threading.RLock() # Protège _entries
+        self._load_locks: Dict[ModelSpec, threading.Lock] = {} # Un verrou par modèle : deux threads ne chargent pas le même modèle
+
+    def get(self, task: str, model: str, device: int = -1, backend: str = "eager"): # Retourne le pipeline, en le chargeant au premier appel
+        """
+        Retourne le pipeline partagé pour (task, model, device, backend), chargé au premier appel.
+        Args:
+            task (str): Type de tâche NLP
+            model (str): Identifiant du modèle pré-entraîné
+            device (int): -1 pour le CPU, sinon index du GPU
+            backend (str): Backend d'inférence ("eager", "int8" ou "onnx")
+        Returns:
+            Pipeline Hugging Face partagé
+        """
+        spec = ModelSpec(task, model, device, backend)
+        entry = self._entry(spec)
+        entry.last_used = time.monotonic()
+        return entry.pipe
+
+    @contextmanager
+    def use(self, task: str, model: str, device: int = -1, backend: str = "eager") -> Iterator: # Marque le modèle comme utilisé pendant le bloc with
+        """Comme get(), mais le modèle ne peut pas être déchargé tant que le bloc with est en cours."""
+        spec = ModelSpec(task, model, device, backend)
+        while True: # Le chargement se fait hors du verrou global ; on recommence si le modèle a été déchargé entre-temps
+            entry = self._entry(spec)
+            with self._lock:
+                if self._entries.get(spec) is entry:
+                    entry.in_use += 1 # Protège le modèle contre l'éviction
+                    break
+        try:
+            yield entry.pipe
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def preload(self, specs: Iterable) -> None: # Charge à l'avance une sélection de modèles
+        """
+        Charge à l'avance les modèles indiqués (ex: au démarrage d'un worker).
+        Args:
+            specs (Iterable): ModelSpec ou tuples (task, model[, device[, backend]])
+        """
+        for spec in specs:
+            self._entry(ModelSpec(*spec))
+
+    def peek(self, task: str, model: str, device: int = -1, backend: str = "eager"): # Pipeline déjà chargé, sans chargement (None sinon)
+        with self._lock:
+            entry = self._entries.get(ModelSpec(task, model, device, backend))
+            return entry.pipe if entry is not None else None
+
+    def is_loaded(self, task: str, model: str, device: int = -1, backend: str = "eager") -> bool: # Indique si le modèle est déjà en mémoire
+        with self._lock:
+            return ModelSpec(task, model, device, backend) in self._entries
+
+    def loaded(self) -> List[dict]: # État des modèles chargés (pour les endpoints de santé)
+        with self._lock:
+            return [
+                {
+                    "task": spec.task,
+                    "model": spec.model,
+                    "device": spec.device,
+                    "backend": spec.backend,
+                    "size_mb": round(entry.size_bytes / (1024 * 1024), 1),
+                    "load_seconds": round(entry.load_seconds, 2),
+                    "in_use": entry.in_use,
+                }
+                for spec, entry in self._entries.items()
+            ]
+
+    def memory_bytes(self) -> int: # Mémoire totale estimée des modèles chargés
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def evict(self, task: str, model: str, device: int = -1, backend: str = "eager") -> bool: # Décharge un modèle précis
+        with self._lock:
+            return self._entries.pop(ModelSpec(task, model, device, backend), None) is not None
+
+    def clear(self) -> None: # Décharge tous les modèles
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, spec: ModelSpec) -> _Entry: # Retourne l'entrée du registre, en chargeant le modèle si besoin
+        with self._lock:
+            entry = self._entries.get(spec)
+            if entry is not None: # Déjà chargé : on le place en fin de file LRU
+                self._entries.move_to_end(spec)
+                return entry
+            load_lock = self._load_locks.setdefault(spec, threading.Lock())
+        with load_lock: # Chargement hors du verrou global : les autres modèles restent accessibles
+            with self._lock:
+                entry = self._entries.get(spec)
+                if entry is not None: # Chargé entre-temps par un autre thread
+                    return entry
+            start = time.perf_counter()
+            pipe = self._load(spec)
+            entry = _Entry(pipe, _model_size_bytes(pipe), time.perf_counter() - start)
+            with self._lock:
+                self._entries[spec] = entry
+                self._evict_idle(keep=spec)
+            return entry
+
+    def _load(self, spec: ModelSpec): # Construit le pipeline Hugging Face
+        pipe = build_pipeline(spec.task, spec.model, device=spec.device, backend=spec.backend)
+        return instrument_pipeline(pipe, spec.cache_id)
+
+    def _evict_idle(self, keep: ModelSpec) -> None: # Décharge les modèles inactifs les plus anciens au-delà du plafond
+        if self.max_memory_bytes is None:
+            return
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        for spec in list(self._entries): # Du moins au plus récemment utilisé
+            if total <= self.max_memory_bytes:
+                break
+            entry = self._entries[spec]
+            if spec == keep or entry.in_use: # On ne décharge ni le modèle demandé ni un modèle en cours d'utilisation
+                continue
+            del self._entries[spec]
+            total -= entry.size_bytes
+
+
+_default_registry: Optional[ModelRegistry] = None # Registre partagé par tout le processus
+_default_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry: # Retourne le registre partagé du processus
+    """
+    Retourne le registre partagé du processus (créé au premier appel).
+    Le plafond mémoire peut être fixé par la variable d'environnement NLP_MAX_MEMORY_MB.
+    """
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            max_memory_mb = os.getenv("NLP_MAX_MEMORY_MB") # Plafond optionnel, en Mo
+            _default_registry = ModelRegistry(float(max_memory_mb) if max_memory_mb else None)
+        return _default_registry
+
+
+def configure_registry(max_memory_mb: Optional[float] = None) -> ModelRegistry: # Remplace le registre partagé
+    """Crée un nouveau registre partagé avec le plafond mémoire indiqué (les modèles déjà chargés sont libérés)."""
+    global _default_registry
+    with _default_lock:
+        _default_registry = ModelRegistry(max_memory_mb)
+        return _default_registry
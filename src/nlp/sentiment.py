@@ -4,17 +4,50 @@ Module NLP : Analyse de sentiment pour dialogues téléphoniques
 
 # ----- Import libraries PEP 8 -----
 # ----- Standard library -----
-from transformers import pipeline # Librairie pour le traitement du langage naturel (NLP)
+from typing import Iterable, List, Optional # Annotations de type
+# ----- Local modules -----
+from src.nlp.batching import as_list, batched_map, count_tokens, first # Outils de regroupement en lots
+from src.nlp.chunking import chunk_dialogue, token_budget # Découpage des longs dialogues aux tours de parole
+from src.nlp.cache import ResultCache, cached_batch, loaded_revision # Cache optionnel des résultats
+from src.nlp import metrics # Instrumentation optionnelle (temps, tokens, troncatures)
+from src.nlp.registry import ModelRegistry, ModelSpec, get_registry # Registre partagé des modèles (chargement paresseux)
+
+
+def sentiment_value(result: dict) -> float: # Convertit un résultat de sentiment en valeur numérique entre -1 et 1
+    """
+    Convertit un résultat {label, score} en valeur entre -1 (très négatif) et 1 (très positif).
+    Le modèle nlptown retourne des étoiles ("1 star" à "5 stars") ; les labels POSITIVE / NEGATIVE
+    sont pondérés par leur score ; NEUTRAL (texte vide) vaut 0.
+    """
+    label = str(result.get("label", "")).lower()
+    if "star" in label: # "1 star" ... "5 stars" : 3 étoiles = neutre
+        return (int(label.split()[0]) - 3) / 2
+    if label.startswith("pos"):
+        return float(result.get("score", 0.0))
+    if label.startswith("neg"):
+        return -float(result.get("score", 0.0))
+    return 0.0
 
 
 class SentimentAnalyzer: # Classe pour l'analyse de sentiment, utilise un modèle pré-entraîné
 
-    def __init__(self): # Initialisation du modèle
+    def __init__(self, model: str = "nlptown/bert-base-multilingual-uncased-sentiment", device: int = -1, backend: str = "eager", registry: Optional[ModelRegistry] = None, cache: Optional[ResultCache] = None): # Description du modèle, chargé seulement au premier appel
         
-        self.analyzer = pipeline( # .analyzer est un pipeline d'analyse de sentiment
+        self.spec = ModelSpec( # .spec identifie le pipeline dans le registre partagé
             "sentiment-analysis", # Type de tâche NLP
-            model="nlptown/bert-base-multilingual-uncased-sentiment" # Modèle pré-entraîné (BERT multilingue)
+            model, # Modèle pré-entraîné (BERT multilingue par défaut)
+            device, # -1 = CPU
+            backend # "eager" (fp32), "int8" ou "onnx" (voir src.nlp.backends)
         )
+        self.registry = registry or get_registry() # Registre partagé : une deuxième instance ne recharge pas le modèle
+        self.cache = cache # .cache est le cache optionnel des résultats (None = pas de cache)
+
+    @property
+    def analyzer(self): # .analyzer est le pipeline d'analyse de sentiment partagé (chargé au premier accès)
+        return self.registry.get(*self.spec)
+
+    def revision(self) -> Optional[str]: # Révision des poids du modèle (invalidation du cache), None s'il n'est pas encore chargé
+        return loaded_revision(self.registry, self.spec)
 
     def analyze(self, text: str, max_length: int = 512) -> dict: # Méthode pour analyser le sentiment d'un texte
         """
@@ -28,7 +61,107 @@ class SentimentAnalyzer: # Classe pour l'analyse de sentiment, utilise un modèl
         # Condition pour gérer le texte vide
         if not text: # Si le texte est vide
             return {"label": "NEUTRAL", "score": 0.0} # Retourne "NEUTRAL" avec score 0
-        result = self.analyzer(text[:max_length]) # .analyzer applique le modèle au texte tronqué, :max_length limite la taille
+        if self.cache is not None: # Avec cache : même chemin que le traitement en lots
+            return self.analyze_batch([text], max_length=max_length)[0]
+        metrics.observe_truncation(self.spec.cache_id, (text,), max_length)
+        with self.registry.use(*self.spec) as analyzer: # Le modèle ne peut pas être déchargé pendant l'appel
+            result = analyzer(text[:max_length]) # analyzer applique le modèle au texte tronqué, :max_length limite la taille
         if isinstance(result, list): # Si le résultat est une liste
             result = result[0] # Prend le premier élément de la liste
         return {"label": result["label"], "score": float(result["score"])} # Retourne le label et le score du sentiment
+
+    def analyze_batch(self, texts: Iterable[str], max_length: int = 512, batch_size: int = 32, max_tokens: int = 8192) -> List[dict]: # Méthode pour analyser plusieurs textes en lots
+        """
+        Analyse le sentiment de plusieurs textes en regroupant les textes de longueurs proches.
+        Args:
+            texts (Iterable[str]): Textes à analyser
+            max_length (int): Longueur maximale de chaque texte
+            batch_size (int): Nombre maximal de textes par lot
+            max_tokens (int): Budget de tokens par lot (padding compris)
+        Returns:
+            List[dict]: Un résultat (label et score) par texte, dans l'ordre d'entrée
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = [{"label": "NEUTRAL", "score": 0.0} for _ in texts] # Valeur par défaut (texte vide)
+        todo = [i for i, text in enumerate(texts) if text] # Indices des textes non vides
+        if not todo: # Rien à envoyer au modèle
+            return results
+        metrics.observe_truncation(self.spec.cache_id, (texts[i] for i in todo), max_length)
+        truncated = [texts[i][:max_length] for i in todo] # Même troncature que analyze()
+        outputs = cached_batch(self.cache, self.spec.cache_id, {"max_length": max_length}, truncated,
+                               lambda batch: self._analyze_batch(batch, batch_size, max_tokens), self.revision) # Seuls les textes absents du cache passent par le modèle
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def analyze_long(self, text: str, max_tokens: Optional[int] = None, overlap_turns: int = 0) -> dict: # Sentiment d'un long dialogue complet
+        """
+        Analyse le sentiment d'un long dialogue sans le tronquer : il est découpé aux tours de parole
+        en morceaux qui tiennent dans la fenêtre du modèle, puis les scores sont moyennés (pondérés par les tokens).
+        Args:
+            text (str): Dialogue complet
+            max_tokens (int, optional): Budget de tokens par morceau (par défaut : fenêtre du modèle)
+            overlap_turns (int): Nombre de tours répétés entre deux morceaux consécutifs
+        Returns:
+            dict: Label, score, scores de tous les labels et nombre de morceaux
+        """
+        return self.analyze_long_batch([text], max_tokens=max_tokens, overlap_turns=overlap_turns)[0]
+
+    def analyze_long_batch(self, texts: Iterable[str], max_tokens: Optional[int] = None, overlap_turns: int = 0, batch_size: int = 32, batch_tokens: int = 8192) -> List[dict]: # Plusieurs longs dialogues
+        """
+        Comme analyze_long(), pour plusieurs dialogues : tous les morceaux de tous les textes passent dans les mêmes lots.
+        Returns:
+            List[dict]: Un résultat par texte, dans l'ordre d'entrée
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = [{"label": "NEUTRAL", "score": 0.0, "scores": {}, "chunks": 0} for _ in texts] # Valeur par défaut (texte vide)
+        todo = [i for i, text in enumerate(texts) if text] # Indices des textes non vides
+        if not todo: # Rien à envoyer au modèle
+            return results
+        params = {"mode": "long", "max_tokens": max_tokens, "overlap_turns": overlap_turns}
+        outputs = cached_batch(self.cache, self.spec.cache_id, params, [texts[i] for i in todo],
+                               lambda batch: self._analyze_long(batch, max_tokens, overlap_turns, batch_size, batch_tokens), self.revision)
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def _analyze_long(self, texts: List[str], max_tokens: Optional[int], overlap_turns: int, batch_size: int, batch_tokens: int) -> List[dict]: # Découpe, inférence groupée, moyenne pondérée
+        with self.registry.use(*self.spec) as analyzer: # Le modèle reste chargé pendant tout le traitement
+            budget = max_tokens or token_budget(analyzer.tokenizer) # Fenêtre du modèle moins [CLS] et [SEP]
+            owners, chunks = [], [] # Texte d'origine de chaque morceau
+            for owner, text in enumerate(texts):
+                for chunk in chunk_dialogue(text, analyzer.tokenizer, budget, overlap_turns):
+                    owners.append(owner)
+                    chunks.append(chunk)
+
+            def run(batch: List[str]) -> List[list]: # Scores de tous les labels pour chaque morceau
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    return as_list(analyzer(batch, top_k=None, truncation=True, batch_size=len(batch)))
+
+            lengths = [chunk.n_tokens + 2 for chunk in chunks] # Tokens spéciaux inclus
+            chunk_scores = batched_map([chunk.text for chunk in chunks], run, lengths, batch_size=batch_size, max_tokens=batch_tokens)
+        totals = [{} for _ in texts]
+        weights = [0.0] * len(texts)
+        counts = [0] * len(texts)
+        for owner, chunk, scores in zip(owners, chunks, chunk_scores):
+            counts[owner] += 1
+            weights[owner] += chunk.n_tokens
+            for item in as_list(scores): # Moyenne pondérée par la taille du morceau
+                totals[owner][item["label"]] = totals[owner].get(item["label"], 0.0) + float(item["score"]) * chunk.n_tokens
+        outputs = []
+        for owner in range(len(texts)):
+            scores = {label: total / weights[owner] for label, total in totals[owner].items()} if weights[owner] else {}
+            label = max(scores, key=scores.get) if scores else "NEUTRAL"
+            outputs.append({"label": label, "score": scores.get(label, 0.0), "scores": scores, "chunks": counts[owner]})
+        return outputs
+
+    def _analyze_batch(self, truncated: List[str], batch_size: int, max_tokens: int) -> List[dict]: # Inférence en lots
+        with self.registry.use(*self.spec) as analyzer: # Le modèle reste chargé pendant tout le traitement
+            lengths = count_tokens(analyzer.tokenizer, truncated, model=self.spec.cache_id) # Longueur en tokens de chaque texte
+
+            def run(batch: List[str]) -> List[dict]: # Appel du pipeline sur un lot
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    outputs = as_list(analyzer(batch, batch_size=len(batch)))
+                    return [{"label": first(out)["label"], "score": float(first(out)["score"])} for out in outputs]
+
+            return batched_map(truncated, run, lengths, batch_size=batch_size, max_tokens=max_tokens) # Résultats dans l'ordre
@@ -0,0 +1,235 @@
+"""
+Module NLP : Analyse incrémentale des appels en direct (tour par tour)
+
+Chaque nouveau tour de parole ("Client_N: ..." / "Agent: ...") est analysé seul : le coût par tour
+reste constant quelle que soit la longueur de l'appel. Les tours qui arrivent en même temps sur
+plusieurs appels sont regroupés en lots par un LiveAnalysisHub partagé.
+
+Usage :
+    hub = LiveAnalysisHub()
+    await hub.start()
+    session = hub.session("CALL_0001")
+    session.on_event(lambda event: print(event))
+    await session.add_turn("Client_1: Bonjour, j'ai une question sur ma facture.")
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import asyncio # Files d'attente et verrous asynchrones
+import time # Dernière activité des sessions (fermeture des appels abandonnés)
+from collections import deque # Fenêtre glissante des sentiments
+from typing import AsyncIterator, Callable, Dict, List, Optional
+# ----- Local modules -----
+from src.nlp.batching import MicroBatcher # Regroupement des tours de plusieurs appels
+from src.nlp.chunking import SPEAKER_LINE, speaker_of # Étiquettes de locuteur des transcriptions
+from src.nlp.classifier import DialogueClassifier # Scores zero-shot de chaque tour
+from src.nlp.sentiment import SentimentAnalyzer, sentiment_value # Sentiment de chaque tour
+
+
+class LiveAnalysisHub: # Modèles et files de micro-batching partagés par toutes les sessions
+
+    def __init__(
+        self,
+        classifier: Optional[DialogueClassifier] = None,
+        sentiment: Optional[SentimentAnalyzer] = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 20.0,
+        max_queue: int = 1024,
+        idle_timeout: float = 600.0,
+    ):
+        """
+        Args:
+            classifier (DialogueClassifier, optional): Classifieur (un nouveau par défaut, modèle partagé via le registre)
+            sentiment (SentimentAnalyzer, optional): Analyseur de sentiment
+            max_batch_size (int): Nombre maximal de tours par lot
+            max_wait_ms (float): Attente maximale pour regrouper des tours proches dans le temps
+            max_queue (int): Nombre maximal de tours en attente par modèle
+            idle_timeout (float): Secondes sans nouveau tour après lesquelles une session est fermée (client déconnecté)
+        """
+        self.classifier = classifier or DialogueClassifier()
+        self.sentiment = sentiment or SentimentAnalyzer()
+        self.sentiment_batcher = MicroBatcher(
+            lambda texts: self.sentiment.analyze_batch(texts, batch_size=max_batch_size),
+            max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, max_queue=max_queue, name="live-sentiment",
+        )
+        self.topic_batcher = MicroBatcher(
+            lambda texts: self.classifier.score_batch(texts, batch_size=max_batch_size),
+            max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, max_queue=max_queue, name="live-topic",
+        )
+        self.sessions: Dict[str, "LiveCallSession"] = {} # Appels en cours
+        self.idle_timeout = idle_timeout
+        self._last_sweep = time.monotonic()
+
+    async def start(self) -> None: # Lance les files d'attente
+        await self.sentiment_batcher.start()
+        await self.topic_batcher.start()
+
+    async def stop(self) -> None: # Arrête les files d'attente
+        await self.sentiment_batcher.stop()
+        await self.topic_batcher.stop()
+
+    def session(self, call_id: str, **kwargs) -> "LiveCallSession": # Ouvre (ou retrouve) la session d'un appel
+        if call_id not in self.sessions:
+            if time.monotonic() - self._last_sweep >= self.idle_timeout / 10: # Nettoyage à l'ouverture des appels, au plus 10 fois par délai
+                self.sweep()
+            self.sessions[call_id] = LiveCallSession(self, call_id, **kwargs)
+        return self.sessions[call_id]
+
+    def close(self, call_id: str) -> Optional["LiveCallSession"]: # Fin d'appel : libère la session
+        session = self.sessions.get(call_id)
+        if session is not None:
+            session.close() # La session se retire elle-même du hub
+        return session
+
+    def sweep(self) -> List[str]: # Ferme les sessions sans activité depuis idle_timeout (appels abandonnés)
+        self._last_sweep = now = time.monotonic()
+        idle = [call_id for call_id, session in self.sessions.items() if now - session.last_activity >= self.idle_timeout]
+        for call_id in idle:
+            self.close(call_id)
+        return idle
+
+    async def score_turn(self, text: str) -> tuple: # Sentiment et scores de thème d'un tour, en parallèle
+        return await asyncio.gather(self.sentiment_batcher.submit(text), self.topic_batcher.submit(text))
+
+
+class LiveCallSession: # État incrémental d'un appel en cours
+
+    def __init__(
+        self,
+        hub: LiveAnalysisHub,
+        call_id: str,
+        window: int = 5,
+        drop_threshold: float = 1.0,
+        alert_level: float = -0.5,
+        topic_decay: float = 0.7,
+        min_topic_turns: int = 2,
+        max_history: int = 1000,
+        max_events: int = 256,
+    ):
+        """
+        Args:
+            hub (LiveAnalysisHub): Modèles et files partagés
+            call_id (str): Identifiant de l'appel
+            window (int): Nombre de tours de la moyenne glissante du sentiment (par locuteur)
+            drop_threshold (float): Baisse (sur une échelle de -1 à 1) entre la moyenne glissante et le nouveau tour qui déclenche "sentiment_drop"
+            alert_level (float): Seuil de moyenne glissante du client sous lequel "negative_sentiment" est émis
+            topic_decay (float): Poids de l'estimation précédente du thème (0 = dernier tour seul, 1 = premier tour seul)
+            min_topic_turns (int): Nombre de tours avant de signaler un changement de thème
+            max_history (int): Nombre maximal de points gardés dans chaque trajectoire
+            max_events (int): Événements gardés pour events() ; au-delà, les plus anciens sont abandonnés
+                (session dont personne ne lit les événements : la mémoire reste bornée)
+        """
+        self.hub = hub
+        self.call_id = call_id
+        self.drop_threshold = drop_threshold
+        self.alert_level = alert_level
+        self.topic_decay = topic_decay
+        self.min_topic_turns = min_topic_turns
+        self.turns = 0 # Nombre de tours reçus
+        self.trajectory: Dict[str, deque] = {"client": deque(maxlen=max_history), "agent": deque(maxlen=max_history)} # Sentiment de chaque tour, par locuteur
+        self.rolling: Dict[str, deque] = {"client": deque(maxlen=window), "agent": deque(maxlen=window)} # Fenêtre glissante par locuteur
+        self.topic_scores: Dict[str, float] = {} # Estimation lissée des scores de thème
+        self.topic: Optional[str] = None # Thème le plus probable à ce stade
+        self._alerting = False # Le client est-il déjà sous alert_level (évite de répéter l'alerte)
+        self._callbacks: List[Callable[[dict], None]] = []
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=max_events)
+        self.dropped_events = 0 # Événements abandonnés faute de lecteur
+        self._lock = asyncio.Lock() # Les tours d'un même appel sont traités dans l'ordre
+        self.closed = False
+        self.last_activity = time.monotonic() # Dernier tour reçu (LiveAnalysisHub.sweep)
+
+    def on_event(self, callback: Callable[[dict], None]) -> None: # Abonne une fonction aux événements
+        self._callbacks.append(callback)
+
+    async def events(self) -> AsyncIterator[dict]: # Itérateur asynchrone des événements (jusqu'à close())
+        while True:
+            event = await self._events.get()
+            if event is None: # Session fermée
+                return
+            yield event
+
+    def close(self) -> None: # Termine l'itérateur d'événements et retire la session du hub
+        if not self.closed:
+            self.closed = True
+            self._put(None)
+        sessions = getattr(self.hub, "sessions", None)
+        if sessions is not None and sessions.get(self.call_id) is self:
+            del sessions[self.call_id]
+
+    def rolling_sentiment(self, speaker: str = "client") -> float: # Moyenne glissante du sentiment d'un locuteur
+        values = self.rolling.get(speaker)
+        return sum(values) / len(values) if values else 0.0
+
+    async def add_turn(self, line: str) -> List[dict]: # Analyse un nouveau tour de parole
+        """
+        Analyse un nouveau tour de parole et met à jour l'état de l'appel.
+        Args:
+            line (str): Ligne de transcription ("Client_N: ..." ou "Agent: ...")
+        Returns:
+            List[dict]: Événements déclenchés par ce tour (aussi envoyés aux callbacks et à events()) ;
+                aucun après close() (tour arrivé après la fin de l'appel)
+        """
+        speaker = speaker_of(line) or "client" # Ligne sans étiquette : attribuée au client
+        content = SPEAKER_LINE.sub("", line, count=1).strip() # Seul le contenu du tour est analysé
+        if not content or self.closed:
+            return []
+        self.last_activity = time.monotonic()
+        async with self._lock: # Les tours d'un appel sont appliqués dans leur ordre d'arrivée
+            sentiment, scores = await self.hub.score_turn(content) # Coût constant : seul le nouveau tour est envoyé au modèle
+            if self.closed: # Appel fermé pendant l'analyse : le tour n'est pas appliqué
+                return []
+            self.turns += 1
+            events = self._update(speaker, sentiment_value(sentiment), scores)
+        for event in events:
+            self._emit(event)
+        return events
+
+    def _update(self, speaker: str, value: float, scores: dict) -> List[dict]: # Met à jour trajectoires et thème
+        events = []
+        previous = self.rolling_sentiment(speaker) if self.rolling[speaker] else None
+        self.trajectory[speaker].append(value)
+        self.rolling[speaker].append(value)
+        if previous is not None and previous - value >= self.drop_threshold: # Chute nette par rapport aux tours précédents
+            events.append(self._event("sentiment_drop", speaker=speaker, value=value, previous=previous))
+        if speaker == "client":
+            rolling = self.rolling_sentiment("client")
+            if rolling <= self.alert_level and not self._alerting: # Passage sous le seuil d'alerte
+                events.append(self._event("negative_sentiment", speaker=speaker, value=rolling))
+            self._alerting = rolling <= self.alert_level
+
+        for label, score in scores.items(): # Lissage exponentiel : l'historique n'est jamais réanalysé
+            self.topic_scores[label] = self.topic_decay * self.topic_scores.get(label, score) + (1 - self.topic_decay) * score
+        if self.topic_scores:
+            topic = max(self.topic_scores, key=self.topic_scores.get)
+            if topic != self.topic:
+                if self.topic is not None and self.turns >= self.min_topic_turns:
+                    events.append(self._event("topic_change", topic=topic, previous=self.topic, score=self.topic_scores[topic]))
+                self.topic = topic
+        return events
+
+    def _event(self, kind: str, **fields) -> dict:
+        return {"type": kind, "call_id": self.call_id, "turn": self.turns, **fields}
+
+    def _emit(self, event: dict) -> None: # Envoie un événement aux callbacks et à l'itérateur
+        for callback in self._callbacks:
+            callback(event)
+        if not self.closed:
+            self._put(event)
+
+    def _put(self, item: Optional[dict]) -> None: # File pleine : l'événement le plus ancien laisse la place au plus récent
+        if self._events.full():
+            self._events.get_nowait()
+            self.dropped_events += 1
+        self._events.put_nowait(item)
+
+    def snapshot(self) -> dict: # État courant de l'appel (tableau de bord superviseur)
+        return {
+            "call_id": self.call_id,
+            "turns": self.turns,
+            "topic": self.topic,
+            "topic_scores": dict(self.topic_scores),
+            "client_sentiment": self.rolling_sentiment("client"),
+            "agent_sentiment": self.rolling_sentiment("agent"),
+            "dropped_events": self.dropped_events,
+            "trajectory": {speaker: list(values) for speaker, values in self.trajectory.items()},
+        }
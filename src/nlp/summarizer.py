@@ -1,24 +1,226 @@
 """
 Module NLP : Résumé automatique des dialogues téléphoniques
+
+Avec un routeur (src.nlp.extractive.SummaryRouter), les dialogues courts ou répétitifs reçoivent un
+résumé extractif (quelques millisecondes) et seuls les appels longs ou à forte valeur passent par BART.
 """
 
 # ----- Import libraries PEP 8 -----
 # ----- Standard library -----
-from transformers import pipeline # Librairie pour le traitement du langage naturel (NLP)
+import time # Temps passé dans chaque étage du routeur
+from collections import defaultdict # Regroupement des résumés de morceaux par dialogue
+from typing import Iterable, List, Optional, Union # Annotations de type
+# ----- Local modules -----
+from src.nlp.batching import as_list, batched_map, count_tokens # Outils de regroupement en lots
+from src.nlp.chunking import Chunk, chunk_dialogue, token_budget # Découpage des longs dialogues aux tours de parole
+from src.nlp.cache import ResultCache, cached_batch, loaded_revision # Cache optionnel des résultats
+from src.nlp import metrics # Instrumentation optionnelle (temps, tokens, troncatures)
+from src.nlp.extractive import ABSTRACTIVE_TIER, EXTRACTIVE_TIER, SummaryRouter # Résumé extractif en premier étage
+from src.nlp.registry import ModelRegistry, ModelSpec, get_registry # Registre partagé des modèles (chargement paresseux)
+
+MAX_LEVELS = 4 # Niveaux maximum du résumé hiérarchique (chaque niveau divise la taille par ~ budget / max_length)
+
+
+def _head_and_tail(document: str, tokenizer, budget: int) -> Chunk: # Début et fin d'un texte dans une seule fenêtre du modèle
+    halves = chunk_dialogue(document, tokenizer, max(1, budget // 2)) # Chaque moitié tient dans une demi-fenêtre
+    picked = halves[:1] + halves[-1:] if len(halves) > 1 else halves
+    return Chunk("\n".join(chunk.text for chunk in picked), sum(chunk.n_tokens for chunk in picked))
 
 class DialogueSummarizer: # Classe pour générer un résumé automatique, utilise un modèle extractif pré-entraîné
 
-    def __init__(self):  # __init__() initialise le modèle
+    def __init__(self, model: str = "facebook/bart-large-cnn", device: int = -1, backend: str = "eager", registry: Optional[ModelRegistry] = None, cache: Optional[ResultCache] = None, router: Union[bool, SummaryRouter] = False, num_beams: Optional[int] = None):  # __init__() décrit le modèle, qui n'est chargé qu'au premier appel
 
-        self.summarizer = pipeline( #.summarizer est un pipeline de résumé
+        self.spec = ModelSpec( # .spec identifie le pipeline dans le registre partagé
             "summarization", # Type de tâche NLP
-            model="facebook/bart-large-cnn" # Modèle pré-entraîné (BART large CNN)
+            model, # Modèle pré-entraîné (BART large CNN par défaut)
+            device, # -1 = CPU
+            backend # "eager" (fp32), "int8" ou "onnx" (voir src.nlp.backends)
         )
+        self.registry = registry or get_registry() # Registre partagé par toutes les instances du processus
+        self.cache = cache # .cache est le cache optionnel des résultats (None = pas de cache)
+        if router is True: # Routage avec les réglages par défaut
+            router = SummaryRouter()
+        self.router = router or None # .router choisit entre résumé extractif et BART (None = BART seul)
+        self.num_beams = num_beams # .num_beams est le nombre de faisceaux de la génération (None = réglage du modèle, 4 pour BART CNN)
+
+    @property
+    def summarizer(self): #.summarizer est le pipeline de résumé partagé (chargé au premier accès)
+        return self.registry.get(*self.spec)
 
-    def summarize(self, text: str, min_length: int = 30, max_length: int = 120) -> str: # Méthode pour résumer le texte
+    def revision(self) -> Optional[str]: # Révision des poids du modèle (invalidation du cache), None s'il n'est pas encore chargé
+        return loaded_revision(self.registry, self.spec)
+
+    def summarize(self, text: str, min_length: int = 30, max_length: int = 120, input_length: int = 1024) -> str: # Méthode pour résumer le texte
 
         # Condition pour gérer le texte vide ou trop court
         if not text or len(text) < min_length: # Si le texte est vide ou trop court
             return "Texte trop court pour générer un résumé." # Retourne un message d'erreur
-        result = self.summarizer(text[:1024], min_length=min_length, max_length=max_length) # .summarizer applique le modèle au texte tronqué à 1024 caractères
+        if self.cache is not None or self.router is not None: # Cache ou routeur : même chemin que le traitement en lots
+            return self.summarize_batch([text], min_length=min_length, max_length=max_length, input_length=input_length)[0]
+        metrics.observe_truncation(self.spec.cache_id, (text,), input_length)
+        with self.registry.use(*self.spec) as summarizer: # Le modèle ne peut pas être déchargé pendant l'appel
+            result = summarizer(text[:input_length], **self._generation(min_length, max_length), truncation=True) # summarizer applique le modèle au texte tronqué à input_length caractères (et à sa fenêtre)
         return result[0]["summary_text"] # Retourne le résumé généré
+
+    def summarize_batch(self, texts: Iterable[str], min_length: int = 30, max_length: int = 120, batch_size: int = 8, max_tokens: int = 4096, input_length: int = 1024) -> List[str]: # Méthode pour résumer plusieurs textes en lots
+        """
+        Résume plusieurs textes en regroupant les textes de longueurs proches.
+        Args:
+            texts (Iterable[str]): Textes à résumer
+            min_length (int): Longueur minimale du résumé (et du texte à résumer)
+            max_length (int): Longueur maximale du résumé
+            batch_size (int): Nombre maximal de textes par lot
+            max_tokens (int): Budget de tokens d'entrée par lot (padding compris)
+            input_length (int): Troncature des textes avant BART (en caractères)
+        Returns:
+            List[str]: Un résumé par texte, dans l'ordre d'entrée
+        """
+        return [record["summary"] for record in self.summarize_routed_batch(texts, min_length=min_length, max_length=max_length, batch_size=batch_size, max_tokens=max_tokens, input_length=input_length)]
+
+    def summarize_routed_batch(self, texts: Iterable[str], min_length: int = 30, max_length: int = 120, batch_size: int = 8, max_tokens: int = 4096, long: bool = False, input_length: int = 1024) -> List[dict]: # Résumés et étage qui les a produits
+        """
+        Résume plusieurs textes en indiquant l'étage utilisé : avec un routeur, les textes courts ou
+        répétitifs reçoivent un résumé extractif, les autres passent par BART.
+        Args:
+            texts (Iterable[str]): Textes à résumer
+            min_length (int): Longueur minimale du résumé (et du texte à résumer)
+            max_length (int): Longueur maximale du résumé
+            batch_size (int): Nombre maximal de textes par lot
+            max_tokens (int): Budget de tokens d'entrée par lot (padding compris)
+            long (bool): Dialogues complets pour BART (résumé hiérarchique, voir summarize_long())
+            input_length (int): Troncature des textes avant BART quand long=False (en caractères)
+        Returns:
+            List[dict]: {"summary", "tier"} par texte, dans l'ordre d'entrée ; tier vaut "extractive",
+                "abstractive" ou None (texte vide ou trop court)
+        """
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = [{"summary": "Texte trop court pour générer un résumé.", "tier": None} for _ in texts] # Valeur par défaut (texte vide ou trop court)
+        todo = [i for i, text in enumerate(texts) if text and len(text) >= min_length] # Indices des textes assez longs
+        if not todo: # Rien à envoyer au modèle
+            return results
+        abstractive = todo
+        if self.router is not None: # Premier étage : résumé extractif des textes courts ou répétitifs
+            start = time.perf_counter()
+            abstractive = [i for i in todo if self.router.route(texts[i]) == ABSTRACTIVE_TIER]
+            routed = set(abstractive)
+            extractive = [i for i in todo if i not in routed]
+            for index in extractive:
+                results[index] = {"summary": self.router.summarize(texts[index]), "tier": EXTRACTIVE_TIER}
+            self.router.record_tier(EXTRACTIVE_TIER, len(extractive), time.perf_counter() - start)
+        if abstractive: # Second étage : génération par BART
+            start = time.perf_counter()
+            batch = [texts[i] for i in abstractive]
+            if long:
+                summaries = self.summarize_long_batch(batch, min_length=min_length, max_length=max_length, batch_size=batch_size, batch_tokens=max_tokens)
+            else:
+                summaries = self._abstractive_batch(batch, min_length, max_length, batch_size, max_tokens, input_length)
+            for index, summary in zip(abstractive, summaries):
+                results[index] = {"summary": summary, "tier": ABSTRACTIVE_TIER}
+            if self.router is not None:
+                self.router.record_tier(ABSTRACTIVE_TIER, len(abstractive), time.perf_counter() - start)
+        return results
+
+    def _abstractive_batch(self, texts: List[str], min_length: int, max_length: int, batch_size: int, max_tokens: int, input_length: int = 1024) -> List[str]: # BART sur des textes tronqués (avec cache)
+        metrics.observe_truncation(self.spec.cache_id, texts, input_length)
+        truncated = [text[:input_length] for text in texts] # Même troncature que summarize()
+        params = {"min_length": min_length, "max_length": max_length} # Paramètres qui changent le résumé
+        if self.num_beams is not None:
+            params["num_beams"] = self.num_beams
+        return cached_batch(self.cache, self.spec.cache_id, params, truncated,
+                            lambda batch: self._summarize_batch(batch, min_length, max_length, batch_size, max_tokens), self.revision) # Seuls les textes absents du cache passent par le modèle
+
+    def _generation(self, min_length: int, max_length: int) -> dict: # Paramètres de génération de BART
+        params = {"min_length": min_length, "max_length": max_length}
+        if self.num_beams is not None: # Moins de faisceaux = génération plus rapide (1 = recherche gloutonne)
+            params["num_beams"] = self.num_beams
+        return params
+
+    def summarize_long(self, text: str, min_length: int = 30, max_length: int = 120, max_tokens: Optional[int] = None, overlap_turns: int = 0) -> str: # Résumé d'un long dialogue complet
+        """
+        Résume un long dialogue sans le tronquer (résumé hiérarchique) : le dialogue est découpé aux tours
+        de parole, chaque morceau est résumé, puis les résumés des morceaux sont à nouveau résumés
+        jusqu'à tenir dans une seule fenêtre du modèle.
+        Args:
+            text (str): Dialogue complet
+            min_length (int): Longueur minimale du résumé (et du texte à résumer)
+            max_length (int): Longueur maximale du résumé (et de chaque résumé intermédiaire)
+            max_tokens (int, optional): Budget de tokens par morceau (par défaut : fenêtre du modèle)
+            overlap_turns (int): Nombre de tours répétés entre deux morceaux consécutifs
+        Returns:
+            str: Résumé de tout le dialogue
+        """
+        return self.summarize_long_batch([text], min_length=min_length, max_length=max_length, max_tokens=max_tokens, overlap_turns=overlap_turns)[0]
+
+    def summarize_long_batch(self, texts: Iterable[str], min_length: int = 30, max_length: int = 120, max_tokens: Optional[int] = None, overlap_turns: int = 0, batch_size: int = 8, batch_tokens: int = 4096, max_levels: int = MAX_LEVELS) -> List[str]: # Plusieurs longs dialogues
+        """
+        Comme summarize_long(), pour plusieurs dialogues : à chaque niveau, tous les morceaux de tous les textes passent dans les mêmes lots.
+        Au-delà de max_levels niveaux, ou si un niveau ne réduit pas le nombre de tokens, le texte du
+        niveau courant est réduit à son début et à sa fin (une fenêtre du modèle), résumés une dernière fois.
+        Returns:
+            List[str]: Un résumé par texte, dans l'ordre d'entrée
+        """
+        if max_tokens is not None and max_tokens <= max_length: # Les résumés des morceaux ne tiendraient pas dans un morceau
+            raise ValueError("max_tokens doit être supérieur à max_length")
+        texts = list(texts) # Matérialise l'itérable pour pouvoir l'indexer
+        results = ["Texte trop court pour générer un résumé." for _ in texts] # Valeur par défaut (texte vide ou trop court)
+        todo = [i for i, text in enumerate(texts) if text and len(text) >= min_length] # Indices des textes assez longs
+        if not todo: # Rien à envoyer au modèle
+            return results
+        params = {"mode": "long", "min_length": min_length, "max_length": max_length, "max_tokens": max_tokens, "overlap_turns": overlap_turns, "max_levels": max_levels}
+        if self.num_beams is not None:
+            params["num_beams"] = self.num_beams
+        outputs = cached_batch(self.cache, self.spec.cache_id, params, [texts[i] for i in todo],
+                               lambda batch: self._summarize_long(batch, min_length, max_length, max_tokens, overlap_turns, batch_size, batch_tokens, max_levels), self.revision)
+        for index, output in zip(todo, outputs): # Replace les résultats parmi les valeurs par défaut
+            results[index] = output
+        return results
+
+    def _summarize_long(self, texts: List[str], min_length: int, max_length: int, max_tokens: Optional[int], overlap_turns: int, batch_size: int, batch_tokens: int, max_levels: int = MAX_LEVELS) -> List[str]: # Résumé hiérarchique
+        with self.registry.use(*self.spec) as summarizer: # Le modèle reste chargé pendant tout le traitement
+            tokenizer = summarizer.tokenizer
+            budget = max_tokens or token_budget(tokenizer, default=1024) # Fenêtre de BART moins <s> et </s>
+
+            def run(batch: List[str]) -> List[str]: # Résumé d'un lot de morceaux
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    outputs = as_list(summarizer(batch, **self._generation(min_length, max_length), truncation=True, batch_size=len(batch)))
+                    return [(out[0] if isinstance(out, list) else out)["summary_text"] for out in outputs]
+
+            documents = list(texts) # Texte à résumer à ce niveau (dialogue, puis résumés concaténés)
+            summaries: List[Optional[str]] = [None] * len(texts)
+            active = list(range(len(texts))) # Dialogues pas encore réduits à un seul résumé
+            previous_tokens = {} # Tokens du niveau précédent, par dialogue
+            level = 0
+            while active:
+                level += 1
+                chunk_lists = {owner: chunk_dialogue(documents[owner], tokenizer, budget, overlap_turns) for owner in active}
+                for owner in list(active):
+                    n_tokens = sum(chunk.n_tokens for chunk in chunk_lists[owner])
+                    if len(chunk_lists[owner]) > 1 and (level > max_levels or n_tokens >= previous_tokens.get(owner, float("inf"))):
+                        chunk_lists[owner] = [_head_and_tail(documents[owner], tokenizer, budget)] # Le texte ne se réduit plus : dernier résumé sur une fenêtre
+                    previous_tokens[owner] = n_tokens
+                flat = [(owner, chunk) for owner in active for chunk in chunk_lists[owner]]
+                lengths = [chunk.n_tokens + 2 for _, chunk in flat]
+                outputs = batched_map([chunk.text for _, chunk in flat], run, lengths, batch_size=batch_size, max_tokens=batch_tokens)
+                grouped = defaultdict(list)
+                for (owner, _), summary in zip(flat, outputs):
+                    grouped[owner].append(summary)
+                next_active = []
+                for owner in active:
+                    if len(chunk_lists[owner]) <= 1: # Un seul morceau : son résumé est le résumé final
+                        summaries[owner] = grouped[owner][0] if grouped[owner] else ""
+                    else: # Niveau suivant : on résume la concaténation des résumés
+                        documents[owner] = "\n".join(grouped[owner])
+                        next_active.append(owner)
+                active = next_active
+        return summaries
+
+    def _summarize_batch(self, truncated: List[str], min_length: int, max_length: int, batch_size: int, max_tokens: int) -> List[str]: # Génération en lots
+        with self.registry.use(*self.spec) as summarizer: # Le modèle reste chargé pendant tout le traitement
+            lengths = count_tokens(summarizer.tokenizer, truncated, model=self.spec.cache_id) # Longueur en tokens de chaque texte
+
+            def run(batch: List[str]) -> List[str]: # Appel du pipeline sur un lot
+                with metrics.batch(self.spec.cache_id, len(batch)):
+                    outputs = as_list(summarizer(batch, **self._generation(min_length, max_length), truncation=True, batch_size=len(batch))) # Fenêtre du modèle : limite dure si input_length la dépasse
+                    return [(out[0] if isinstance(out, list) else out)["summary_text"] for out in outputs]
+
+            return batched_map(truncated, run, lengths, batch_size=batch_size, max_tokens=max_tokens) # Résultats dans l'ordre
@@ -0,0 +1,309 @@
+"""
+Module sécurité : Masquage des données personnelles (PII) dans les transcriptions
+
+- Une seule expression régulière compilée reconnaît, en un seul passage sur le texte : e-mails, IBAN,
+  numéros de commande, numéros de téléphone, prénoms et noms du dictionnaire (gazetteer compilé en arbre).
+  Le trait d'union fait partie du nom : "Jean-Pierre" et "Dupont-Moreau" sont masqués en entier.
+- Chaque donnée est remplacée par un marqueur typé ([TÉLÉPHONE], [NOM]...) ou, en mode "hash", par un
+  pseudonyme stable : hash SHA-256 salé avec SALT_PII (même calcul que mask_pii() dans scripts/make_data.py),
+  mémorisé pour les valeurs qui reviennent souvent.
+- Les fichiers sont traités par blocs de lignes (mémoire bornée) et les traitements en masse sont
+  répartis sur plusieurs processus.
+
+Usage :
+    python -m src.security.redaction data/raw/transcripts --out data/processed/transcripts_redacted --workers 4
+    python -m src.security.redaction data/raw/transcripts --out data/processed/transcripts_redacted --mode hash
+    cat transcription.txt | python -m src.security.redaction -
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import argparse # Lecture des arguments de la ligne de commande
+import glob # Recherche des fichiers de transcriptions
+import hashlib # Pseudonymes (hash SHA-256 salé)
+import os # Gestion des chemins et variable d'environnement SALT_PII
+import re # Expression régulière compilée (tous les types de PII en un passage)
+import string # Alphabet du filtre sur le premier caractère
+import sys # Entrée / sortie standard
+import time # Débit affiché par la ligne de commande
+from collections import Counter # Nombre de données masquées par type
+from concurrent.futures import ProcessPoolExecutor # Traitement en masse sur plusieurs coeurs
+from functools import lru_cache # Mémorisation des pseudonymes
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LABELS = { # Marqueur de chaque type de donnée
+    "EMAIL": "EMAIL",
+    "IBAN": "IBAN",
+    "ORDER": "COMMANDE",
+    "PHONE": "TÉLÉPHONE",
+    "FIRST_NAME": "PRÉNOM",
+    "LAST_NAME": "NOM",
+}
+FIRST_NAMES = ( # Prénoms reconnus par défaut (à compléter avec --first-names)
+    "Alain", "Alexandre", "Alice", "Anne", "Antoine", "Camille", "Catherine", "Céline", "Chloé", "Christine",
+    "Christophe", "Claire", "David", "Emma", "Éric", "Françoise", "François", "Frédéric", "Hugo", "Isabelle",
+    "Jacques", "Jean", "Jérôme", "Julie", "Julien", "Laurent", "Léa", "Louis", "Lucas", "Manon", "Marie",
+    "Martine", "Mathieu", "Michel", "Nathalie", "Nicolas", "Olivier", "Patrick", "Philippe", "Pierre",
+    "Sandrine", "Sébastien", "Sophie", "Stéphane", "Sylvie", "Thomas", "Valérie", "Véronique",
+)
+LAST_NAMES = ( # Noms reconnus par défaut (à compléter avec --last-names)
+    "Bernard", "Bertrand", "Blanc", "Bonnet", "Chevalier", "Dubois", "Dupont", "Durand", "Dupuis", "Fournier",
+    "Garcia", "Girard", "Lambert", "Laurent", "Lefebvre", "Leroy", "Martin", "Mercier", "Michel", "Moreau",
+    "Morel", "Petit", "Richard", "Robert", "Roux", "Simon", "Thomas", "Vincent",
+)
+EMAIL = r"(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+" # Testé en premier, seulement si le texte contient "@"
+PATTERNS = ( # Ordre = priorité quand plusieurs types commencent au même caractère
+    ("IBAN", r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b"),
+    ("ORDER", r"\b(?:CMD|CDE|ORD)[-_]?\d{4,12}\b"),
+    ("ORDER_PREFIX", r"(?i:commande)[ \t]*(?:n°|no|num[ée]ro|#)?[ \t]*:?[ \t]*(?P<ORDER_REF>\d{4,12})\b"), # "commande n° 12345" : seul le numéro est masqué
+    ("PHONE", r"(?<![\w+])(?:(?:\+|00)33[ .-]?(?:\(0\)[ .-]?)?|0)[1-9](?:[ .-]?\d{2}){4}(?!\w)"),
+)
+FIRST_CHARS = set(string.ascii_uppercase) | set("0+c") # Premier caractère possible de chaque motif (IBAN, commande, téléphone)
+NAME_TAIL = r"(?:-[^\W\d_]+)*" # Suite d'un nom composé ("Jean-Pierre", "Marie-Ange") : le trait d'union est interne au nom
+BLOCK_SIZE = 1 << 20 # Taille des blocs de lignes lus dans un fichier (1 Mo)
+
+
+def load_names(path: str) -> List[str]: # Dictionnaire de noms : un nom par ligne
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+
+def _trie_pattern(words: Iterable[str]) -> str: # Alternative compilée en arbre : "Ma(?:rie|rtin)" plutôt que "Marie|Martin"
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {} # Fin de mot
+
+    def build(node: Dict) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+@lru_cache(maxsize=1 << 16)
+def pseudonym(value: str, salt: str) -> str: # Hash mémorisé : les mêmes numéros et noms reviennent dans beaucoup d'appels
+    """Hash SHA-256 salé d'une valeur, calculé comme mask_pii() (sel + valeur)."""
+    return hashlib.sha256((salt + value).encode()).hexdigest()
+
+
+def _normalize(kind: str, value: str) -> str: # Forme canonique avant hachage : "04 76 12 34 56" et "+33 4 76 12 34 56" ont le même pseudonyme
+    if kind == "PHONE":
+        digits = re.sub(r"\D", "", value.replace("(0)", ""))
+        return "0" + digits[4:] if digits.startswith("0033") else "0" + digits[2:] if digits.startswith("33") else digits
+    if kind == "IBAN":
+        return value.replace(" ", "").upper()
+    if kind in ("FIRST_NAME", "LAST_NAME"):
+        return value.title()
+    return value.lower()
+
+
+class Redactor: # Classe qui masque les PII d'un texte, d'un flux de lignes ou d'un fichier
+
+    def __init__(self, mode: str = "placeholder", salt: Optional[str] = None, first_names: Optional[Iterable[str]] = None, last_names: Optional[Iterable[str]] = None, ignore_case: bool = False, hash_length: int = 16): # Compile l'expression régulière une seule fois
+        """
+        Args:
+            mode (str): "placeholder" ([TÉLÉPHONE]) ou "hash" ([TÉLÉPHONE:3fa2...], pseudonyme stable)
+            salt (str, optional): Sel des pseudonymes (par défaut : variable d'environnement SALT_PII)
+            first_names (Iterable[str], optional): Prénoms à masquer (par défaut : FIRST_NAMES)
+            last_names (Iterable[str], optional): Noms à masquer (par défaut : LAST_NAMES)
+            ignore_case (bool): Reconnaît aussi les noms en minuscules (transcriptions automatiques)
+            hash_length (int): Nombre de caractères du hash gardés dans le pseudonyme
+        """
+        if mode not in ("placeholder", "hash"):
+            raise ValueError(f"mode inconnu : {mode} (placeholder ou hash)")
+        self.mode = mode
+        self.salt = salt if salt is not None else os.getenv("SALT_PII", "changeme")
+        self.hash_length = hash_length
+        first_names = list(first_names) if first_names is not None else list(FIRST_NAMES)
+        known = set(first_names)
+        last_names = [name for name in (last_names if last_names is not None else LAST_NAMES) if name not in known] # Nom aussi prénom (Thomas, Michel...) : marqué [PRÉNOM]
+        self.config = (mode, self.salt, tuple(first_names), tuple(last_names), ignore_case, hash_length) # Arguments pour recréer le même Redactor dans un worker
+        patterns = list(PATTERNS)
+        first_chars = set(FIRST_CHARS)
+        names_flag = "(?i:{})" if ignore_case else "{}"
+        for kind, names in (("FIRST_NAME", first_names), ("LAST_NAME", last_names)):
+            if names:
+                patterns.append((kind, r"(?<![\w-])" + names_flag.format(_trie_pattern(names)) + NAME_TAIL + r"(?!-?\w)"))
+                first_chars.update(name[0] for name in names)
+                if ignore_case:
+                    first_chars.update(char for name in names for char in (name[0].lower(), name[0].upper()))
+        # Le filtre sur le premier caractère (lookahead) permet au moteur de sauter directement aux positions
+        # candidates au lieu d'essayer chaque motif à chaque caractère (environ 8x plus rapide)
+        gate = "(?=[" + "".join(re.escape(char) for char in sorted(first_chars)) + "])"
+        body = "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in patterns)
+        self.pattern = re.compile(f"(?P<EMAIL>{EMAIL})|{gate}(?:{body})") # Tous les types
+        self.fast_pattern = re.compile(f"{gate}(?:{body})") # Sans les e-mails : texte sans "@" (cas le plus courant)
+        self.counts: Counter = Counter() # Nombre de données masquées par type depuis la création
+
+    def _replace(self, match: re.Match) -> str: # Remplacement d'une occurrence
+        kind = match.lastgroup # Groupe de plus haut niveau qui a reconnu le texte
+        if kind == "ORDER_PREFIX": # Le préfixe "commande n°" est conservé
+            prefix = match.group(0)[:match.start("ORDER_REF") - match.start()]
+            return prefix + self._placeholder("ORDER", match.group("ORDER_REF"))
+        return self._placeholder(kind, match.group(0))
+
+    def _placeholder(self, kind: str, value: str) -> str:
+        self.counts[kind] += 1
+        if self.mode == "hash":
+            return f"[{LABELS[kind]}:{pseudonym(_normalize(kind, value), self.salt)[:self.hash_length]}]"
+        return f"[{LABELS[kind]}]"
+
+    def redact(self, text: str) -> str: # Masque les PII d'un texte
+        pattern = self.pattern if "@" in text else self.fast_pattern # Le motif des e-mails est le plus coûteux
+        return pattern.sub(self._replace, text)
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]: # Type et position de chaque PII (audit, tests)
+        found = []
+        for match in (self.pattern if "@" in text else self.fast_pattern).finditer(text):
+            kind = "ORDER" if match.lastgroup == "ORDER_PREFIX" else match.lastgroup
+            start = match.start("ORDER_REF") if match.lastgroup == "ORDER_PREFIX" else match.start()
+            found.append((kind, start, match.end()))
+        return found
+
+    def redact_lines(self, lines: Iterable[str], block_size: int = BLOCK_SIZE) -> Iterator[str]: # Masque un flux de lignes, bloc par bloc
+        """
+        Masque un flux de lignes (fichier ouvert, sys.stdin, générateur) en mémoire bornée. Les lignes sont
+        regroupées en blocs d'environ block_size caractères : un appel à la regex par bloc plutôt que par ligne
+        (aucun motif ne traverse un saut de ligne, le résultat est identique).
+        Args:
+            lines (Iterable[str]): Lignes à masquer (sauts de ligne compris)
+            block_size (int): Taille approximative d'un bloc en caractères
+        Returns:
+            Iterator[str]: Blocs de lignes masqués, dans l'ordre
+        """
+        block: List[str] = []
+        size = 0
+        for line in lines:
+            block.append(line)
+            size += len(line)
+            if size >= block_size:
+                yield self.redact("".join(block))
+                block, size = [], 0
+        if block:
+            yield self.redact("".join(block))
+
+    def redact_file(self, source: str, destination: str) -> Counter: # Masque un fichier vers un autre
+        before = Counter(self.counts)
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        with open(source, "r", encoding="utf-8") as reader, open(destination + ".tmp", "w", encoding="utf-8") as writer:
+            for block in self.redact_lines(reader):
+                writer.write(block)
+        os.replace(destination + ".tmp", destination) # Un fichier à moitié masqué n'est jamais visible
+        return self.counts - before
+
+
+_worker_redactor: Optional[Redactor] = None # Redactor du worker (expression régulière compilée une fois par processus)
+
+
+def _init_worker(config: tuple) -> None:
+    global _worker_redactor
+    _worker_redactor = Redactor(*config)
+
+
+def _redact_texts(texts: List[str]) -> Tuple[List[str], Counter]:
+    before = Counter(_worker_redactor.counts)
+    return [_worker_redactor.redact(text) for text in texts], _worker_redactor.counts - before
+
+
+def _redact_paths(pairs: List[Tuple[str, str]]) -> Counter:
+    counts: Counter = Counter()
+    for source, destination in pairs:
+        counts += _worker_redactor.redact_file(source, destination)
+    return counts
+
+
+def redact_many(texts: Sequence[str], redactor: Optional[Redactor] = None, workers: int = 1, chunk_size: int = 1024) -> List[str]: # Masque une liste de textes, sur plusieurs coeurs si demandé
+    """
+    Masque une liste de textes, dans l'ordre. Avec workers > 1, les textes sont envoyés par paquets de
+    chunk_size à un pool de processus (chacun compile sa propre expression régulière).
+    Args:
+        texts (Sequence[str]): Textes à masquer
+        redactor (Redactor, optional): Configuration du masquage (par défaut : marqueurs typés)
+        workers (int): Nombre de processus
+        chunk_size (int): Nombre de textes par paquet envoyé à un worker
+    Returns:
+        List[str]: Textes masqués
+    """
+    redactor = redactor or Redactor()
+    if workers <= 1 or len(texts) <= chunk_size:
+        return [redactor.redact(text) for text in texts]
+    chunks = [list(texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size)]
+    results: List[str] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(redactor.config,)) as pool:
+        for redacted, counts in pool.map(_redact_texts, chunks): # map() conserve l'ordre des paquets
+            results.extend(redacted)
+            redactor.counts += counts
+    return results
+
+
+def redact_files(paths: Sequence[str], source_root: str, out_directory: str, redactor: Optional[Redactor] = None, workers: int = 1, files_per_task: int = 64) -> Counter: # Masque des fichiers en gardant l'arborescence
+    """
+    Masque des fichiers vers out_directory (même arborescence relative à source_root).
+    Returns:
+        Counter: Nombre de données masquées par type
+    """
+    redactor = redactor or Redactor()
+    pairs = [(path, os.path.join(out_directory, os.path.relpath(path, source_root))) for path in paths]
+    if workers <= 1:
+        counts: Counter = Counter()
+        for source, destination in pairs:
+            counts += redactor.redact_file(source, destination)
+        return counts
+    tasks = [pairs[start:start + files_per_task] for start in range(0, len(pairs), files_per_task)]
+    counts = Counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(redactor.config,)) as pool:
+        for task_counts in pool.map(_redact_paths, tasks):
+            counts += task_counts
+    redactor.counts += counts
+    return counts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None: # Masquage de fichiers en ligne de commande
+    from dotenv import load_dotenv # SALT_PII peut être défini dans .env, comme pour scripts/make_data.py
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Masquage des PII dans les transcriptions")
+    parser.add_argument("source", help="Dossier, fichier ou motif glob des transcriptions ('-' = entrée standard)")
+    parser.add_argument("--out", default="data/processed/transcripts_redacted", help="Dossier de sortie")
+    parser.add_argument("--mode", choices=("placeholder", "hash"), default="placeholder", help="Marqueurs typés ou pseudonymes salés (SALT_PII)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus")
+    parser.add_argument("--first-names", help="Fichier de prénoms (un par ligne) remplaçant la liste par défaut")
+    parser.add_argument("--last-names", help="Fichier de noms (un par ligne) remplaçant la liste par défaut")
+    parser.add_argument("--ignore-case", action="store_true", help="Reconnaît aussi les noms écrits en minuscules")
+    args = parser.parse_args(argv)
+
+    redactor = Redactor(
+        mode=args.mode,
+        first_names=load_names(args.first_names) if args.first_names else None,
+        last_names=load_names(args.last_names) if args.last_names else None,
+        ignore_case=args.ignore_case,
+    )
+    if args.source == "-": # Flux : stdin -> stdout
+        for block in redactor.redact_lines(sys.stdin):
+            sys.stdout.write(block)
+        return
+
+    if os.path.isdir(args.source):
+        root, paths = args.source, sorted(glob.glob(os.path.join(args.source, "**", "*.txt"), recursive=True))
+    else:
+        paths = sorted(glob.glob(args.source, recursive=True))
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else "."
+    if not paths:
+        raise SystemExit(f"Aucune transcription trouvée : {args.source}")
+    start = time.perf_counter()
+    counts = redact_files(paths, root, args.out, redactor=redactor, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"{len(paths)} fichiers masqués en {elapsed:.1f}s ({size / 1e6 / elapsed if elapsed else 0:.1f} Mo/s) -> {args.out}")
+    for kind, label in LABELS.items():
+        print(f"  {label:<10} {counts.get(kind, 0)}")
+
+
+if __name__ == "__main__":
+    main()
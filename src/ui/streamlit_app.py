@@ -1,3 +1,5 @@
+import sys
+from collections import Counter
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -5,6 +7,15 @@ import plotly.graph_objects as go
 from pathlib import Path
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2])) # Racine du projet : rend le package src importable
+from src.data.cdr_store import CDRStore # CDR en Parquet + rollups pré-calculés
+from src.nlp.clustering import CallClusterer # Clusters incrémentaux + recherche d'appels similaires
+from src.security.redaction import LABELS, Redactor # Masquage des PII
+
+CDR_SOURCES = [Path("data/raw/cdr_synthetic.parquet"), Path("data/raw/cdr_synthetic.csv")] # Sorties de scripts/make_data.py
+SCORES_PATH = Path("data/processed/scores/scores.parquet") # Sortie de scripts/score_transcripts.py
+CLUSTERS_DIR = Path("data/processed/clusters") # Index de python -m src.nlp.clustering
+
 # Configuration de la page
 st.set_page_config(
     page_title="GenAI Telephony - Dashboard",
@@ -36,6 +47,59 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_cdr_store() -> CDRStore: # Un seul stockage par processus Streamlit
+    return CDRStore()
+
+def cdr_version() -> int: # Ingère le fichier CDR s'il a changé, retourne la version des rollups (clé des caches)
+    store = get_cdr_store()
+    for source in CDR_SOURCES:
+        if source.exists():
+            with st.spinner(f"Ingestion de {source}..."):
+                store.ingest(str(source)) # Sans effet si le fichier est déjà ingéré
+            break
+    return store.version()
+
+@st.cache_data
+def load_kpis(version: int) -> dict:
+    return get_cdr_store().kpis()
+
+@st.cache_data
+def load_rollup(dimension: str, version: int) -> pd.DataFrame:
+    return get_cdr_store().rollup(dimension)
+
+@st.cache_data
+def load_histogram(version: int) -> pd.DataFrame:
+    return get_cdr_store().histogram()
+
+@st.cache_data
+def load_head(version: int) -> pd.DataFrame:
+    return get_cdr_store().head(10)
+
+@st.cache_data
+def load_satisfaction(modified: float) -> float: # Part des appels au sentiment positif (4-5 étoiles ou POSITIVE)
+    labels = pd.read_parquet(SCORES_PATH, columns=["sentiment"])["sentiment"].astype(str).str.lower()
+    return float((labels.str[0].isin(["4", "5"]) | labels.str.startswith("pos")).mean())
+
+@st.cache_resource(max_entries=1)
+def get_clusterer(modified: float) -> CallClusterer: # Rechargé quand l'index est modifié (clé = date de state.joblib)
+    return CallClusterer(str(CLUSTERS_DIR))
+
+@st.cache_data
+def load_clusters(modified: float) -> list:
+    return get_clusterer(modified).clusters()
+
+@st.cache_data
+def load_points(modified: float) -> dict:
+    return get_clusterer(modified).points(limit=2000)
+
+@st.cache_resource
+def get_redactor() -> dict: # Expressions régulières compilées une seule fois
+    return {"Marqueurs typés": Redactor(), "Pseudonymes (SALT_PII)": Redactor(mode="hash")}
+
+def _delta(value):
+    return f"{value:+.0%}" if value is not None else None
+
 def main():
     # Sidebar navigation
     st.sidebar.title("Navigation")
@@ -61,16 +125,21 @@ def show_overview():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         st.info("**Projet Data Science** - Analyse avancée des dialogues téléphoniques avec GenAI et sécurité RGPD")
-    # KPIs mockup
+    # KPIs calculés sur les rollups des CDR (évolution : 7 derniers jours vs 7 précédents)
+    kpis = load_kpis(cdr_version())
+    satisfaction = load_satisfaction(SCORES_PATH.stat().st_mtime) if SCORES_PATH.exists() else None
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Appels analysés", "201", "+15%")
+        st.metric("Appels analysés", f"{kpis['calls']:,}".replace(",", " "), _delta(kpis["calls_delta"]))
     with col2:
-        st.metric("Temps moyen (AHT)", "12m 34s", "-8%")
+        aht = kpis["aht_sec"]
+        st.metric("Temps moyen (AHT)", f"{int(aht // 60)}m {int(aht % 60):02d}s" if aht is not None else "n/d", _delta(kpis["aht_sec_delta"]), delta_color="inverse")
     with col3:
-        st.metric("Taux résolution", "73.2%", "+5%")
+        rate = kpis["resolution_rate"]
+        st.metric("Taux résolution", f"{rate:.1%}" if rate is not None else "n/d", _delta(kpis["resolution_rate_delta"]))
     with col4:
-        st.metric("Satisfaction NLP", "76.8%", "+12%")
+        st.metric("Satisfaction NLP", f"{satisfaction:.1%}" if satisfaction is not None else "n/d",
+                  help="Part des transcriptions au sentiment positif (scripts/score_transcripts.py)")
     # Architecture pipeline
     st.subheader("Architecture du Pipeline")
     st.markdown(
@@ -93,33 +162,44 @@ graph LR
 def show_data_exploration():
     st.header(" Exploration des Données")
     
-    # Simuler chargement données
-    if st.button("Charger les données CDR"):
-        data_path = Path("data/raw/cdr_synthetic.csv")
-        if data_path.exists():
-            df = pd.read_csv(data_path)
-            
-            # Aperçu des données
-            st.subheader("Aperçu des données")
-            st.dataframe(df.head(10))
-            
-            # Graphiques interactifs
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Distribution par thème")
-                theme_counts = df['topic'].value_counts()
-                fig = px.pie(values=theme_counts.values, names=theme_counts.index, 
-                           title="Répartition des thèmes d'appels")
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col2:
-                st.subheader("Durée des appels")
-                fig = px.histogram(df, x='duration_sec', nbins=20, 
-                                 title="Distribution des durées d'appels")
-                st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.error("Fichier CDR non trouvé. Exécutez d'abord le notebook de génération.")
+    # Les graphiques lisent les rollups pré-calculés (pas de relecture du fichier CDR)
+    version = cdr_version()
+    if get_cdr_store().stats()["rows"]:
+        # Aperçu des données
+        st.subheader("Aperçu des données")
+        st.dataframe(load_head(version))
+        
+        # Graphiques interactifs
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Distribution par thème")
+            topics = load_rollup("topic", version)
+            fig = px.pie(values=topics["calls"], names=topics["key"], 
+                       title="Répartition des thèmes d'appels")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            st.subheader("Durée des appels")
+            histogram = load_histogram(version)
+            fig = px.bar(histogram, x='bin_start_sec', y='calls', 
+                         title="Distribution des durées d'appels (tranches d'une minute)")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Performance par agent")
+            agents = load_rollup("agent_id", version)
+            st.dataframe(agents[["key", "calls", "aht_sec", "resolution_rate"]].rename(columns={"key": "agent"}))
+        
+        with col2:
+            st.subheader("Appels par heure")
+            hours = load_rollup("hour", version)
+            fig = px.bar(hours, x='key', y='calls', title="Volume d'appels par heure de la journée")
+            st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.error("Fichier CDR non trouvé. Exécutez d'abord scripts/make_data.py.")
 
 def show_nlp_analysis():
     st.header("Analyse NLP en Temps Réel")
@@ -163,37 +243,42 @@ Agent: Je vais vérifier votre compte immédiatement."""
 
 def show_clustering():
     st.header("Insights & Clustering Thématique")
+
+    state_path = CLUSTERS_DIR / "state.joblib"
+    if not state_path.exists():
+        st.info("Aucun appel indexé : lancez `python -m src.nlp.clustering add data/raw/transcripts`.")
+        return
+    modified = state_path.stat().st_mtime
+    clusterer = get_clusterer(modified)
+    clusters = load_clusters(modified)
     
-    # Simuler données de clustering
     st.subheader("Clusters identifiés")
-    
-    # Graphique de clustering mockup
-    np.random.seed(42)
-    n_points = 100
-    
-    cluster_data = pd.DataFrame({
-        'x': np.random.normal(0, 1, n_points),
-        'y': np.random.normal(0, 1, n_points),
-        'cluster': np.random.choice(['Facturation', 'Support Tech', 'Commandes', 'Retours'], n_points),
-        'sentiment': np.random.choice(['Positif', 'Neutre', 'Négatif'], n_points)
-    })
-    
+    points = load_points(modified)
+    cluster_data = pd.DataFrame(points)
+    cluster_data['cluster'] = cluster_data['cluster'].map(lambda c: f"Cluster {c}" if c >= 0 else "Non classé")
     fig = px.scatter(cluster_data, x='x', y='y', color='cluster', 
-                     hover_data=['sentiment'],
-                     title="Visualisation des Clusters de Conversations")
+                     hover_data=['call_id'],
+                     title="Visualisation des Clusters de Conversations (ACP des embeddings)")
     st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(pd.DataFrame([
+        {"Cluster": c["cluster"], "Appels": c["size"], "Termes caractéristiques": ", ".join(c["terms"])} for c in clusters
+    ]), use_container_width=True, hide_index=True)
+
+    # Recherche d'appels similaires (index IVF, seules quelques cellules sont parcourues)
+    st.subheader("Appels similaires")
+    query = st.text_input("Décrivez le problème du client :", "Ma facture est plus élevée que prévu")
+    if query:
+        with st.spinner("Recherche..."):
+            results = clusterer.similar(query, k=5)
+        st.table(pd.DataFrame(results))
     
     # Recommandations
     st.subheader("Recommandations Automatiques")
-    recommendations = [
-        "**Priorité Haute:** 23% des appels facturation nécessitent escalade",
-        "**Attention:** Pic d'appels support technique le mardi (formation agents?)",
-        "**Succès:** Taux de résolution commandes en hausse (+12%)",
-        "**Insight:** Mots-clés récurrents: 'remboursement', 'délai', 'problème technique'"
-    ]
-    
-    for rec in recommendations:
-        st.markdown(rec)
+    total = sum(c["size"] for c in clusters) or 1
+    for c in sorted(clusters, key=lambda c: -c["size"])[:4]:
+        st.markdown(f"**Cluster {c['cluster']} ({c['size'] / total:.0%} des appels):** "
+                    f"mots-clés récurrents {', '.join(repr(term) for term in c['terms'][:4])}")
 
 def show_security():
     st.header("Sécurité & Conformité RGPD")
@@ -202,17 +287,19 @@ def show_security():
     
     with col1:
         st.subheader("Démonstration Masquage PII")
+        redactor = get_redactor()
+        mode = st.radio("Remplacement :", ["Marqueurs typés", "Pseudonymes (SALT_PII)"], horizontal=True)
         
         # Avant/Après masquage
-        st.write("**Avant masquage:**")
-        st.code("Client: Marie Dupont, mon numéro est 0476123456")
+        text = st.text_area("**Avant masquage:**", "Client: Marie Dupont, mon numéro est 04 76 12 34 56, mon e-mail marie.dupont@exemple.fr\nAgent: Votre commande n° 123456 est remboursée sur l'IBAN FR76 3000 6000 0112 3456 7890 189.")
         
         st.write("**Après masquage:**")
-        st.code("Client: [PRÉNOM] [NOM], mon numéro est [TÉLÉPHONE]")
+        st.code(redactor[mode].redact(text))
+        found = Counter(kind for kind, _, _ in redactor[mode].find(text)) # Compté sur ce texte seulement (redactor partagé entre sessions)
         
         # Métriques de sécurité
-        st.metric("PII masqués", "100%", "0 fuite")
-        st.metric("Audit logs", "1,247", "↗ tracking complet")
+        st.metric("PII masqués", sum(found.values()))
+        st.write(", ".join(f"{LABELS[kind]} : {count}" for kind, count in found.items()) or "Aucune donnée personnelle détectée")
 
     with col2:
         st.subheader("Conformité RGPD")
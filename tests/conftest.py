@@ -0,0 +1,96 @@
+"""
+Tests : Pipelines factices (sans PyTorch ni téléchargement) servis par un registre de test
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Racine du dépôt
+import sys # Import des modules src.* depuis les tests
+from types import SimpleNamespace # Configuration factice des modèles
+from typing import List
+# ----- Third party libraries -----
+import pytest # Framework de tests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Racine du dépôt
+
+# ----- Local modules -----
+from src.nlp.registry import ModelRegistry # Registre dont on remplace le chargement
+
+
+class FakeTokenizer: # Tokenizer factice : un token par mot
+    model_max_length = 512
+    is_fast = False
+
+    def __call__(self, texts, add_special_tokens: bool = True, truncation: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        extra = 2 if add_special_tokens else 0
+        ids = [list(range(len(text.split()) + extra)) for text in ([texts] if single else texts)]
+        return {"input_ids": ids[0] if single else ids}
+
+
+class FakePipeline: # Base des pipelines factices : tokenizer, révision des poids, appels enregistrés
+    def __init__(self, revision: str = "r1"):
+        self.tokenizer = FakeTokenizer()
+        self.model = SimpleNamespace(config=SimpleNamespace(_commit_hash=revision, _name_or_path="fake"))
+        self.calls: List[list] = [] # Textes reçus à chaque appel
+        self.kwargs: List[dict] = [] # Paramètres reçus à chaque appel
+
+    def __call__(self, inputs, *args, **kwargs):
+        batch = [inputs] if isinstance(inputs, str) else list(inputs)
+        self.calls.append(batch)
+        self.kwargs.append(kwargs)
+        outputs = [self.predict(text, *args, **kwargs) for text in batch]
+        return outputs[0] if isinstance(inputs, str) else outputs
+
+    @property
+    def n_texts(self) -> int: # Nombre de textes passés par le modèle
+        return sum(len(batch) for batch in self.calls)
+
+
+class FakeSentiment(FakePipeline): # "merci" = positif, sinon négatif
+    def predict(self, text, **kwargs):
+        positive = "merci" in text.lower()
+        if "top_k" in kwargs: # top_k=None : scores de tous les labels
+            return [{"label": "5 stars", "score": 0.9 if positive else 0.1}, {"label": "1 star", "score": 0.1 if positive else 0.9}]
+        return {"label": "5 stars" if positive else "1 star", "score": 0.9}
+
+
+class FakeZeroShot(FakePipeline): # "facture" = facturation, sinon support technique
+    def predict(self, text, labels, **kwargs):
+        best = "facturation" if "facture" in text.lower() else "support technique"
+        ordered = [best] + [label for label in labels if label != best]
+        return {"labels": ordered, "scores": [0.8] + [0.2 / (len(labels) - 1)] * (len(labels) - 1)}
+
+
+class FakeSummarizer(FakePipeline): # Résumé = premiers mots du texte (shrink=False : pas plus court que l'entrée)
+    def __init__(self, revision: str = "r1", shrink: bool = True):
+        super().__init__(revision)
+        self.shrink = shrink
+
+    def predict(self, text, min_length=30, max_length=120, **kwargs):
+        if not self.shrink:
+            return [{"summary_text": text + " " + text}]
+        return [{"summary_text": " ".join(text.split()[:5])}]
+
+
+class FakeRegistry(ModelRegistry): # Registre qui sert les pipelines factices au lieu de transformers
+    def __init__(self, pipes: dict):
+        super().__init__()
+        self.pipes = pipes
+
+    def _load(self, spec):
+        return self.pipes[spec.task]
+
+
+@pytest.fixture
+def pipes() -> dict: # Un pipeline factice par tâche
+    return {
+        "sentiment-analysis": FakeSentiment(),
+        "zero-shot-classification": FakeZeroShot(),
+        "summarization": FakeSummarizer(),
+    }
+
+
+@pytest.fixture
+def registry(pipes) -> FakeRegistry:
+    return FakeRegistry(pipes)
@@ -0,0 +1,119 @@
+"""
+Tests : Service d'inférence (micro-batching, contre-pression, paramètres de /analyze/, readiness)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import asyncio # Boucle des tests du MicroBatcher
+import threading # Lot bloqué pendant le test de contre-pression
+import time # Attente de la fin du préchargement
+# ----- Third party libraries -----
+import pytest # Framework de tests
+from fastapi.testclient import TestClient # Client HTTP de test (lifespan compris)
+# ----- Local modules -----
+from src.api import main # Application FastAPI
+from src.nlp import registry as registry_module # Registre partagé remplacé par le registre de test
+from src.nlp.batching import MicroBatcher, QueueFullError # File d'attente avec micro-batching
+from tests.conftest import FakeRegistry # Registre factice
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    async def scenario():
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(list(items)) or [item * 2 for item in items], max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results, batches
+
+    results, batches = asyncio.run(scenario())
+    assert results == [0, 2, 4, 6, 8]
+    assert len(batches) == 1
+
+
+def test_micro_batcher_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    async def scenario():
+        batcher = MicroBatcher(lambda items: release.wait(5) and items, max_batch_size=1, max_wait_ms=0, max_queue=2)
+        await batcher.start()
+        first = asyncio.ensure_future(batcher.submit("occupe le modèle"))
+        await asyncio.sleep(0.05) # Le premier lot est en cours, la file est vide
+        queued = [asyncio.ensure_future(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.submit("de trop")
+        release.set()
+        await asyncio.gather(first, *queued)
+        stats = batcher.stats()
+        await batcher.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1 and stats["items"] == 3
+
+
+def test_micro_batcher_fails_every_request_on_missing_results():
+    async def scenario():
+        batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True), timeout=2)
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results) # Aucune requête ne reste en attente
+    assert stats["errors"] == 1
+
+
+@pytest.fixture
+def client(monkeypatch, registry):
+    monkeypatch.setattr(registry_module, "_default_registry", registry)
+    monkeypatch.setattr(main, "SUMMARY_ROUTER", False)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_analyze_splits_text_and_summary_lengths(client, pipes):
+    text = "Client: ma facture est fausse, je paie deux fois le forfait depuis trois mois."
+    body = client.post("/analyze/", json={"text": text, "max_length": 20, "summary_max_length": 7}).json()
+    assert body["topic"]["label"] == "facturation"
+    assert pipes["zero-shot-classification"].calls[-1] == [text[:20]] # max_length : caractères du texte analysé
+    assert pipes["summarization"].kwargs[-1]["max_length"] == 7 # summary_max_length : tokens du résumé
+    assert len(pipes["summarization"].calls[-1][0]) > 20 # Le texte à résumer n'est pas tronqué à max_length
+
+
+def test_analyze_redacts_once_for_all_models(monkeypatch, registry, pipes):
+    monkeypatch.setattr(registry_module, "_default_registry", registry)
+    monkeypatch.setattr(main, "SUMMARY_ROUTER", False)
+    monkeypatch.setattr(main, "REDACT", True)
+    with TestClient(main.app) as client:
+        redactor = main.service.redactor
+        calls = []
+        monkeypatch.setattr(redactor, "redact", lambda text: calls.append(text) or type(redactor).redact(redactor, text))
+        client.post("/analyze/", json={"text": "Client: Jean-Pierre Durand, ma facture est fausse depuis des mois"})
+    assert len(calls) == 1
+    for pipe in pipes.values():
+        assert pipe.calls[-1][0].startswith("Client: [PRÉNOM] [NOM]")
+
+
+def test_summarize_keeps_max_length_as_summary_length(client, pipes):
+    client.post("/summarize/", json={"text": "Client: " + "bonjour " * 10, "max_length": 9})
+    assert pipes["summarization"].kwargs[-1]["max_length"] == 9
+
+
+def test_ready_reports_preload_error(monkeypatch):
+    class BrokenRegistry(FakeRegistry):
+        def _load(self, spec):
+            raise OSError("modèle introuvable")
+
+    monkeypatch.setattr(registry_module, "_default_registry", BrokenRegistry({}))
+    with TestClient(main.app) as client:
+        for _ in range(100): # Le préchargement tourne dans un thread
+            if main.service.preloading.done():
+                break
+            time.sleep(0.01)
+        response = client.get("/ready")
+    assert response.status_code == 503
+    assert "modèle introuvable" in response.json()["error"]
@@ -0,0 +1,73 @@
+"""
+Tests : API de traitement en lots (ordre des résultats, valeurs par défaut, regroupement par longueur)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Third party libraries -----
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.nlp.analyzer import DialogueAnalyzer # Analyse complète (limite du texte résumé)
+from src.nlp.batching import batched_map, bucket_by_length # Regroupement en lots
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+
+TEXTS = [
+    "Client_1: Merci beaucoup pour votre aide.",
+    "",
+    "Client_2: Ma facture est fausse, je paie deux fois le même forfait depuis trois mois et personne ne répond.",
+    "Client_3: La box ne marche plus.",
+]
+
+
+def test_bucket_by_length_respects_limits():
+    lengths = [5, 50, 3, 40, 7, 45]
+    buckets = list(bucket_by_length(lengths, batch_size=2, max_tokens=90))
+    assert sorted(index for bucket in buckets for index in bucket) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert len(bucket) <= 2
+        assert max(lengths[i] for i in bucket) * len(bucket) <= 90 or len(bucket) == 1
+
+
+def test_batched_map_keeps_input_order():
+    texts = ["ccc", "a", "bb", "dddd"]
+    outputs = batched_map(texts, lambda batch: [text.upper() for text in batch], [len(text) for text in texts], batch_size=2)
+    assert outputs == ["CCC", "A", "BB", "DDDD"]
+
+
+def test_batched_map_rejects_missing_results():
+    with pytest.raises(ValueError):
+        batched_map(["a", "b", "c"], lambda batch: batch[:-1], [1, 1, 1], batch_size=3)
+
+
+def test_sentiment_batch_order_and_defaults(registry):
+    analyzer = SentimentAnalyzer(registry=registry)
+    results = analyzer.analyze_batch(TEXTS, batch_size=2)
+    assert results[1] == {"label": "NEUTRAL", "score": 0.0} # Texte vide : valeur par défaut, sans appel au modèle
+    assert [result["label"] for result in results] == ["5 stars", "NEUTRAL", "1 star", "1 star"]
+    assert results == [analyzer.analyze(text) for text in TEXTS] # Même résultat que l'appel unitaire
+    assert all("" not in batch for batch in registry.pipes["sentiment-analysis"].calls)
+
+
+def test_classifier_batch_order_and_defaults(registry):
+    classifier = DialogueClassifier(registry=registry)
+    results = classifier.classify_batch(TEXTS, batch_size=1)
+    assert results[1] == {"label": "autre", "score": 0.0}
+    assert [result["label"] for result in results] == ["support technique", "autre", "facturation", "support technique"]
+
+
+def test_summarizer_batch_defaults(registry):
+    summarizer = DialogueSummarizer(registry=registry)
+    results = summarizer.summarize_batch(["", "trop court", TEXTS[2]], min_length=30)
+    assert results[0] == results[1] == "Texte trop court pour générer un résumé."
+    assert results[2] == "Client_2: Ma facture est fausse,"
+    assert summarizer.summarize_batch([]) == []
+
+
+@pytest.mark.parametrize("limit", [400, 1500])
+def test_summary_input_length_truncates_short_path(registry, pipes, limit):
+    text = "Client: " + "mot " * 500 # Environ 2000 caractères
+    record = DialogueAnalyzer(registry=registry).analyze(text, tasks=("summary",), long=False, summary_input_length=limit)
+    assert record["summary_tier"] == "abstractive" and not record["long"]
+    assert pipes["summarization"].calls[-1] == [text.strip()[:limit]]
+    assert pipes["summarization"].kwargs[-1]["truncation"] # La fenêtre du modèle reste la limite dure
@@ -0,0 +1,83 @@
+"""
+Tests : Cache persistant des résultats (succès, échecs, invalidation au changement de poids)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Local modules -----
+from src.nlp.cache import ResultCache, cached_batch # Cache des résultats
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from tests.conftest import FakeRegistry, FakeSentiment # Registre et pipeline factices
+
+TEXTS = ["Client: merci pour tout", "Client: la box est en panne", "Client: merci pour tout"]
+
+
+def test_hits_and_misses_with_duplicates():
+    cache = ResultCache(path=None)
+    computed = []
+
+    def compute(batch):
+        computed.extend(batch)
+        return [text.upper() for text in batch]
+
+    assert cached_batch(cache, "m", {}, TEXTS, compute) == [text.upper() for text in TEXTS]
+    assert computed == TEXTS[:2] # Le doublon n'est calculé qu'une fois
+    assert cached_batch(cache, "m", {}, TEXTS, compute) == [text.upper() for text in TEXTS]
+    assert len(computed) == 2 # Deuxième passage : tout vient du cache
+    assert cached_batch(cache, "m", {"max_length": 10}, TEXTS[:1], compute)
+    assert len(computed) == 3 # Paramètres différents : autre clé
+
+
+def test_disk_level_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cached_batch(ResultCache(path=path), "m", {}, TEXTS, lambda batch: [len(text) for text in batch])
+    reopened = ResultCache(path=path)
+    assert cached_batch(reopened, "m", {}, TEXTS, lambda batch: 1 / 0) == [len(text) for text in TEXTS]
+    assert reopened.stats()["disk_hits"] == 2
+
+
+def test_fully_cached_batch_sees_new_weights(registry, pipes):
+    analyzer = SentimentAnalyzer(registry=registry, cache=ResultCache(path=None))
+    analyzer.analyze_batch(TEXTS)
+    calls = pipes["sentiment-analysis"].n_texts
+    analyzer.analyze_batch(TEXTS)
+    assert pipes["sentiment-analysis"].n_texts == calls # Tout en cache
+    pipes["sentiment-analysis"].model.config._commit_hash = "r2" # Nouveaux poids
+    analyzer.analyze_batch(TEXTS)
+    assert pipes["sentiment-analysis"].n_texts > calls
+    assert analyzer.cache.stats()["invalidations"] == 1
+
+
+def test_cached_batch_does_not_load_model(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SentimentAnalyzer(registry=FakeRegistry({"sentiment-analysis": FakeSentiment()}), cache=ResultCache(path=path)).analyze_batch(TEXTS)
+    registry = FakeRegistry({"sentiment-analysis": FakeSentiment()}) # Nouveau processus : aucun modèle chargé
+    analyzer = SentimentAnalyzer(registry=registry, cache=ResultCache(path=path))
+    assert [result["label"] for result in analyzer.analyze_batch(TEXTS)] == ["5 stars", "1 star", "5 stars"]
+    assert not registry.is_loaded(*analyzer.spec) # Tout en cache : le modèle n'est pas chargé
+
+
+def test_stale_hits_recomputed_after_lazy_revision_check(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SentimentAnalyzer(registry=FakeRegistry({"sentiment-analysis": FakeSentiment("r1")}), cache=ResultCache(path=path)).analyze_batch(TEXTS[:1])
+    pipe = FakeSentiment("r2") # Nouveaux poids au redémarrage
+    analyzer = SentimentAnalyzer(registry=FakeRegistry({"sentiment-analysis": pipe}), cache=ResultCache(path=path))
+    analyzer.analyze_batch(TEXTS[:2]) # Un succès (périmé), un échec qui charge le modèle
+    assert sorted(text for batch in pipe.calls for text in batch) == sorted(TEXTS[:2]) # Le succès périmé est recalculé
+    assert analyzer.cache.stats()["invalidations"] == 1
+
+
+def test_long_path_checks_revision(registry, pipes):
+    analyzer = SentimentAnalyzer(registry=registry, cache=ResultCache(path=None))
+    analyzer.analyze_long_batch(TEXTS)
+    calls = pipes["sentiment-analysis"].n_texts
+    pipes["sentiment-analysis"].model.config._commit_hash = "r2"
+    analyzer.analyze_long_batch(TEXTS)
+    assert pipes["sentiment-analysis"].n_texts > calls
+
+
+def test_results_are_not_shared_between_callers(registry):
+    classifier = DialogueClassifier(registry=registry, cache=ResultCache(path=None))
+    first = classifier.classify_long_batch(TEXTS[:1])[0]
+    first["scores"]["facturation"] = 42.0 # L'appelant modifie le dictionnaire imbriqué
+    assert classifier.classify_long_batch(TEXTS[:1])[0]["scores"]["facturation"] != 42.0
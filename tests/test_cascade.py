@@ -0,0 +1,71 @@
+"""
+Tests : Cascade de classification (réentraînement de fond, génération dans les clés du cache)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import threading # Réentraînement bloqué pendant le test
+# ----- Local modules -----
+from src.nlp.cache import ResultCache # Cache des résultats
+from src.nlp import cascade as cascade_module # Commande refit
+from src.nlp import classifier as classifier_module # Zero-shot remplacé dans la commande refit
+from src.nlp.cascade import FAST_TIER, TopicCascade # Classifieur léger
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+
+BILLING = ["Client: ma facture est trop élevée ce mois", "Client: erreur sur la facture du forfait", "Client: la facture compte deux fois le forfait"]
+SUPPORT = ["Client: la box ne marche plus du tout", "Client: internet coupe toutes les heures", "Client: le wifi de la box est en panne"]
+
+
+def labelled(n: int):
+    texts = [(BILLING + SUPPORT)[i % 6] + f" ({i})" for i in range(n)]
+    labels = ["facturation" if "facture" in text else "support technique" for text in texts]
+    return texts, labels
+
+
+def test_observe_does_not_block_on_refit(monkeypatch):
+    cascade = TopicCascade(min_samples=10, refit_every=10, audit_rate=0.0)
+    release = threading.Event()
+    original = cascade.refit
+
+    def slow_refit():
+        release.wait(5)
+        return original()
+
+    monkeypatch.setattr(cascade, "refit", slow_refit)
+    cascade.observe(*labelled(12)) # Rend la main sans attendre la fin de l'entraînement
+    assert not cascade.is_ready and cascade.generation == 0
+    release.set()
+    cascade.wait(5)
+    assert cascade.is_ready and cascade.generation == 1
+
+
+def test_refit_command_trains_once(monkeypatch, tmp_path, registry):
+    texts, _ = labelled(60) # >= min_samples : observe() seul suffirait à déclencher un entraînement
+    for i, text in enumerate(texts):
+        (tmp_path / f"call_{i:02d}.txt").write_text(text, encoding="utf-8")
+    monkeypatch.setattr(classifier_module, "DialogueClassifier", lambda: DialogueClassifier(registry=registry))
+    fits = []
+    original = TopicCascade.refit
+    monkeypatch.setattr(TopicCascade, "refit", lambda self: fits.append(1) or original(self))
+    cascade_module.main(["refit", "--transcripts", str(tmp_path), "--out", str(tmp_path / "cascade.joblib")])
+    assert len(fits) == 1
+    assert TopicCascade.load(str(tmp_path / "cascade.joblib")).is_ready
+
+
+def test_cached_cascade_does_not_load_zero_shot(registry):
+    cascade = TopicCascade(min_samples=10, refit_every=10, audit_rate=0.0, threshold=0.0, background=False)
+    cascade.observe(*labelled(12))
+    classifier = DialogueClassifier(registry=registry, cascade=cascade, cache=ResultCache(path=None))
+    results = classifier.classify_batch(BILLING + SUPPORT)
+    assert all(result["tier"] == FAST_TIER for result in results)
+    assert not registry.is_loaded(*classifier.spec) # Le modèle léger a tout traité : DeBERTa n'est jamais chargé
+
+
+def test_cascade_cache_key_follows_generation(registry):
+    cascade = TopicCascade(min_samples=10, refit_every=10, audit_rate=0.0, threshold=0.0, background=False)
+    classifier = DialogueClassifier(registry=registry, cascade=cascade, cache=ResultCache(path=None))
+    text = "Client: ma facture est fausse"
+    assert classifier.classify_batch([text])[0]["tier"] != FAST_TIER # Modèle léger pas encore entraîné
+    cascade.observe(*labelled(12))
+    assert cascade.generation == 1
+    assert classifier.classify_batch([text])[0]["tier"] == FAST_TIER # Nouvelle génération : le cache n'est pas relu
@@ -0,0 +1,92 @@
+"""
+Tests : Stockage colonnaire des CDR (rollups égaux à pandas, ré-ingestion d'un fichier modifié, réouverture)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Date de modification du fichier source, blocs sur disque
+from datetime import datetime # Début de la période simulée
+# ----- Third party libraries -----
+import numpy as np # Histogramme de référence
+import pandas as pd # Agrégats de référence
+import pytest # Framework de tests
+# ----- Local modules -----
+from scripts.make_data import generate_cdr_chunk # CDR synthétiques
+from src.data.cdr_store import DURATION_BINS, CDRStore # Module testé
+
+
+def _cdr(n_calls: int, seed: int) -> pd.DataFrame:
+    return generate_cdr_chunk(0, 0, n_calls, seed, datetime(2024, 1, 1), "salt")
+
+
+def _expected(frame: pd.DataFrame, dimension: str) -> pd.DataFrame: # Rollup recalculé avec pandas sur tous les appels
+    starts = pd.to_datetime(frame["start_ts"])
+    keys = {"topic": frame["topic"], "agent_id": frame["agent_id"], "day": starts.dt.strftime("%Y-%m-%d"), "hour": starts.dt.hour}[dimension]
+    grouped = frame.groupby(keys.to_numpy())
+    expected = pd.DataFrame({"calls": grouped.size(), "aht_sec": grouped["duration_sec"].mean(), "resolution_rate": grouped["resolved"].mean()})
+    return expected.rename(index=str).sort_index(key=lambda index: index.astype(int) if dimension == "hour" else index)
+
+
+def _check(store: CDRStore, frame: pd.DataFrame) -> None: # Rollups, KPI et histogramme égaux au calcul direct
+    for dimension in ("topic", "agent_id", "day", "hour"):
+        rollup = store.rollup(dimension).set_index("key")[["calls", "aht_sec", "resolution_rate"]]
+        pd.testing.assert_frame_equal(rollup, _expected(frame, dimension), check_dtype=False, check_names=False)
+    kpis = store.kpis()
+    assert kpis["calls"] == len(frame)
+    assert kpis["aht_sec"] == pytest.approx(frame["duration_sec"].mean())
+    assert kpis["resolution_rate"] == pytest.approx(frame["resolved"].mean())
+    days = _expected(frame, "day")
+    recent, previous = days.iloc[-7:], days.iloc[-14:-7]
+    assert kpis["calls_delta"] == pytest.approx(recent["calls"].sum() / previous["calls"].sum() - 1)
+    bins = np.clip(np.digitize(frame["duration_sec"], DURATION_BINS) - 1, 0, len(DURATION_BINS) - 1)
+    assert store.histogram()["calls"].tolist() == np.bincount(bins, minlength=len(DURATION_BINS)).tolist()
+    billing = frame[frame["topic"] == "billing"]
+    assert store.histogram("topic", "billing")["calls"].sum() == len(billing)
+
+
+@pytest.fixture
+def source(tmp_path) -> str:
+    path = str(tmp_path / "cdr.csv")
+    _cdr(2000, 42).to_csv(path, index=False)
+    return path
+
+
+def test_chunked_ingest_matches_pandas(tmp_path, source):
+    store = CDRStore(str(tmp_path / "store"))
+    assert store.ingest(source, chunk_size=700) == 2000
+    assert store.stats() == {"rows": 2000, "parts": 3, "sources": 1, "version": 1} # 700 + 700 + 600
+    _check(store, pd.read_csv(source))
+    assert sum(len(frame) for frame in store.scan(["call_id"])) == 2000
+    assert store.ingest(source, chunk_size=700) == 0 # Fichier inchangé : rien à faire
+    assert store.version() == 1
+
+
+def test_modified_source_replaces_previous_version(tmp_path, source):
+    store = CDRStore(str(tmp_path / "store"))
+    store.ingest(source, chunk_size=700)
+    old_parts = [os.path.join(store.parts_directory, name) for name in sorted(os.listdir(store.parts_directory))]
+    old_rollups = store._rollup_paths(1)
+
+    modified = _cdr(1000, 7) # Données régénérées : moins d'appels, autres durées
+    modified.to_csv(source, index=False)
+    os.utime(source, (1_900_000_000, 1_900_000_000))
+    assert store.ingest(source, chunk_size=700) == 1000
+    assert store.stats() == {"rows": 1000, "parts": 2, "sources": 1, "version": 2}
+    _check(store, pd.read_csv(source)) # Les appels de la première version ont été retirés des rollups
+    assert not any(os.path.exists(path) for path in old_parts + old_rollups) # Anciens blocs et rollups supprimés
+    assert len(os.listdir(store.parts_directory)) == 2
+
+
+def test_reopen_keeps_rollups_and_adds_sources(tmp_path, source):
+    store = CDRStore(str(tmp_path / "store"))
+    store.ingest(source, chunk_size=700)
+    reopened = CDRStore(str(tmp_path / "store"))
+    assert reopened.stats() == store.stats()
+    pd.testing.assert_frame_equal(reopened.rollup("topic"), store.rollup("topic"))
+
+    second = str(tmp_path / "cdr_2.parquet")
+    extra = generate_cdr_chunk(1, 2000, 500, 42, datetime(2024, 1, 1), "salt") # Appels CALL_2001 à CALL_2500
+    extra.to_parquet(second, index=False)
+    assert reopened.ingest(second, chunk_size=700) == 500
+    assert reopened.stats() == {"rows": 2500, "parts": 4, "sources": 2, "version": 2}
+    _check(CDRStore(str(tmp_path / "store")), pd.concat([pd.read_csv(source), extra], ignore_index=True))
@@ -0,0 +1,63 @@
+"""
+Tests : Découpage des longs dialogues (frontières de tours, chevauchement) et résumé hiérarchique
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Third party libraries -----
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.nlp.chunking import chunk_dialogue, split_turns # Découpage aux tours de parole
+from src.nlp.summarizer import DialogueSummarizer # Résumé automatique
+from tests.conftest import FakeRegistry, FakeSummarizer, FakeTokenizer # Pipelines factices
+
+DIALOGUE = "\n".join(f"{'Client_1' if i % 2 == 0 else 'Agent'}: tour numéro {i} avec quelques mots" for i in range(10)) # 7 mots par tour
+
+
+def test_split_turns_attaches_continuation_lines():
+    assert split_turns("Client_1: bonjour\nsuite de la phrase\n\nAgent: oui") == ["Client_1: bonjour suite de la phrase", "Agent: oui"]
+
+
+def test_split_turns_without_tags_keeps_lines():
+    assert split_turns("premier résumé.\n\ndeuxième résumé.\ntroisième.") == ["premier résumé.", "deuxième résumé.", "troisième."]
+
+
+def test_chunks_cut_at_turn_boundaries_within_budget():
+    chunks = chunk_dialogue(DIALOGUE, FakeTokenizer(), max_tokens=21)
+    assert [chunk.n_tokens for chunk in chunks] == [21, 21, 21, 7]
+    assert "\n".join(chunk.text for chunk in chunks) == DIALOGUE # Aucun tour perdu ni coupé
+
+
+def test_overlap_repeats_previous_turns():
+    turns = split_turns(DIALOGUE)
+    chunks = chunk_dialogue(DIALOGUE, FakeTokenizer(), max_tokens=21, overlap_turns=1)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.text.split("\n")[0] == previous.text.split("\n")[-1] # Le dernier tour est répété
+        assert current.n_tokens <= 21
+    assert chunks[-1].text.split("\n")[-1] == turns[-1]
+
+
+def test_turn_longer_than_budget_is_split():
+    chunks = chunk_dialogue("Client: " + " ".join(["mot"] * 100), None, max_tokens=10)
+    assert len(chunks) > 1 and all(chunk.n_tokens <= 10 for chunk in chunks)
+
+
+def test_hierarchical_summary_stops_when_not_shrinking():
+    pipe = FakeSummarizer(shrink=False)
+    summarizer = DialogueSummarizer(registry=FakeRegistry({"summarization": pipe}))
+    summary = summarizer.summarize_long(DIALOGUE, min_length=10, max_length=5, max_tokens=21)
+    window = pipe.calls[-1] # Dernier passage : une seule fenêtre, début et fin du niveau courant
+    assert len(window) == 1 and len(window[0].split()) <= 21
+    assert summary == window[0] + " " + window[0] # Le résultat est toujours une sortie du modèle, jamais du texte brut
+    assert len(pipe.calls) < 10 # La boucle s'arrête
+
+
+def test_hierarchical_summary_keeps_head_and_tail_when_levels_exhausted():
+    pipe = FakeSummarizer(shrink=False)
+    summarizer = DialogueSummarizer(registry=FakeRegistry({"summarization": pipe}))
+    summarizer.summarize_long(DIALOGUE, min_length=10, max_length=5, max_tokens=21, overlap_turns=0)
+    assert "tour numéro 0" in pipe.calls[-1][0] and "tour numéro 9" in pipe.calls[-1][0]
+
+
+def test_hierarchical_summary_rejects_budget_below_summary_length(registry):
+    with pytest.raises(ValueError):
+        DialogueSummarizer(registry=registry).summarize_long(DIALOGUE, max_length=120, max_tokens=100)
@@ -0,0 +1,94 @@
+"""
+Tests : Index des appels (listes inversées IVF mises à jour par ajout, reprise après un ajout interrompu ou un état non sauvegardé)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import hashlib # Vecteurs factices déterministes
+# ----- Third party libraries -----
+import numpy as np # Vecteurs factices
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.nlp import clustering as clustering_module # Sauvegarde de l'état rendue défaillante
+from src.nlp.clustering import CallClusterer # Regroupement et recherche d'appels similaires
+
+
+class FakeEmbedder: # Embeddings factices : vecteur normalisé tiré d'une graine issue du texte
+    def embed_batch(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        vectors = np.stack([np.random.default_rng(int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)).normal(size=8) for text in texts])
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+
+def calls(start: int, stop: int) -> tuple:
+    ids = [f"call_{i}" for i in range(start, stop)]
+    return ids, [f"Client: appel numéro {i}" for i in range(start, stop)]
+
+
+def test_inverted_lists_extended_with_new_rows(tmp_path):
+    clusterer = CallClusterer(str(tmp_path), n_clusters=2, n_cells=2, embedder=FakeEmbedder())
+    clusterer.add(*calls(0, 100)) # 100 >= 39 * 2 : index IVF entraîné
+    assert clusterer.stats()["ivf"]
+    clusterer.similar("Client: appel numéro 3") # Listes lues une fois
+    clusterer.add(*calls(100, 130))
+    incremental = clusterer._inverted_lists()
+    clusterer._lists = None
+    rebuilt = clusterer._inverted_lists()
+    assert incremental.keys() == rebuilt.keys()
+    for cell in rebuilt:
+        assert incremental[cell].tolist() == rebuilt[cell].tolist()
+    assert clusterer.similar_to("call_120", k=1, nprobe=2)
+    clusterer.close()
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    clusterer = CallClusterer(str(tmp_path), n_clusters=2, embedder=FakeEmbedder())
+    clusterer.add(*calls(0, 5))
+    clusterer.close()
+    with open(tmp_path / "vectors.f32", "ab") as file: # Vecteurs écrits sans que l'état n'ait été sauvegardé
+        file.write(b"\x00" * 4 * 8 * 3)
+    clusterer = CallClusterer(str(tmp_path), n_clusters=2, embedder=FakeEmbedder())
+    ids, texts = calls(5, 8)
+    clusterer.add(ids, texts)
+    assert (tmp_path / "vectors.f32").stat().st_size == 8 * 8 * 4
+    assert np.allclose(clusterer._matrix()[5:], FakeEmbedder().embed_batch(texts))
+    clusterer.close()
+
+
+def _crash_before_state_saved(monkeypatch, clusterer, ids, texts): # Table des appels validée, état jamais écrit
+    def dump(*args, **kwargs):
+        raise OSError("disque plein")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(clustering_module.joblib, "dump", dump)
+        with pytest.raises(OSError):
+            clusterer.add(ids, texts)
+    clusterer.close()
+
+
+def test_calls_committed_without_state_are_reindexed(tmp_path, monkeypatch):
+    clusterer = CallClusterer(str(tmp_path), n_clusters=2, embedder=FakeEmbedder())
+    clusterer.add(*calls(0, 5))
+    _crash_before_state_saved(monkeypatch, clusterer, *calls(5, 8))
+    clusterer = CallClusterer(str(tmp_path), n_clusters=2, embedder=FakeEmbedder())
+    assert len(clusterer) == 5 and not clusterer._known(calls(5, 8)[0])
+    ids, texts = calls(5, 10)
+    assert -1 not in clusterer.add(ids, texts) # Pas d'IntegrityError : les lignes 5 à 7 ont été retirées à l'ouverture
+    assert len(clusterer) == 10 and sum(clusterer.stats()["sizes"]) == 10
+    assert np.allclose(clusterer._matrix()[5:], FakeEmbedder().embed_batch(texts))
+    assert clusterer.similar_to("call_6", k=3)
+    clusterer.close()
+
+
+def test_clusters_of_unsaved_first_fit_are_reset(tmp_path, monkeypatch):
+    clusterer = CallClusterer(str(tmp_path), n_clusters=3, embedder=FakeEmbedder())
+    clusterer.add(*calls(0, 2)) # En attente du premier entraînement
+    _crash_before_state_saved(monkeypatch, clusterer, *calls(2, 4)) # Premier entraînement perdu
+    clusterer = CallClusterer(str(tmp_path), n_clusters=3, embedder=FakeEmbedder())
+    assert not clusterer.stats()["fitted"]
+    assert clusterer._clusters_of(calls(0, 2)[0]) == [-1, -1]
+    clusterer.add(*calls(2, 4))
+    assert -1 not in clusterer._clusters_of(calls(0, 4)[0])
+    clusterer.close()
@@ -0,0 +1,53 @@
+"""
+Tests : Corpus compacté (ajout, remplacement, réouverture, reprise après un ajout interrompu)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Third party libraries -----
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.data.corpus import TranscriptCorpus, convert_directory, parse_name # Corpus compacté
+
+
+def test_append_skip_and_replace(tmp_path):
+    corpus = TranscriptCorpus(str(tmp_path))
+    assert corpus.append([("CALL_0001", "Client: bonjour", "billing"), ("CALL_0002", "Agent: Ça marche ✓")]) == {"added": 2, "replaced": 0, "skipped": 0}
+    assert corpus.get("CALL_0002") == "Agent: Ça marche ✓"
+    assert corpus.append([("CALL_0001", "Client: bonjour", "billing"), ("CALL_0002", "Agent: nouvelle version")]) == {"added": 0, "replaced": 1, "skipped": 1}
+    assert corpus.get("CALL_0002") == "Agent: nouvelle version"
+    assert corpus.stats()["dead_bytes"] == len("Agent: Ça marche ✓".encode("utf-8")) # L'ancienne version reste dans le fichier
+    assert corpus.get_many(["CALL_0002", "CALL_9999"]) == ["Agent: nouvelle version", None]
+    assert [record.call_id for record in corpus.records()] == ["CALL_0001", "CALL_0002"]
+    assert [record.text for record in corpus.records(topic="billing")] == ["Client: bonjour"]
+    with pytest.raises(KeyError):
+        corpus.get("CALL_9999")
+    corpus.close()
+
+
+def test_reopen_and_interrupted_append(tmp_path):
+    corpus = TranscriptCorpus(str(tmp_path))
+    corpus.append([(f"CALL_{i:04d}", f"Client: appel {i}") for i in range(5)], batch_size=2)
+    corpus.close()
+    with open(corpus.data_path, "ab") as file:
+        file.write(b"octets d'un ajout interrompu") # Écrits sans validation de l'index
+    corpus = TranscriptCorpus(str(tmp_path))
+    assert len(corpus) == 5 and "CALL_0003" in corpus
+    assert corpus.get("CALL_0004") == "Client: appel 4"
+    corpus.append([("CALL_0005", "Client: appel 5")])
+    assert corpus.get("CALL_0005") == "Client: appel 5"
+    assert corpus.stats()["dead_bytes"] == 0 # Les octets orphelins ont été tronqués
+    assert corpus.verify() == []
+    corpus.close()
+
+
+def test_convert_directory(tmp_path):
+    source = tmp_path / "transcripts"
+    source.mkdir()
+    (source / "billing_01.txt").write_text("Client: ma facture", encoding="utf-8")
+    (source / "tech_support_02.txt").write_text("Client: la box", encoding="utf-8")
+    assert parse_name("tech_support_02.txt") == ("CALL_0002", "tech_support")
+    corpus = TranscriptCorpus(str(tmp_path / "corpus"))
+    assert convert_directory(str(source), corpus)["added"] == 2
+    assert convert_directory(str(source), corpus)["skipped"] == 2 # Relancer la conversion ne réécrit rien
+    assert corpus.get("CALL_0001") == "Client: ma facture"
+    corpus.close()
@@ -0,0 +1,34 @@
+"""
+Tests : Génération des données synthétiques (sortie identique quel que soit le nombre de workers)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Liste des transcriptions générées
+# ----- Local modules -----
+from scripts import make_data # Script testé
+
+
+def _files(directory) -> dict: # Contenu de tous les fichiers générés, par chemin relatif
+    contents = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                contents[os.path.relpath(path, directory)] = f.read()
+    return contents
+
+
+def test_same_output_whatever_the_number_of_workers(tmp_path):
+    common = ["--calls", "250", "--chunk-size", "40", "--transcripts", "12", "--seed", "7", "--start-date", "2024-01-01"]
+    make_data.main(common + ["--out", str(tmp_path / "single"), "--workers", "1"])
+    make_data.main(common + ["--out", str(tmp_path / "pool"), "--workers", "3"]) # 7 blocs : le pool est utilisé
+    single, pool = _files(tmp_path / "single"), _files(tmp_path / "pool")
+    assert len(single) == 13 and single == pool
+    assert single["cdr_synthetic.csv"].count(b"\n") == 251 # En-tête écrit une seule fois
+
+
+def test_default_start_date_is_reproducible(tmp_path):
+    for name in ("first", "second"):
+        make_data.main(["--calls", "50", "--transcripts", "2", "--workers", "1", "--out", str(tmp_path / name)])
+    assert _files(tmp_path / "first") == _files(tmp_path / "second")
@@ -0,0 +1,139 @@
+"""
+Tests : Instrumentation (étapes des pipelines, format texte Prometheus, route /metrics, mode désactivé)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Third party libraries -----
+import pytest # Framework de tests
+from fastapi.testclient import TestClient # Client HTTP de test (lifespan compris)
+# ----- Local modules -----
+from src.api import main # Application FastAPI
+from src.nlp import metrics # Module testé
+from src.nlp import registry as registry_module # Registre partagé remplacé par le registre de test
+from tests.conftest import FakeRegistry, FakeSentiment, FakeSummarizer, FakeZeroShot # Pipelines et registre factices
+
+
+class StagedSentiment(FakeSentiment): # Pipeline découpé en étapes, appelées par l'instance comme dans transformers.Pipeline
+    task = "sentiment-analysis"
+
+    def predict(self, text, **kwargs):
+        return self.postprocess(self._forward(self.preprocess(text), **kwargs))
+
+    def preprocess(self, text):
+        return text.lower()
+
+    def _forward(self, text, **kwargs):
+        return FakeSentiment.predict(self, text, **kwargs)
+
+    def postprocess(self, output):
+        return output
+
+
+class ChunkedZeroShot(FakeZeroShot): # preprocess générateur (un morceau par label), comme le pipeline zero-shot
+    task = "zero-shot-classification"
+
+    def predict(self, text, labels, **kwargs):
+        chunks = list(self.preprocess(text, labels))
+        return FakeZeroShot.predict(self, chunks[0], labels, **kwargs)
+
+    def preprocess(self, text, labels):
+        for label in labels:
+            yield text
+
+
+class InstrumentedRegistry(FakeRegistry): # Registre factice qui instrumente ses pipelines comme ModelRegistry._load
+    def _load(self, spec):
+        return metrics.instrument_pipeline(super()._load(spec), spec.cache_id)
+
+
+@pytest.fixture
+def enabled():
+    previous = metrics.metrics_enabled()
+    metrics.reset_metrics()
+    metrics.configure_metrics(True)
+    yield
+    metrics.configure_metrics(previous)
+    metrics.reset_metrics()
+
+
+def _series(text: str) -> dict: # Lignes "nom{labels} valeur" du format texte
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+
+def test_pipeline_stages_are_measured(enabled):
+    pipe = metrics.instrument_pipeline(StagedSentiment(), "sentiment")
+    assert pipe(["Merci beaucoup", "Toujours en panne", "Merci"])[0]["label"] == "5 stars"
+    series = _series(metrics.render_prometheus())
+    for stage in ("preprocess", "forward", "postprocess"):
+        labels = f'model="sentiment",stage="{stage}"'
+        assert series[f"nlp_stage_seconds_count{{{labels}}}"] == "3"
+        assert series[f'nlp_stage_seconds_bucket{{{labels},le="+Inf"}}'] == "3"
+    assert "# TYPE nlp_stage_seconds histogram" in metrics.render_prometheus()
+
+
+def test_instrumenting_twice_measures_once(enabled):
+    pipe = metrics.instrument_pipeline(metrics.instrument_pipeline(StagedSentiment(), "sentiment"), "sentiment")
+    pipe("Merci")
+    assert _series(metrics.render_prometheus())['nlp_stage_seconds_count{model="sentiment",stage="forward"}'] == "1"
+
+
+def test_generator_preprocess_measured_per_item(enabled):
+    pipe = metrics.instrument_pipeline(ChunkedZeroShot(), "topic")
+    assert pipe("ma facture", labels=["facturation", "support technique", "résiliation"])["labels"][0] == "facturation"
+    assert _series(metrics.render_prometheus())['nlp_stage_seconds_count{model="topic",stage="preprocess"}'] == "5" # Création du générateur, 3 morceaux, fin de l'itération
+
+
+def test_summarizer_forward_is_named_generate(enabled):
+    pipe = FakeSummarizer()
+    pipe.task = "summarization"
+    pipe._forward = lambda text: text
+    metrics.instrument_pipeline(pipe, "summary")._forward("texte")
+    assert 'nlp_stage_seconds_count{model="summary",stage="generate"}' in _series(metrics.render_prometheus())
+
+
+def test_prometheus_format(enabled):
+    metrics.observe_truncation("m", ["court", "un texte bien trop long"], max_length=10)
+    metrics.observe_tokens("m", [4, 40, 4000], limit=512)
+    metrics.set_gauge("nlp_queue_queued", 2, queue='a"b')
+    text = metrics.render_prometheus()
+    series = _series(text)
+    assert series['nlp_texts_total{model="m"}'] == "2"
+    assert series['nlp_truncated_texts_total{model="m",kind="chars"}'] == "1"
+    assert series['nlp_truncated_texts_total{model="m",kind="tokens"}'] == "1"
+    assert series['nlp_queue_queued{queue="a\\"b"}'] == "2" # Valeurs de labels échappées
+    assert "# TYPE nlp_truncated_texts_total counter" in text and "# TYPE nlp_queue_queued gauge" in text
+    buckets = [int(value) for key, value in series.items() if key.startswith('nlp_input_tokens_bucket{model="m"')]
+    assert buckets == sorted(buckets) and buckets[-1] == 3 # Buckets cumulatifs, +Inf = nombre d'observations
+    assert series['nlp_input_tokens_sum{model="m"}'] == "4044"
+
+
+def test_disabled_mode_is_a_noop():
+    previous = metrics.metrics_enabled()
+    metrics.configure_metrics(False)
+    metrics.reset_metrics()
+    try:
+        pipe = metrics.instrument_pipeline(StagedSentiment(), "sentiment")
+        assert pipe(["Merci", "Non"]) == StagedSentiment()(["Merci", "Non"])
+        with metrics.stage("sentiment", "batch"), metrics.batch("sentiment", 2):
+            pass
+        metrics.observe_truncation("sentiment", ["texte"], 1)
+        metrics.observe_tokens("sentiment", [10], 5)
+        metrics.observe_cache("sentiment", 1, 1)
+        metrics.set_gauge("nlp_queue_queued", 1, queue="sentiment")
+        assert metrics.render_prometheus() == "\n"
+    finally:
+        metrics.configure_metrics(previous)
+
+
+def test_metrics_route(monkeypatch, enabled):
+    pipes = {"sentiment-analysis": StagedSentiment(), "zero-shot-classification": FakeZeroShot(), "summarization": FakeSummarizer()}
+    monkeypatch.setattr(registry_module, "_default_registry", InstrumentedRegistry(pipes))
+    monkeypatch.setattr(main, "SUMMARY_ROUTER", False)
+    with TestClient(main.app) as client:
+        client.post("/analyze/", json={"text": "Client: merci pour la facture corrigée"})
+        response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert 'stage="forward"' in response.text and 'stage="batch"' in response.text
+    assert "# TYPE nlp_batch_size histogram" in response.text
+    assert 'nlp_queue_items{queue="' in response.text
+    assert "nlp_models_memory_bytes " in response.text
@@ -0,0 +1,40 @@
+"""
+Tests : Serveur préforké (répartition des coeurs entre les workers, mémoire d'un processus)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import os # Affinité CPU et pid du processus de test
+# ----- Third party libraries -----
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.api.prefork import memory_usage, split_cores # Répartition des coeurs et mesure mémoire
+
+
+@pytest.mark.parametrize("workers, cores, expected", [
+    (2, range(8), [[0, 1, 2, 3], [4, 5, 6, 7]]),
+    (3, range(8), [[0, 1, 2], [3, 4, 5], [6, 7]]), # Coeurs en trop donnés aux premiers workers
+    (1, [2, 5, 7], [[2, 5, 7]]), # Affinité non contiguë
+    (4, [0, 1], [[0], [1], [0], [1]]), # Plus de workers que de coeurs : un coeur chacun, partagé
+])
+def test_split_cores(workers, cores, expected):
+    assert split_cores(workers, cores) == expected
+
+
+def test_split_cores_uses_every_core_once():
+    for workers in range(1, 17):
+        blocks = split_cores(workers, range(16))
+        assert len(blocks) == workers and all(blocks)
+        assert sorted(core for block in blocks for core in block) == list(range(16))
+
+
+def test_split_cores_defaults_to_process_affinity():
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    assert sorted({core for block in split_cores(1) for core in block}) == available
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="/proc/<pid>/smaps_rollup indisponible")
+def test_memory_usage():
+    usage = memory_usage(os.getpid())
+    assert usage["rss"] > 0 and usage["shared"] + usage["private"] == usage["rss"]
+    assert memory_usage(-1) == {} # Processus inexistant
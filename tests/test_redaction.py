@@ -0,0 +1,52 @@
+"""
+Tests : Masquage des PII (motifs, noms composés, pseudonymes stables, traitement par blocs)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Third party libraries -----
+import pytest # Framework de tests
+# ----- Local modules -----
+from src.security.redaction import Redactor, redact_many # Masquage des PII
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Écrivez à jean.dupont+sav@mail.example.fr.", "Écrivez à [EMAIL]."),
+    ("IBAN FR76 3000 6000 0112 3456 7890 189 merci", "IBAN [IBAN] merci"),
+    ("Ma commande CMD-20231234 est en retard", "Ma commande [COMMANDE] est en retard"),
+    ("la commande n° 123456 n'est pas arrivée", "la commande n° [COMMANDE] n'est pas arrivée"),
+    ("Rappelez-moi au 06 12 34 56 78.", "Rappelez-moi au [TÉLÉPHONE]."),
+    ("Rappelez-moi au +33 (0)6.12.34.56.78", "Rappelez-moi au [TÉLÉPHONE]"),
+    ("Client: Jean-Pierre Durand", "Client: [PRÉNOM] [NOM]"),
+    ("Marie-Claire Dupont-Moreau a rappelé", "[PRÉNOM] [NOM] a rappelé"),
+    ("Thomas Martin", "[PRÉNOM] [NOM]"), # Thomas est aussi un nom : marqué comme prénom
+    ("Martinez et Pierrette ne sont pas dans le dictionnaire", "Martinez et Pierrette ne sont pas dans le dictionnaire"),
+])
+def test_patterns(text, expected):
+    assert Redactor().redact(text) == expected
+
+
+def test_ignore_case_names():
+    assert Redactor().redact("jean-pierre durand") == "jean-pierre durand"
+    assert Redactor(ignore_case=True).redact("jean-pierre durand") == "[PRÉNOM] [NOM]"
+
+
+def test_hash_pseudonyms_are_stable_across_formats():
+    redactor = Redactor(mode="hash", salt="sel")
+    assert redactor.redact("06 12 34 56 78") == redactor.redact("+33 6 12 34 56 78")
+    assert redactor.redact("Durand") != Redactor(mode="hash", salt="autre").redact("Durand")
+    assert redactor.redact("Durand").startswith("[NOM:")
+
+
+def test_find_and_counts():
+    redactor = Redactor()
+    text = "Jean-Pierre, commande n° 12345"
+    assert redactor.find(text) == [("FIRST_NAME", 0, 11), ("ORDER", 25, 30)]
+    redactor.redact(text)
+    assert redactor.counts == {"FIRST_NAME": 1, "ORDER": 1}
+
+
+def test_lines_and_many_match_single_redaction():
+    redactor = Redactor()
+    lines = [f"Client_{i}: Jean-Pierre au 0{i % 9 + 1} 12 34 56 78\n" for i in range(50)]
+    assert "".join(redactor.redact_lines(lines, block_size=100)) == redactor.redact("".join(lines))
+    assert redact_many(lines, redactor) == [redactor.redact(line) for line in lines]
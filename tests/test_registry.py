@@ -0,0 +1,35 @@
+"""
+Tests : Registre partagé des modèles (un seul chargement par modèle)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Local modules -----
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from tests.conftest import FakeRegistry, FakeSentiment # Registre et pipeline factices
+
+
+def test_pipeline_loaded_once_and_shared():
+    loads = []
+
+    class CountingRegistry(FakeRegistry):
+        def _load(self, spec):
+            loads.append(spec)
+            return super()._load(spec)
+
+    registry = CountingRegistry({"sentiment-analysis": FakeSentiment()})
+    first, second = SentimentAnalyzer(registry=registry), SentimentAnalyzer(registry=registry)
+    assert not registry.is_loaded(*first.spec) # Aucun chargement à la construction
+    first.analyze("Client: merci")
+    second.analyze("Client: merci")
+    assert first.analyzer is second.analyzer
+    assert len(loads) == 1
+
+
+def test_evict_and_reload():
+    registry = FakeRegistry({"sentiment-analysis": FakeSentiment()})
+    analyzer = SentimentAnalyzer(registry=registry)
+    analyzer.analyze("Client: bonjour")
+    assert registry.evict(*analyzer.spec)
+    assert not registry.is_loaded(*analyzer.spec)
+    analyzer.analyze("Client: bonjour")
+    assert registry.is_loaded(*analyzer.spec)
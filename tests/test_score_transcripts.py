@@ -0,0 +1,78 @@
+"""
+Tests : Analyse en masse (reprise des lots terminés, manifeste du job, jointure des CDR)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+from concurrent.futures import Future # Résultats du pool factice
+# ----- Third party libraries -----
+import pandas as pd # Lecture du résultat
+import pytest # Framework de tests
+# ----- Local modules -----
+from scripts import score_transcripts # Script testé
+from src.nlp import registry as registry_module # Registre partagé remplacé par le registre de test
+
+
+class InlineExecutor: # Pool factice : les lots sont analysés dans le processus du test (pipelines factices)
+    submitted = 0
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        InlineExecutor.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch, registry):
+    monkeypatch.setattr(registry_module, "_default_registry", registry)
+    monkeypatch.setattr(score_transcripts, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(score_transcripts, "_worker_analyzer", None) # Globals des workers restaurés après le test
+    monkeypatch.setattr(score_transcripts, "_worker_redactor", None)
+    InlineExecutor.submitted = 0
+    source = tmp_path / "transcripts"
+    source.mkdir()
+    for i, text in enumerate(["Client_1: ma facture est fausse, merci de vérifier", "Client_1: la box ne marche plus",
+                              "Client_1: Jean Dupont au 06 12 34 56 78, merci"], start=1):
+        (source / f"call_{i:02d}.txt").write_text(text, encoding="utf-8")
+    pd.DataFrame({"call_id": ["CALL_0001", "CALL_0002"], "duration": [120, 45]}).to_csv(tmp_path / "cdr.csv", index=False)
+    out = tmp_path / "scores"
+    return [str(source), "--cdr", str(tmp_path / "cdr.csv"), "--out", str(out), "--workers", "1", "--shard-size", "2"], out
+
+
+def test_scores_joined_with_cdr(job):
+    args, out = job
+    score_transcripts.main(args)
+    scores = pd.read_parquet(out / "scores.parquet")
+    assert list(scores["call_id"]) == ["CALL_0001", "CALL_0002", "CALL_0003"]
+    assert list(scores["predicted_topic"]) == ["facturation", "support technique", "support technique"]
+    assert scores["duration"].tolist()[:2] == [120, 45] and pd.isna(scores["duration"].iloc[2]) # Appel sans CDR conservé
+    assert InlineExecutor.submitted == 2
+
+
+def test_resume_skips_finished_shards(job):
+    args, out = job
+    score_transcripts.main(args)
+    (out / "shards" / "shard_000001.parquet").unlink() # Lot perdu (interruption)
+    InlineExecutor.submitted = 0
+    score_transcripts.main(args)
+    assert InlineExecutor.submitted == 1 # Seul le lot manquant est recalculé
+    assert len(pd.read_parquet(out / "scores.parquet")) == 3
+
+
+def test_resume_refused_when_options_change(job):
+    args, out = job
+    score_transcripts.main(args)
+    with pytest.raises(SystemExit, match="options"):
+        score_transcripts.main(args + ["--redact"]) # Lots non masqués déjà écrits
+    score_transcripts.main(args + ["--redact", "--restart"])
+    assert "[TÉLÉPHONE]" in pd.read_parquet(out / "scores.parquet")["summary"].iloc[2]
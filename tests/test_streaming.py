@@ -0,0 +1,58 @@
+"""
+Tests : Analyse incrémentale des appels en direct (file d'événements bornée)
+"""
+
+# ----- Import libraries PEP 8 -----
+# ----- Standard library -----
+import asyncio # Sessions asynchrones
+import time # Sessions inactives
+# ----- Local modules -----
+from src.nlp.classifier import DialogueClassifier # Classification thématique
+from src.nlp.sentiment import SentimentAnalyzer # Analyse de sentiment
+from src.nlp.streaming import LiveAnalysisHub, LiveCallSession # Sessions des appels en cours
+
+
+class AlternatingHub: # Hub factice : le thème change à chaque tour
+    def __init__(self):
+        self.turn = 0
+
+    async def score_turn(self, text: str) -> tuple:
+        self.turn += 1
+        billing = float(self.turn % 2)
+        return {"label": "3 stars", "score": 1.0}, {"facturation": billing, "support technique": 1.0 - billing}
+
+
+def test_unconsumed_events_stay_bounded():
+    async def scenario():
+        session = LiveCallSession(AlternatingHub(), "CALL_0001", topic_decay=0.0, min_topic_turns=1, max_events=4)
+        for i in range(20):
+            await session.add_turn(f"Client_1: tour {i}")
+        assert session._events.qsize() == 4
+        assert session.dropped_events == 20 - 1 - 4 # Un changement de thème par tour, sauf le premier
+        session.close()
+        return [event async for event in session.events()]
+
+    events = asyncio.run(scenario())
+    assert [event["turn"] for event in events] == [18, 19, 20] # Les plus récents sont gardés (close() prend une place)
+
+
+def test_no_turn_analysed_after_close():
+    async def scenario():
+        hub = AlternatingHub()
+        session = LiveCallSession(hub, "CALL_0001")
+        await session.add_turn("Client_1: bonjour")
+        session.close()
+        assert await session.add_turn("Client_1: encore là ?") == []
+        return hub.turn, session.turns
+
+    assert asyncio.run(scenario()) == (1, 1) # Le modèle n'est pas appelé après close()
+
+
+def test_sessions_leave_the_hub(registry):
+    hub = LiveAnalysisHub(DialogueClassifier(registry=registry), SentimentAnalyzer(registry=registry), idle_timeout=0.05)
+    hub.session("CALL_0001").close() # Fermeture par la session elle-même
+    assert "CALL_0001" not in hub.sessions
+    abandoned = hub.session("CALL_0002") # Client déconnecté : close() n'est jamais appelé
+    time.sleep(0.06)
+    hub.session("CALL_0003") # L'ouverture d'un appel nettoie les sessions inactives
+    assert list(hub.sessions) == ["CALL_0003"] and abandoned.closed